@@ -0,0 +1,50 @@
+"""Benchmark building Jinja environments for a template.
+
+Compares building a fresh `StrictEnvironment` for every phase of a bake
+(prompting, path and file rendering, hooks) with the shared environments
+handed out by `create_env_with_context`, and the rendering of a template
+string through each.
+
+Run from the repository root::
+
+    python benchmarks/bench_environment.py
+"""
+import timeit
+
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.utils import create_env_with_context
+
+CONTEXT = {
+    'cookiecutter': {
+        'project_name': 'Fake Project',
+        'repo_name': '{{ cookiecutter.project_name|lower|replace(" ", "-") }}',
+        '_extensions': ['jinja2.ext.i18n'],
+    }
+}
+PHASES = 4
+NUMBER = 200
+
+
+def fresh_environments():
+    """Build one environment per phase and render a name with each."""
+    for _ in range(PHASES):
+        env = StrictEnvironment(context=CONTEXT, keep_trailing_newline=True)
+        env.from_string(CONTEXT['cookiecutter']['repo_name']).render(**CONTEXT)
+
+
+def shared_environment():
+    """Get the shared environment for each phase and render a name with it."""
+    for _ in range(PHASES):
+        env = create_env_with_context(CONTEXT)
+        env.from_string(CONTEXT['cookiecutter']['repo_name']).render(**CONTEXT)
+
+
+def main():
+    """Print the time per bake for both strategies."""
+    for func in (fresh_environments, shared_environment):
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER
+        print(f'{func.__name__:20} {seconds * 1e6:10.1f} us per bake')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark the time taken to import the modules of the command line.
+
+Each entry point is imported in a new interpreter run with ``-X importtime``
+a number of times, and the median of the cumulative import time Python
+reports for it is written as JSON, along with the modules that contributed
+the most to it and the heavy dependencies it imported:
+
+* ``cookiecutter.cli``: what ``cookiecutter --version`` and ``--help`` import.
+* ``cookiecutter.main``: what a bake imports before it locates the template.
+
+Given the JSON of an earlier run with ``--compare``, the entry points whose
+import time grew by more than ``--tolerance`` are listed and the exit status
+is 1, like ``bench_pipeline.py``.
+
+Run from the repository root::
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+
+from cookiecutter import __version__
+
+ENTRY_POINTS = ('cookiecutter.cli', 'cookiecutter.main')
+
+#: Dependencies of a bake that the command line should import only when used.
+HEAVY_MODULES = (
+    'arrow', 'binaryornot', 'jinja2', 'requests', 'rich', 'slugify', 'yaml'
+)
+
+
+def import_times(code):
+    """Run ``code`` in a new interpreter and return its import times.
+
+    :return: A dict of the cumulative import time of each module imported,
+        in seconds, by module name, including those of the startup of the
+        interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def bench_module(module, repeat, top):
+    """Time the import of ``module`` ``repeat`` times."""
+    startup = import_times('pass')
+    runs = [import_times(f'import {module}') for _ in range(repeat)]
+    slowest = sorted(
+        (name for name in runs[-1] if name != module and name not in startup),
+        key=lambda name: runs[-1][name],
+        reverse=True,
+    )[:top]
+    return {
+        'module': module,
+        'median': statistics.median(times[module] for times in runs),
+        'min': min(times[module] for times in runs),
+        'runs': repeat,
+        'heavy': sorted(name for name in HEAVY_MODULES if name in runs[-1]),
+        'slowest': {name: runs[-1][name] for name in slowest},
+    }
+
+
+def compare(results, baseline_file, tolerance):
+    """Return the results slower than in ``baseline_file`` beyond ``tolerance``."""
+    with open(baseline_file) as fh:
+        report = json.load(fh)
+    baseline = {result['module']: result['min'] for result in report['results']}
+    return [
+        (result, baseline[result['module']])
+        for result in results
+        if result['module'] in baseline
+        and result['min'] > baseline[result['module']] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    """Run the benchmarks and print or save their JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--repeat', type=int, default=10, help='Imports of each module.'
+    )
+    parser.add_argument(
+        '--top', type=int, default=10, help='Slowest imports to report.'
+    )
+    parser.add_argument('--output', help='Write the JSON report to this file.')
+    parser.add_argument(
+        '--compare', metavar='BASELINE', help='JSON report to compare with.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25, help='Slowdown allowed by --compare.'
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in ENTRY_POINTS:
+        result = bench_module(module, args.repeat, args.top)
+        heavy = ', '.join(result['heavy']) or '-'
+        print(
+            f'{module:18} {result["median"] * 1e3:8.2f} ms median '
+            f'{result["min"] * 1e3:8.2f} ms min  heavy: {heavy}',
+            file=sys.stderr,
+        )
+        results.append(result)
+
+    report = json.dumps(
+        {
+            'cookiecutter': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'results': results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(report + '\n')
+    else:
+        print(report)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for result, before in regressions:
+            after = result['min']
+            print(
+                f'{result["module"]}: {before * 1e3:.2f} ms -> {after * 1e3:.2f} ms',
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""Benchmark the phases of a bake on templates of different shapes.
+
+The templates are synthesized into a temporary directory, one per shape:
+
+* ``small_files``: thousands of small rendered files spread over directories.
+* ``huge_files``: a couple of multi-megabyte files, one rendered, one plain.
+* ``deep_nesting``: a directory nested fifty levels deep with rendered names.
+* ``binary``: hundreds of binary files, with and without known extensions.
+* ``many_hooks``: a small tree with Python and shell scripts for every hook.
+* ``copy_patterns``: hundreds of ``_copy_without_render`` patterns over a
+  thousand files.
+
+For each shape, `generate_context`, `prompt_for_config` without input,
+`generate_files` and `cookiecutter` end to end are timed, and the timings are
+written as JSON. The first run of each phase is reported apart as ``cold``,
+as later runs reuse the environments and caches it filled. `generate_files`
+is called without a cache directory, so it compiles every template on each
+run, while `cookiecutter` keeps its compiled templates between runs.
+
+Given the JSON of an earlier run with ``--compare``, the phases whose best
+time grew by more than ``--tolerance`` are listed and the exit status is 1,
+so that regressions can be caught by comparing against a saved baseline.
+
+Run from the repository root::
+
+    python benchmarks/bench_pipeline.py --output baseline.json
+    python benchmarks/bench_pipeline.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from cookiecutter import __version__
+from cookiecutter.generate import generate_context, generate_files
+from cookiecutter.main import cookiecutter
+from cookiecutter.prompt import prompt_for_config
+
+PROJECT = '{{cookiecutter.project_slug}}'
+RENDERED = (
+    '# {{ cookiecutter.project_name }}\n'
+    '\n'
+    '{{ cookiecutter.description }}\n'
+    '{% if cookiecutter.use_docker == "y" %}Docker is used.{% endif %}\n'
+    'Author: {{ cookiecutter.author }} <{{ cookiecutter.email }}>\n'
+)
+PLAIN = 'Nothing to render in this file.\n' * 4
+
+
+def base_context(**extra):
+    """Return a ``cookiecutter.json`` with rendered defaults and choices."""
+    context = {
+        'project_name': 'Benchmark Project',
+        'project_slug': '{{ cookiecutter.project_name|lower|replace(" ", "_") }}',
+        'author': 'Jane Doe',
+        'description': 'A project baked by {{ cookiecutter.author }}.',
+        'email': '{{ cookiecutter.author|lower|replace(" ", ".") }}@example.com',
+        'use_docker': ['y', 'n'],
+        'license': ['MIT', 'BSD-3-Clause', 'GPL-3.0', 'Apache-2.0'],
+        'settings': {'debug': False, 'workers': 4},
+    }
+    for i in range(24):
+        context[f'option_{i}'] = f'{{{{ cookiecutter.project_slug }}}}_{i}'
+    context.update(extra)
+    return context
+
+
+def write(path, data):
+    """Write ``data``, text or bytes, to ``path``, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb' if isinstance(data, bytes) else 'w') as fh:
+        fh.write(data)
+
+
+def small_files(repo_dir, scale):
+    """Thousands of small rendered files in forty directories."""
+    for i in range(int(2000 * scale)):
+        write(os.path.join(repo_dir, PROJECT, f'pkg_{i % 40}', f'mod_{i}.py'), RENDERED)
+    return base_context()
+
+
+def huge_files(repo_dir, scale):
+    """A rendered and a plain file of several megabytes each."""
+    blocks = int(128 * scale)
+    block = PLAIN * 1024
+    write(
+        os.path.join(repo_dir, PROJECT, 'rendered.txt'),
+        ''.join(block + '{{ cookiecutter.project_slug }}\n' for _ in range(blocks)),
+    )
+    write(os.path.join(repo_dir, PROJECT, 'plain.txt'), block * blocks)
+    return base_context()
+
+
+def deep_nesting(repo_dir, scale):
+    """A directory fifty levels deep, with rendered names and a file per level."""
+    path = os.path.join(repo_dir, PROJECT)
+    for level in range(int(50 * scale)):
+        path = os.path.join(path, f'{{{{cookiecutter.project_slug}}}}_{level}')
+        write(os.path.join(path, '{{cookiecutter.project_slug}}.txt'), RENDERED)
+    return base_context()
+
+
+def binary(repo_dir, scale):
+    """Binary files, half of them only recognized by their contents."""
+    rng = random.Random(0)
+    for i in range(int(200 * scale)):
+        ext = 'png' if i % 2 else 'dat'
+        data = b'\x89PNG\r\n\x1a\n' + rng.randbytes(64 * 1024)
+        write(os.path.join(repo_dir, PROJECT, 'assets', f'image_{i}.{ext}'), data)
+    return base_context()
+
+
+def many_hooks(repo_dir, scale):
+    """A small tree with a Python and, off Windows, a shell script per hook."""
+    for i in range(int(50 * scale)):
+        write(os.path.join(repo_dir, PROJECT, f'file_{i}.txt'), RENDERED)
+    for hook in ('pre_prompt', 'pre_gen_project', 'post_gen_project'):
+        write(
+            os.path.join(repo_dir, 'hooks', f'{hook}.py'),
+            'import os\nos.listdir(os.getcwd())\n',
+        )
+        if sys.platform != 'win32':
+            script = os.path.join(repo_dir, 'hooks', f'{hook}.sh')
+            write(script, '#!/bin/sh\ntrue\n')
+            os.chmod(script, 0o755)
+    return base_context()
+
+
+def copy_patterns(repo_dir, scale):
+    """Hundreds of copy-only patterns, matching every fourth directory."""
+    files = int(1000 * scale)
+    for i in range(files):
+        path = os.path.join(repo_dir, PROJECT, f'dir_{i % 100}', f'file_{i}.txt')
+        write(path, RENDERED)
+    patterns = [f'dir_{i}/*' for i in range(0, 100, 4)]
+    patterns += [f'*.unused_{i}' for i in range(200)]
+    return base_context(_copy_without_render=patterns)
+
+
+SHAPES = {
+    func.__name__: func
+    for func in (
+        small_files, huge_files, deep_nesting, binary, many_hooks, copy_patterns
+    )
+}
+
+
+def measure(func, repeat, cleanup=None):
+    """Return the seconds taken by ``repeat`` calls of ``func``."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        if cleanup:
+            cleanup()
+    return timings
+
+
+def bench_shape(shape, work_dir, repeat, scale):
+    """Synthesize the template of ``shape`` and time each phase on it."""
+    repo_dir = os.path.join(work_dir, shape, 'template')
+    output_dir = os.path.join(work_dir, shape, 'output')
+    config = {
+        'cookiecutters_dir': os.path.join(work_dir, shape, 'cookiecutters'),
+        'replay_dir': os.path.join(work_dir, shape, 'replay'),
+    }
+    context_file = os.path.join(repo_dir, 'cookiecutter.json')
+    write(context_file, json.dumps(SHAPES[shape](repo_dir, scale), indent=2))
+    raw_context = generate_context(context_file)
+    context = {'cookiecutter': prompt_for_config(raw_context, no_input=True)}
+
+    def clean_output():
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    phases = {
+        'generate_context': (lambda: generate_context(context_file), None),
+        'prompt_for_config': (
+            lambda: prompt_for_config(raw_context, no_input=True),
+            None,
+        ),
+        'generate_files': (
+            lambda: generate_files(repo_dir, context, output_dir=output_dir),
+            clean_output,
+        ),
+        'cookiecutter': (
+            lambda: cookiecutter(
+                repo_dir, no_input=True, output_dir=output_dir, default_config=config
+            ),
+            clean_output,
+        ),
+    }
+    for phase, (func, cleanup) in phases.items():
+        timings = measure(func, repeat, cleanup)
+        warm = timings[1:] or timings
+        yield {
+            'shape': shape,
+            'phase': phase,
+            'cold': timings[0],
+            'min': min(warm),
+            'median': statistics.median(warm),
+            'runs': len(timings),
+        }
+
+
+def compare(results, baseline_file, tolerance):
+    """Return the results slower than in ``baseline_file`` beyond ``tolerance``."""
+    with open(baseline_file) as fh:
+        baseline = {
+            (result['shape'], result['phase']): result['min']
+            for result in json.load(fh)['results']
+        }
+    return [
+        (result, baseline[result['shape'], result['phase']])
+        for result in results
+        if (result['shape'], result['phase']) in baseline
+        and result['min'] > baseline[result['shape'], result['phase']] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    """Run the benchmarks and print or save their JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--shape',
+        action='append',
+        choices=sorted(SHAPES),
+        help='Shape to run, all by default.',
+    )
+    parser.add_argument('--repeat', type=int, default=5, help='Runs of each phase.')
+    parser.add_argument(
+        '--scale', type=float, default=1.0, help='Size factor of the templates.'
+    )
+    parser.add_argument('--output', help='Write the JSON report to this file.')
+    parser.add_argument(
+        '--compare', metavar='BASELINE', help='JSON report to compare with.'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25, help='Slowdown allowed by --compare.'
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for shape in args.shape or SHAPES:
+            for result in bench_shape(shape, work_dir, args.repeat, args.scale):
+                print(
+                    f'{shape:14} {result["phase"]:18} '
+                    f'{result["min"] * 1e3:10.2f} ms min '
+                    f'{result["cold"] * 1e3:10.2f} ms cold',
+                    file=sys.stderr,
+                )
+                results.append(result)
+
+    report = json.dumps(
+        {
+            'cookiecutter': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'scale': args.scale,
+            'results': results,
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(report + '\n')
+    else:
+        print(report)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for result, before in regressions:
+            print(
+                f'{result["shape"]} {result["phase"]}: '
+                f'{before * 1e3:.2f} ms -> {result["min"] * 1e3:.2f} ms',
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Benchmark the peak memory of generating files of growing size.
+
+Each size is generated by a fresh interpreter, from a small template whose
+loop renders a seed file of about that many megabytes, and the peak resident
+set size of that interpreter is reported. As rendered files are streamed to
+disk, the peak stays flat while the file grows.
+
+Run from the repository root, on a platform with the `resource` module::
+
+    python benchmarks/bench_streaming_render.py
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.generate import generate_file
+from cookiecutter.utils import work_in
+
+SIZES_MB = (4, 16, 64)
+ROW = 'INSERT INTO seeds VALUES ({{ i }}, "{{ cookiecutter.name }}");\n'
+ROW_BYTES = 50
+
+
+def generate(size_mb):
+    """Generate a seed file of about ``size_mb`` megabytes."""
+    rows = size_mb * 1024 * 1024 // ROW_BYTES
+    with tempfile.TemporaryDirectory() as tmp_dir, work_in(tmp_dir):
+        os.mkdir('out')
+        with open('seed.sql', 'w') as fh:
+            fh.write('{% for i in range(cookiecutter.rows) %}' + ROW + '{% endfor %}')
+        generate_file(
+            'out',
+            'seed.sql',
+            {'cookiecutter': {'rows': rows, 'name': 'x' * 20}},
+            StrictEnvironment(keep_trailing_newline=True),
+        )
+        return os.path.getsize(os.path.join('out', 'seed.sql'))
+
+
+def main():
+    """Print the peak RSS of generating each size in a fresh interpreter."""
+    for size_mb in SIZES_MB:
+        output = subprocess.check_output(
+            [sys.executable, __file__, str(size_mb)], text=True
+        )
+        size, peak_kb = output.split()
+        print(
+            f'{int(size) / 2**20:8.1f} MB file '
+            f'{int(peak_kb) / 1024:8.1f} MB peak RSS'
+        )
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        size = generate(int(sys.argv[1]))
+        # ru_maxrss is in kilobytes on Linux, in bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak //= 1024
+        print(size, peak)
+    else:
+        main()
@@ -0,0 +1,36 @@
+"""Prompts based on rich, used by `cookiecutter.prompt`.
+
+They live in a module of their own so that rich, which is slow to import, is
+only imported once a prompt is shown.
+"""
+from rich.prompt import Confirm, InvalidResponse, PromptBase
+from cookiecutter.prompt import process_json
+
+
+class YesNoPrompt(Confirm):
+    """A prompt that returns a boolean for yes/no questions."""
+    yes_choices = ['1', 'true', 't', 'yes', 'y', 'on']
+    no_choices = ['0', 'false', 'f', 'no', 'n', 'off']
+
+    def process_response(self, value: str) -> bool:
+        """Convert choices to a bool."""
+        value = value.strip().lower()
+        if value in self.yes_choices:
+            return True
+        elif value in self.no_choices:
+            return False
+        else:
+            raise InvalidResponse(self.validate_error_message)
+
+
+class JsonPrompt(PromptBase[dict]):
+    """A prompt that returns a dict from JSON string."""
+    default = None
+    response_type = dict
+    validate_error_message = (
+        '[prompt.invalid]  Please enter a valid JSON string')
+
+    @staticmethod
+    def process_response(value: str) -> dict:
+        """Convert choices to a dict."""
+        return process_json(value)
@@ -0,0 +1,287 @@
+"""Precompiled template bundles.
+
+A bundle packs a template repository into a single file, together with the
+work every bake from it would otherwise repeat: the classification of its
+binary files and the Jinja2 bytecode of the files it renders.
+
+The file starts with `BUNDLE_MAGIC` and the length of a JSON header as an
+8 byte big-endian integer, followed by the header and the contents of the
+files. The header lists the directories and files of the repository with
+their modes, and the offsets and sizes of their contents and of the bytecode
+cache entries.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import sys
+import tempfile
+
+from cookiecutter.environment import TEMPLATE_CACHE_DIR, TemplateBytecodeCache
+from cookiecutter.exceptions import InvalidBundleException
+from cookiecutter.filetypes import FileClassifier, classifier_cache_file
+from cookiecutter.find import find_template
+from cookiecutter.generate import (
+    _copy_only_matcher,
+    _exclude_matcher,
+    _file_output,
+    generate_context,
+)
+from cookiecutter.timing import timed
+from cookiecutter.utils import (
+    create_env_with_context,
+    make_sure_path_exists,
+    rmtree,
+    work_in,
+)
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_MAGIC = b'CCBUNDLE'
+BUNDLE_VERSION = 1
+#: Extension of bundle files, see `is_bundle()`.
+BUNDLE_EXTENSION = '.ccbundle'
+#: Directory, inside ``clone_to_dir``, holding the unpacked bundles.
+BUNDLE_CACHE_DIR = '.bundle_cache'
+
+_HEADER = struct.Struct('>8sQ')
+_IGNORED_DIRS = frozenset({'.git', '.hg', '.svn'})
+
+
+def is_bundle(value):
+    """Return True if value names a template bundle."""
+    return value.lower().endswith(BUNDLE_EXTENSION)
+
+
+def create_bundle(repo_dir, bundle_file):
+    """Pack the template repository ``repo_dir`` into ``bundle_file``.
+
+    The files of the template are classified, and the ones to render are
+    compiled, with the settings of the context in its ``cookiecutter.json``.
+    Version control directories are left out.
+
+    :param repo_dir: Directory holding ``cookiecutter.json`` and the template.
+    :param bundle_file: Path of the bundle to write.
+    :return: The number of compiled templates in the bundle.
+    """
+    repo_dir = os.path.abspath(repo_dir)
+    context = generate_context(os.path.join(repo_dir, 'cookiecutter.json'))
+    env = create_env_with_context(context, repo_dir)
+    template_dir = find_template(repo_dir, env)
+    classifier = FileClassifier()
+    copy_only = _copy_only_matcher(context)
+    exclude = _exclude_matcher(context)
+    binaries = []
+
+    with tempfile.TemporaryDirectory() as bytecode_dir:
+        compile_env = env.overlay(bytecode_cache=TemplateBytecodeCache(bytecode_dir))
+        with work_in(template_dir):
+            for root, dirs, files in os.walk('.'):
+                skip = exclude.ignore(root, dirs + files)
+                dirs[:] = sorted(name for name in dirs if name not in skip)
+                for name in sorted(files):
+                    infile = os.path.normpath(os.path.join(root, name))
+                    if name in skip or copy_only(infile):
+                        continue
+                    kind, _, data = _file_output(
+                        infile, context, compile_env, classifier, render=False
+                    )
+                    if kind == 'binary':
+                        binaries.append(infile)
+                    elif kind == 'rendered':
+                        compile_env.from_source(
+                            data.decode('utf-8'),
+                            infile.replace(os.path.sep, '/'),
+                            infile,
+                        )
+
+        bytecode = {
+            name: os.path.join(bytecode_dir, name)
+            for name in sorted(os.listdir(bytecode_dir))
+        }
+        _write_bundle(
+            bundle_file,
+            repo_dir,
+            os.path.relpath(template_dir, repo_dir),
+            binaries,
+            bytecode,
+        )
+    logger.debug('Bundled %s into %s', repo_dir, bundle_file)
+    return len(bytecode)
+
+
+def _write_bundle(bundle_file, repo_dir, template, binaries, bytecode):
+    """Write the header and contents of a bundle of ``repo_dir``."""
+    entries = []
+    sources = []
+    offset = 0
+    for root, dirs, files in os.walk(repo_dir):
+        dirs[:] = sorted(d for d in dirs if d not in _IGNORED_DIRS)
+        for name in dirs + sorted(files):
+            path = os.path.join(root, name)
+            entry = {
+                'path': os.path.relpath(path, repo_dir).replace(os.sep, '/'),
+                'mode': stat.S_IMODE(os.stat(path).st_mode),
+            }
+            if name in files:
+                size = os.path.getsize(path)
+                entry.update(offset=offset, size=size)
+                sources.append(path)
+                offset += size
+            entries.append(entry)
+
+    bytecode_entries = []
+    for name, path in bytecode.items():
+        size = os.path.getsize(path)
+        bytecode_entries.append({'name': name, 'offset': offset, 'size': size})
+        sources.append(path)
+        offset += size
+
+    header = json.dumps(
+        {
+            'version': BUNDLE_VERSION,
+            'name': os.path.basename(repo_dir),
+            'template': template.replace(os.sep, '/'),
+            'binaries': [path.replace(os.sep, '/') for path in binaries],
+            'cache_tag': sys.implementation.cache_tag,
+            'entries': entries,
+            'bytecode': bytecode_entries,
+        }
+    ).encode('utf-8')
+
+    tmp_file = f'{bundle_file}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_file, 'wb') as out:
+            out.write(_HEADER.pack(BUNDLE_MAGIC, len(header)))
+            out.write(header)
+            for path in sources:
+                with open(path, 'rb') as fh:
+                    while chunk := fh.read(1024 * 1024):
+                        out.write(chunk)
+        os.replace(tmp_file, bundle_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
+
+@timed
+def unpack_bundle(bundle_file, clone_to_dir):
+    """Unpack ``bundle_file`` into the bundle cache of ``clone_to_dir``.
+
+    The bundle is read through a single memory map. Each bundle is unpacked
+    once, into a directory named after the SHA-256 of its contents that later
+    calls return as is. The file classifications and bytecode it holds are
+    added to the template cache of ``clone_to_dir`` on every call, so that
+    bakes from it neither sniff nor compile its files, even after the cache
+    evicted them.
+
+    :param bundle_file: Path of the bundle.
+    :param clone_to_dir: The cookiecutter repository directory holding the
+        bundle cache.
+    :return: The unpacked repository directory.
+    """
+    try:
+        with open(bundle_file, 'rb') as fh, mmap.mmap(
+            fh.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            header, start = _read_header(data, bundle_file)
+            digest = hashlib.sha256(data).hexdigest()
+            cache_dir = os.path.join(clone_to_dir, BUNDLE_CACHE_DIR)
+            tree_dir = os.path.join(cache_dir, digest)
+            repo_dir = os.path.join(tree_dir, header['name'])
+            if not os.path.isdir(repo_dir):
+                _unpack_tree(data, start, header, tree_dir)
+            _seed_template_cache(
+                data,
+                start,
+                header,
+                repo_dir,
+                os.path.join(clone_to_dir, TEMPLATE_CACHE_DIR),
+            )
+    except (OSError, ValueError, KeyError) as err:
+        raise InvalidBundleException(
+            f'Template bundle {bundle_file} could not be read: {err}'
+        ) from err
+    return repo_dir
+
+
+def _read_header(data, bundle_file):
+    """Return the header of the bundle in ``data``, and where its files start."""
+    if len(data) < _HEADER.size:
+        raise InvalidBundleException(f'{bundle_file} is not a template bundle')
+    magic, header_size = _HEADER.unpack_from(data)
+    if magic != BUNDLE_MAGIC:
+        raise InvalidBundleException(f'{bundle_file} is not a template bundle')
+    start = _HEADER.size + header_size
+    header = json.loads(bytes(data[_HEADER.size : start]).decode('utf-8'))
+    if header.get('version') != BUNDLE_VERSION:
+        raise InvalidBundleException(
+            f'Template bundle {bundle_file} has an unsupported version'
+        )
+    if header['name'] in ('', os.curdir, os.pardir) or (
+        os.path.basename(header['name']) != header['name']
+    ):
+        raise InvalidBundleException(
+            f'Template bundle {bundle_file} has an invalid name'
+        )
+    return header, start
+
+
+def _unpack_tree(data, start, header, tree_dir):
+    """Write the directories and files of the bundle into ``tree_dir``."""
+    make_sure_path_exists(os.path.dirname(tree_dir))
+    unpack_dir = tempfile.mkdtemp(dir=os.path.dirname(tree_dir))
+    try:
+        repo_dir = os.path.join(unpack_dir, header['name'])
+        os.mkdir(repo_dir)
+        for entry in header['entries']:
+            path = os.path.join(repo_dir, *entry['path'].split('/'))
+            if os.path.commonpath([repo_dir, os.path.abspath(path)]) != repo_dir:
+                raise ValueError(f'{entry["path"]} is outside of the bundle')
+            if 'offset' in entry:
+                offset = start + entry['offset']
+                with open(path, 'wb') as fh:
+                    fh.write(data[offset : offset + entry['size']])
+            else:
+                os.mkdir(path)
+        # Directories get their modes last, once their files are written.
+        for entry in header['entries']:
+            path = os.path.join(repo_dir, *entry['path'].split('/'))
+            owner = stat.S_IRUSR | stat.S_IWUSR if 'offset' in entry else stat.S_IRWXU
+            os.chmod(path, entry['mode'] | owner)
+    except BaseException:
+        rmtree(unpack_dir)
+        raise
+
+    try:
+        os.rename(unpack_dir, tree_dir)
+    except OSError:
+        # Another run unpacked the same bundle first.
+        rmtree(unpack_dir)
+
+
+def _seed_template_cache(data, start, header, repo_dir, cache_dir):
+    """Add the bytecode and binary files of the bundle to ``cache_dir``."""
+    if header['cache_tag'] == sys.implementation.cache_tag:
+        make_sure_path_exists(cache_dir)
+        for entry in header['bytecode']:
+            path = os.path.join(cache_dir, os.path.basename(entry['name']))
+            if not os.path.exists(path):
+                offset = start + entry['offset']
+                tmp_file = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_file, 'wb') as fh:
+                    fh.write(data[offset : offset + entry['size']])
+                os.replace(tmp_file, path)
+
+    template_dir = os.path.join(repo_dir, *header['template'].split('/'))
+    classifier = FileClassifier(classifier_cache_file(cache_dir, template_dir))
+    with work_in(template_dir):
+        for path in header['binaries']:
+            infile = os.path.join(*path.split('/'))
+            if not classifier.lookup(infile):
+                classifier.remember(infile, os.stat(infile))
+    classifier.save()
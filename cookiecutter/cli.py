@@ -5,49 +5,89 @@ import os
 import sys
 import click
 from cookiecutter import __version__
-from cookiecutter.config import get_user_config
-from cookiecutter.exceptions import ContextDecodingException, FailedHookException, InvalidModeException, InvalidZipRepository, OutputDirExistsException, RepositoryCloneFailed, RepositoryNotFound, UndefinedVariableInTemplate, UnknownExtension
+from cookiecutter.exceptions import ContextDecodingException, FailedHookException, InvalidBundleException, InvalidModeException, InvalidZipRepository, OutputDirExistsException, RepositoryCloneFailed, RepositoryNotFound, UndefinedVariableInTemplate, UnknownExtension
 from cookiecutter.log import configure_logger
-from cookiecutter.main import cookiecutter
+from cookiecutter.timing import Profile, record
 
 
 def version_msg():
     """Return the Cookiecutter version, location and Python powering it."""
-    python_version = sys.version[:3]
+    python_version = sys.version
     location = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     return f"Cookiecutter {__version__} from {location} (Python {python_version})"
 
 
 def validate_extra_context(ctx, param, value):
     """Validate extra context."""
-    for s in value:
-        if '=' not in s:
+    for string in value:
+        if '=' not in string:
             raise click.BadParameter(
-                f'"{s}" is not a valid key/value pair. '
-                'Use the format key=value.'
+                f"EXTRA_CONTEXT should contain items of the form key=value; "
+                f"'{string}' doesn't match that form"
             )
-    return collections.OrderedDict(v.split('=', 1) for v in value)
+
+    # Convert tuple -- e.g.: ('program_name=foobar', 'startsecs=66')
+    # to dict -- e.g.: {'program_name': 'foobar', 'startsecs': '66'}
+    return collections.OrderedDict(s.split('=', 1) for s in value) or None
 
 
 def list_installed_templates(default_config, passed_config_file):
     """List installed (locally cloned) templates. Use cookiecutter --list-installed."""
-    config = get_user_config(default_config=default_config, config_file=passed_config_file)
-    template_dir = config.get('cookiecutters_dir')
-    if not os.path.exists(template_dir):
-        click.echo(f"No templates found in {template_dir}")
-        return
+    from cookiecutter.config import get_user_config
+
+    config = get_user_config(passed_config_file, default_config)
+    cookiecutter_folder = config.get('cookiecutters_dir')
+    if not os.path.exists(cookiecutter_folder):
+        click.echo(
+            f"Error: Cannot list installed templates. "
+            f"Folder does not exist: {cookiecutter_folder}"
+        )
+        sys.exit(-1)
 
     template_names = [
-        d for d in os.listdir(template_dir)
-        if os.path.isdir(os.path.join(template_dir, d))
+        folder
+        for folder in os.listdir(cookiecutter_folder)
+        if os.path.exists(
+            os.path.join(cookiecutter_folder, folder, 'cookiecutter.json')
+        )
     ]
+    click.echo(f'{len(template_names)} installed templates: ')
+    for name in template_names:
+        click.echo(f' * {name}')
 
-    if not template_names:
-        click.echo(f"No templates found in {template_dir}")
-    else:
-        click.echo("Installed templates:")
-        for template_name in template_names:
-            click.echo(f"  {template_name}")
+
+def read_batch(lines, extra_context, output_dir):
+    """Read the projects to bake from the JSON Lines of ``--batch``.
+
+    :param lines: Iterable of JSON encoded lines, blank lines are ignored.
+    :param extra_context: Context given on the command line, overridden by
+        the ``extra_context`` of each line.
+    :param output_dir: Output directory of lines without ``output_dir``.
+    :return: A tuple of the list of contexts and the list of output dirs.
+    """
+    contexts = []
+    output_dirs = []
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise click.BadParameter(
+                f"line {number} is not valid JSON: {e}", param_hint="'--batch'"
+            ) from e
+        if not isinstance(item, dict) or not isinstance(
+            item.get('extra_context', {}), dict
+        ):
+            raise click.BadParameter(
+                f"line {number} should be an object with an object as extra_context",
+                param_hint="'--batch'",
+            )
+        context = dict(extra_context or {})
+        context.update(item.get('extra_context', {}))
+        contexts.append(context)
+        output_dirs.append(item.get('output_dir', output_dir))
+    return contexts, output_dirs
 
 
 @click.command(context_settings=dict(help_option_names=['-h', '--help']))
@@ -88,47 +128,207 @@ def list_installed_templates(default_config, passed_config_file):
     'List currently installed templates.')
 @click.option('--keep-project-on-failure', is_flag=True, help=
     'Do not delete project folder on failure')
+@click.option('-j', '--jobs', type=click.IntRange(min=1), default=1, help=
+    'Number of threads used to render and write the project files')
+@click.option('--no-template-cache', is_flag=True, help=
+    'Do not use or update the persistent cache of compiled templates')
+@click.option('--repo-cache', is_flag=True, help=
+    'Keep the clone of a repository template and update it with a fetch '
+    'instead of cloning it again. Zip templates are downloaded only when '
+    'they changed and unpacked once')
+@click.option('--hooks-in-process', is_flag=True, help=
+    'Run Python hooks in the cookiecutter process instead of starting a new '
+    'interpreter for each of them')
+@click.option('--hook-workers', type=click.IntRange(min=0), default=0, help=
+    'Run Python hooks on this many pre-started interpreters, each hook in a '
+    'process of its own forked from one of them where supported')
+@click.option('--incremental', is_flag=True, help=
+    'With --overwrite-if-exists, only regenerate the files whose template or '
+    'context changed since the last run, and leave unchanged outputs untouched')
+@click.option('--plan', is_flag=True, help=
+    'Print the files and directories the project would consist of as JSON, '
+    'without writing anything or running hooks')
+@click.option('--plan-render', is_flag=True, help=
+    'Like --plan, but also render the files in memory to report their sizes')
+@click.option('--bundle', type=click.Path(dir_okay=False), default=None, help=
+    'Pack TEMPLATE into a precompiled bundle at this path instead of '
+    'generating a project. Bundles are accepted as TEMPLATE in turn')
+@click.option('--batch', type=click.File('r'), default=None, help=
+    'Bake one project per line of this JSON Lines file ("-" for stdin), '
+    'each line an object with optional "extra_context" and "output_dir" keys. '
+    'Never prompts; prints one JSON result per project')
+@click.option('--batch-processes', type=click.IntRange(min=1), default=1,
+    help='Number of worker processes baking the projects of --batch')
+@click.option('--profile', is_flag=True, help=
+    'Print how long each phase of the bake took, and the slowest files')
+@click.option('--profile-output', type=click.Path(dir_okay=False), default=None,
+    help='Write the timings of the phases and files of the bake to this file')
+@click.option('--profile-format', type=click.Choice(['json', 'chrome']),
+    default='json', help=
+    'Format of --profile-output: a list of spans, or the Chrome trace event '
+    'format for chrome://tracing and Perfetto')
 def main(template, extra_context, no_input, checkout, verbose, replay,
     overwrite_if_exists, output_dir, config_file, default_config,
     debug_file, directory, skip_if_file_exists, accept_hooks, replay_file,
-    list_installed, keep_project_on_failure):
+    list_installed, keep_project_on_failure, jobs, no_template_cache,
+    repo_cache, hooks_in_process, hook_workers, incremental, plan,
+    plan_render, bundle, batch, batch_processes, profile, profile_output,
+    profile_format):
     """Create a project from a Cookiecutter project template (TEMPLATE).
 
     Cookiecutter is free and open source software, developed and managed by
     volunteers. If you would like to help out or fund the project, please get
     in touch at https://github.com/cookiecutter/cookiecutter.
     """
+    # Commands that should work without arguments
     if list_installed:
         list_installed_templates(default_config, config_file)
-        return
+        sys.exit(0)
+
+    # Raising usage, after all commands that should work without args.
+    if not template or template.lower() == 'help':
+        click.echo(click.get_current_context().get_help())
+        sys.exit(0)
 
+    # Plans and batch results are printed to stdout as JSON, keep the log
+    # out of them.
+    json_output = plan or plan_render or batch is not None
     configure_logger(stream_level='DEBUG' if verbose else 'INFO',
-                     debug_file=debug_file)
+                     debug_file=debug_file,
+                     stream=sys.stderr if json_output else None)
 
-    try:
-        cookiecutter(
-            template,
-            checkout=checkout,
-            no_input=no_input,
-            extra_context=extra_context,
-            replay=replay,
-            overwrite_if_exists=overwrite_if_exists,
-            output_dir=output_dir,
-            config_file=config_file,
-            default_config=default_config,
-            password=None,
-            directory=directory,
-            skip_if_file_exists=skip_if_file_exists,
-            accept_hooks=accept_hooks,
-            keep_project_on_failure=keep_project_on_failure,
+    # Imported here, so that ``--help``, ``--version`` and ``--list-installed``
+    # do not import Jinja and the other dependencies of a bake.
+    from cookiecutter.hooks import HookWorkerPool, InProcessHookExecutor
+    from cookiecutter.main import bundle_template, cookiecutter, cookiecutter_batch
+
+    # If needed, prompt the user to ask whether or not they want to execute
+    # the pre/post hooks.
+    if accept_hooks == "ask":
+        _accept_hooks = click.confirm("Do you want to execute hooks?")
+    else:
+        _accept_hooks = accept_hooks == "yes"
+
+    if replay_file:
+        replay = replay_file
+
+    if bundle is not None:
+        try:
+            compiled = bundle_template(
+                template,
+                bundle,
+                checkout=checkout,
+                no_input=no_input,
+                config_file=config_file,
+                default_config=default_config,
+                password=os.environ.get('COOKIECUTTER_REPO_PASSWORD'),
+                directory=directory,
+            )
+        except (ContextDecodingException, UnknownExtension, InvalidZipRepository,
+                InvalidBundleException, RepositoryNotFound,
+                RepositoryCloneFailed) as e:
+            click.echo(e)
+            sys.exit(1)
+        click.echo(f'Wrote {bundle} with {compiled} compiled templates')
+        sys.exit(0)
+
+    if batch is not None:
+        if replay:
+            raise click.UsageError('--batch can not be used with --replay')
+        if plan or plan_render:
+            raise click.UsageError('--batch can not be used with --plan')
+        contexts, output_dirs = read_batch(batch, extra_context, output_dir)
+
+    if hook_workers and hooks_in_process:
+        raise click.UsageError(
+            '--hook-workers can not be used with --hooks-in-process'
         )
+    if hook_workers:
+        hook_executor = HookWorkerPool(hook_workers)
+    elif hooks_in_process:
+        hook_executor = InProcessHookExecutor()
+    else:
+        hook_executor = None
+
+    profiler = Profile() if profile or profile_output else None
+    try:
+        with record(profiler):
+            if batch is not None:
+                results = cookiecutter_batch(
+                    template,
+                    contexts,
+                    output_dirs,
+                    checkout=checkout,
+                    config_file=config_file,
+                    default_config=default_config,
+                    password=os.environ.get('COOKIECUTTER_REPO_PASSWORD'),
+                    directory=directory,
+                    overwrite_if_exists=overwrite_if_exists,
+                    skip_if_file_exists=skip_if_file_exists,
+                    accept_hooks=_accept_hooks,
+                    keep_project_on_failure=keep_project_on_failure,
+                    jobs=jobs,
+                    template_cache=not no_template_cache,
+                    repo_cache=repo_cache,
+                    hook_executor=hook_executor,
+                    incremental=incremental,
+                    processes=batch_processes,
+                )
+                for result in results:
+                    click.echo(json.dumps({
+                        'output_dir': result.output_dir,
+                        'project_dir': result.project_dir,
+                        'error': None if result.error is None else str(result.error),
+                    }))
+                sys.exit(1 if any(result.error for result in results) else 0)
+            result = cookiecutter(
+                template,
+                checkout,
+                no_input,
+                extra_context=extra_context,
+                replay=replay,
+                overwrite_if_exists=overwrite_if_exists,
+                output_dir=output_dir,
+                config_file=config_file,
+                default_config=default_config,
+                password=os.environ.get('COOKIECUTTER_REPO_PASSWORD'),
+                directory=directory,
+                skip_if_file_exists=skip_if_file_exists,
+                accept_hooks=_accept_hooks,
+                keep_project_on_failure=keep_project_on_failure,
+                jobs=jobs,
+                template_cache=not no_template_cache,
+                repo_cache=repo_cache,
+                hook_executor=hook_executor,
+                incremental=incremental,
+                plan=plan or plan_render,
+                plan_contents=plan_render,
+            )
+            if plan or plan_render:
+                entries = [entry._asdict() for entry in result]
+                for entry in entries:
+                    del entry['data']
+                click.echo(json.dumps(entries, indent=2))
     except (ContextDecodingException, OutputDirExistsException,
             InvalidModeException, FailedHookException,
-            UnknownExtension, InvalidZipRepository,
-            RepositoryNotFound, RepositoryCloneFailed,
-            UndefinedVariableInTemplate) as e:
-        click.echo(f"Error: {e}")
+            UnknownExtension, InvalidZipRepository, InvalidBundleException,
+            RepositoryNotFound, RepositoryCloneFailed) as e:
+        click.echo(e)
+        sys.exit(1)
+    except UndefinedVariableInTemplate as undefined_err:
+        click.echo(f'{undefined_err.message}')
+        click.echo(f'Error message: {undefined_err.error.message}')
+
+        context_str = json.dumps(undefined_err.context, indent=4, sort_keys=True)
+        click.echo(f'Context: {context_str}')
         sys.exit(1)
+    finally:
+        if hook_workers:
+            hook_executor.close()
+        if profile:
+            click.echo(profiler.summary(), err=True)
+        if profile_output:
+            profiler.write(profile_output, profile_format)
 
 
 if __name__ == '__main__':
@@ -1,9 +1,9 @@
 """Global configuration handling."""
 import collections
 import copy
+import functools
 import logging
 import os
-import yaml
 from cookiecutter.exceptions import ConfigDoesNotExistException, InvalidConfiguration
 logger = logging.getLogger(__name__)
 USER_CONFIG_PATH = os.path.expanduser('~/.cookiecutterrc')
@@ -24,32 +24,76 @@ def merge_configs(default, overwrite):
     """Recursively update a dict with the key/value pair of another.
 
     Dict values that are dictionaries themselves will be updated, whilst
-    preserving existing keys.
+    preserving existing keys. The dictionaries of the result are new ones,
+    other values are shared with ``default`` and ``overwrite``.
     """
-    new_config = copy.deepcopy(default)
+    new_config = copy.copy(default)
+    for k, v in new_config.items():
+        if isinstance(v, dict):
+            new_config[k] = merge_configs(v, {})
+
     for k, v in overwrite.items():
+        # Make sure to preserve existing items in
+        # nested dicts, for example `abbreviations`
         if isinstance(v, dict):
-            new_config[k] = merge_configs(new_config.get(k, {}), v)
+            new_config[k] = merge_configs(default.get(k, {}), v)
         else:
             new_config[k] = v
+
     return new_config
 
 
-def get_config(config_path):
-    """Retrieve the config from the specified path, returning a config dict."""
-    if not os.path.exists(config_path):
-        raise ConfigDoesNotExistException(f"Config file {config_path} does not exist.")
+@functools.lru_cache(maxsize=16)
+def _read_config(config_path, file_key):
+    """Parse the YAML config file at ``config_path``.
 
-    with open(config_path) as file_handle:
+    Results are cached by ``file_key``, the absolute path, modification time
+    and size of the file, so that it is only parsed again once it changed.
+    The C loader of PyYAML is used when it is available.
+    """
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_path, encoding='utf-8') as file_handle:
         try:
-            user_config = yaml.safe_load(file_handle)
+            yaml_dict = yaml.load(file_handle, Loader=loader) or {}
         except yaml.YAMLError as e:
-            raise InvalidConfiguration(f"Unable to parse YAML file {config_path}: {e}")
+            raise InvalidConfiguration(
+                f'Unable to parse YAML file {config_path}.'
+            ) from e
+    if not isinstance(yaml_dict, dict):
+        raise InvalidConfiguration(
+            f'Top-level element of YAML file {config_path} should be an object.'
+        )
+    return yaml_dict
 
-    if user_config is None:
-        raise InvalidConfiguration(f"Config file {config_path} is empty.")
 
-    return user_config
+def get_config(config_path):
+    """Retrieve the config from the specified path, returning a config dict."""
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
+        raise ConfigDoesNotExistException(
+            f'Config file {config_path} does not exist.'
+        ) from None
+
+    logger.debug('config_path is %s', config_path)
+    file_key = (os.path.abspath(config_path), stat.st_mtime_ns, stat.st_size)
+    # Copied, as callers may change the lists and other values of the config
+    # they get, such as the choices reordered by `apply_overwrites_to_context()`.
+    yaml_dict = copy.deepcopy(_read_config(config_path, file_key))
+    config_dict = merge_configs(DEFAULT_CONFIG, yaml_dict)
+
+    raw_replay_dir = config_dict['replay_dir']
+    config_dict['replay_dir'] = _expand_path(raw_replay_dir)
+
+    raw_cookies_dir = config_dict['cookiecutters_dir']
+    config_dict['cookiecutters_dir'] = _expand_path(raw_cookies_dir)
+
+    if config_dict.get('replay_store'):
+        config_dict['replay_store'] = _expand_path(config_dict['replay_store'])
+
+    return config_dict
 
 
 def get_user_config(config_file=None, default_config=False):
@@ -71,20 +115,34 @@ def get_user_config(config_file=None, default_config=False):
     If the environment variable is not set, try the default config file path
     before falling back to the default config values.
     """
-    if isinstance(default_config, dict):
+    # Do NOT load a config. Merge provided values with defaults and return them instead
+    if default_config and isinstance(default_config, dict):
         return merge_configs(DEFAULT_CONFIG, default_config)
 
+    # Do NOT load a config. Return defaults instead.
     if default_config:
-        return copy.deepcopy(DEFAULT_CONFIG)
+        logger.debug("Force ignoring user config with default_config switch.")
+        return merge_configs(DEFAULT_CONFIG, {})
 
-    if config_file and config_file != USER_CONFIG_PATH:
+    # Load the given config file
+    if config_file and config_file is not USER_CONFIG_PATH:
+        logger.debug("Loading custom config from %s.", config_file)
         return get_config(config_file)
 
-    user_config = os.environ.get('COOKIECUTTER_CONFIG')
-    if user_config:
-        return get_config(user_config)
-
-    if os.path.exists(USER_CONFIG_PATH):
-        return get_config(USER_CONFIG_PATH)
-
-    return copy.deepcopy(DEFAULT_CONFIG)
+    try:
+        # Does the user set up a config environment variable?
+        env_config_file = os.environ['COOKIECUTTER_CONFIG']
+    except KeyError:
+        # Load an optional user config if it exists
+        # otherwise return the defaults
+        if os.path.exists(USER_CONFIG_PATH):
+            logger.debug("Loading config from %s.", USER_CONFIG_PATH)
+            return get_config(USER_CONFIG_PATH)
+        else:
+            logger.debug("User config not found. Loading default config.")
+            return merge_configs(DEFAULT_CONFIG, {})
+    else:
+        # There is a config environment variable. Try to load it.
+        # Do not check for existence, so invalid file paths raise an error.
+        logger.debug("User config not found or not specified. Loading default config.")
+        return get_config(env_config_file)
@@ -1,6 +1,15 @@
 """Jinja2 environment and extensions loading."""
-from jinja2 import Environment, StrictUndefined
+import hashlib
+import os
+import threading
+from fnmatch import fnmatch
+from jinja2 import Environment, FileSystemBytecodeCache, StrictUndefined, nodes
+from jinja2.utils import LRUCache
 from cookiecutter.exceptions import UnknownExtension
+DEFAULT_TEMPLATE_CACHE_SIZE = 64 * 1024 * 1024
+#: Directory, inside the ``cookiecutters_dir``, holding the compiled templates.
+TEMPLATE_CACHE_DIR = '.template_cache'
+STRING_TEMPLATE_CACHE_SIZE = 400
 
 
 class ExtensionLoaderMixin:
@@ -54,3 +63,182 @@ class StrictEnvironment(ExtensionLoaderMixin, Environment):
         Also loading extensions defined in cookiecutter.json's _extensions key.
         """
         super().__init__(undefined=StrictUndefined, **kwargs)
+        self._string_templates = LRUCache(STRING_TEMPLATE_CACHE_SIZE)
+
+    def overlay(self, *args, **kwargs):
+        """Create an overlay of this environment, see `jinja2.Environment.overlay`.
+
+        Templates are bound to the environment that compiled them, so the
+        overlay keeps the templates it loads from strings apart.
+        """
+        environment = super().overlay(*args, **kwargs)
+        environment._string_templates = LRUCache(STRING_TEMPLATE_CACHE_SIZE)
+        return environment
+
+    def from_string(self, source, globals=None, template_class=None):
+        """Load a template from a string, using the bytecode cache if set.
+
+        Jinja2 only consults ``bytecode_cache`` for templates coming from a
+        loader, so file and directory names rendered through this method would
+        otherwise be compiled again on every run. Templates loaded without
+        extra ``globals`` are also kept in memory, so the same string rendered
+        by the prompt, in paths and in hooks is compiled once per environment.
+        """
+        if isinstance(source, nodes.Template):
+            return super().from_string(source, globals, template_class)
+        if globals is not None or template_class is not None:
+            return self._string_template(source, globals, template_class)
+
+        template = self._string_templates.get(source)
+        if template is None:
+            template = self._string_template(source, None, None)
+            self._string_templates[source] = template
+        return template
+
+    def _string_template(self, source, globals, template_class):
+        """Compile a template from ``source``, bypassing the in-memory cache."""
+        if self.bytecode_cache is None:
+            return super().from_string(source, globals, template_class)
+
+        code = self._compile_cached(source, None, None)
+        cls = template_class or self.template_class
+        return cls.from_code(self, code, self.make_globals(globals), None)
+
+    def from_source(self, source, name, filename=None):
+        """Load the template ``name`` from a ``source`` already read from disk.
+
+        This is what `get_template()` does through the loader, minus reading
+        the file again: callers that have the contents at hand anyway save a
+        round trip to the filesystem. Syntax errors still report ``filename``.
+        """
+        filename = filename or name
+        code = self._compile_cached(source, name, filename)
+        return self.template_class.from_code(self, code, self.make_globals(None), None)
+
+    def _compile_cached(self, source, name, filename):
+        """Compile ``source``, going through the bytecode cache when set."""
+        bcc = self.bytecode_cache
+        if bcc is None:
+            return self.compile(source, name, filename)
+
+        bucket = bcc.get_bucket(self, name, filename, source)
+        code = bucket.code
+        if code is None:
+            code = self.compile(source, name, filename)
+            bucket.code = code
+            bcc.set_bucket(bucket)
+        return code
+
+
+def _compile_settings(environment):
+    """Return the environment settings that change the compiled template code."""
+    return (
+        sorted(environment.extensions),
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        environment.line_statement_prefix,
+        environment.line_comment_prefix,
+        environment.trim_blocks,
+        environment.lstrip_blocks,
+        environment.newline_sequence,
+        environment.keep_trailing_newline,
+        environment.optimized,
+        environment.autoescape,
+        environment.is_async,
+    )
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """Persistent, size bounded Jinja2 bytecode cache.
+
+    Entries are keyed by the template name, its source and the environment
+    settings that influence compilation (extensions, delimiters and other
+    lexer options) rather than by the location of the template on disk, so
+    the same template baked from a fresh clone or a temporary directory still
+    reuses the compiled code.
+
+    Whenever the cache grows past ``max_size`` bytes the least recently used
+    entries are removed until it is back under three quarters of that size.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_TEMPLATE_CACHE_SIZE):
+        """Create the cache in ``directory``, creating it if needed."""
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    def get_bucket(self, environment, name, filename, source):
+        """Return the cache bucket for ``source`` compiled by ``environment``."""
+        settings = repr((name, _compile_settings(environment))).encode('utf-8')
+        key = hashlib.sha1(settings + b'\0' + source.encode('utf-8')).hexdigest()
+        return super().get_bucket(environment, key, None, source)
+
+    def get_cache_key(self, name, filename=None):
+        """Use the key computed by `get_bucket()` as is."""
+        return name
+
+    def load_bytecode(self, bucket):
+        """Load cached bytecode and mark the entry as recently used."""
+        super().load_bytecode(bucket)
+        if bucket.code is not None:
+            try:
+                os.utime(self._get_cache_filename(bucket))
+            except OSError:
+                pass
+
+    def dump_bytecode(self, bucket):
+        """Store bytecode, evicting old entries when the cache is too big.
+
+        Failing to write to the cache, for instance because its directory was
+        removed meanwhile, only means the template will be compiled again.
+        """
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            return
+        try:
+            entry_size = os.path.getsize(self._get_cache_filename(bucket))
+        except OSError:
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += entry_size
+            if self._size > self.max_size:
+                self._size = self._evict(self.max_size * 3 // 4)
+
+    def _entries(self):
+        """Return ``(mtime, size, path)`` for every entry in the cache."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not fnmatch(entry.name, self.pattern % ('*',)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, target_size):
+        """Remove least recently used entries until ``target_size`` is met."""
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        return size
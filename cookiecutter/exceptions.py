@@ -155,3 +155,11 @@ class InvalidZipRepository(CookiecutterException):
     Raised when the specified cookiecutter repository isn't a valid
     Zip archive.
     """
+
+
+class InvalidBundleException(CookiecutterException):
+    """
+    Exception for bad template bundles.
+
+    Raised when the specified template bundle can not be read or unpacked.
+    """
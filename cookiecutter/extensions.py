@@ -3,11 +3,8 @@ import json
 import string
 import uuid
 from secrets import choice
-import arrow
-from jinja2 import nodes
 from jinja2 import nodes
 from jinja2.ext import Extension
-from slugify import slugify as pyslugify
 
 
 class JsonifyExtension(Extension):
@@ -47,6 +44,8 @@ class SlugifyExtension(Extension):
 
         def slugify(value, **kwargs):
             """Slugifies the value."""
+            from slugify import slugify as pyslugify
+
             return pyslugify(value, **kwargs)
         environment.filters['slugify'] = slugify
 
@@ -91,4 +90,7 @@ class TimeExtension(Extension):
         return nodes.Output([node]).set_lineno(lineno)
 
     def _render_now(self, format_string):
+        # Imported here, arrow is slow to import and seldom needed.
+        import arrow
+
         return arrow.now().format(format_string)
@@ -0,0 +1,134 @@
+"""Telling binary template files apart from the ones to render."""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from binaryornot.helpers import is_binary_string
+
+logger = logging.getLogger(__name__)
+
+#: Extensions of files that are never rendered, so they can be copied without
+#: reading them first.
+BINARY_EXTENSIONS = frozenset(
+    {
+        '7z', 'a', 'avi', 'bin', 'bmp', 'bz2', 'class', 'db', 'dll', 'doc',
+        'docx', 'dylib', 'egg', 'eot', 'exe', 'flac', 'gif', 'gz', 'icns',
+        'ico', 'jar', 'jpeg', 'jpg', 'lib', 'mkv', 'mov', 'mp3', 'mp4', 'npy',
+        'npz', 'o', 'odt', 'ogg', 'otf', 'parquet', 'pdf', 'pickle', 'pkl',
+        'png', 'ppt', 'pptx', 'psd', 'pyc', 'pyd', 'pyo', 'rar', 'so',
+        'sqlite', 'sqlite3', 'tar', 'tgz', 'tif', 'tiff', 'ttf', 'war', 'wasm',
+        'wav', 'webm', 'webp', 'whl', 'woff', 'woff2', 'xls', 'xlsx', 'xz',
+        'zip',
+    }
+)
+
+#: Number of leading bytes looked at when sniffing a file's contents.
+SNIFF_SIZE = 1024
+
+
+def has_binary_extension(path):
+    """Check whether ``path`` has an extension listed in `BINARY_EXTENSIONS`."""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    return ext in BINARY_EXTENSIONS
+
+
+def classifier_cache_file(cache_dir, template_dir):
+    """Return where the classifications for ``template_dir`` are persisted.
+
+    :param cache_dir: Directory holding cookiecutter's persistent caches.
+    :param template_dir: The template directory whose files are classified.
+    """
+    key = hashlib.sha1(os.path.abspath(template_dir).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'filetypes-{key}.json')
+
+
+class FileClassifier:
+    """Decide whether template files are binary, reading each at most once.
+
+    Files with a known binary extension are classified from their name alone.
+    Any other file is sniffed from its first `SNIFF_SIZE` bytes, read by the
+    caller, and is copied rather than read any further when binary. Files
+    found to be binary that way are remembered in ``cache_file`` together with
+    their size and modification time, so later runs from the same template
+    copy them without reading them while they are unchanged.
+    """
+
+    def __init__(self, cache_file=None):
+        """Load the classifications persisted in ``cache_file``, if any."""
+        self.cache_file = cache_file
+        self._binaries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if cache_file is not None:
+            try:
+                with open(cache_file, encoding='utf-8') as fh:
+                    self._binaries = json.load(fh)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError):
+                logger.debug('Ignoring unreadable file type cache %s', cache_file)
+
+    def lookup(self, path):
+        """Return `True` if ``path`` is known to be binary without reading it.
+
+        Returns `None` when the contents have to be looked at, see `sniff()`.
+        """
+        if has_binary_extension(path):
+            return True
+
+        with self._lock:
+            signature = self._binaries.get(path)
+        if signature is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if signature == [stat.st_size, stat.st_mtime_ns]:
+            return True
+        with self._lock:
+            self._binaries.pop(path, None)
+            self._dirty = True
+        return None
+
+    def sniff(self, path, data, stat):
+        """Classify ``path`` from its contents and remember binary files.
+
+        :param path: Path of the file, relative to the template directory.
+        :param data: Contents of the file, as `bytes`. Only the first
+            `SNIFF_SIZE` bytes are looked at.
+        :param stat: `os.stat_result` of the file ``data`` was read from.
+        :return: `True` if the file is binary.
+        """
+        binary = is_binary_string(data[:SNIFF_SIZE])
+        if binary:
+            self.remember(path, stat)
+        return binary
+
+    def remember(self, path, stat):
+        """Record ``path`` as binary, for as long as it matches ``stat``.
+
+        :param path: Path of the file, relative to the template directory.
+        :param stat: `os.stat_result` of the file.
+        """
+        with self._lock:
+            self._binaries[path] = [stat.st_size, stat.st_mtime_ns]
+            self._dirty = True
+
+    def save(self):
+        """Persist the classifications to ``cache_file`` if they changed."""
+        if self.cache_file is None or not self._dirty:
+            return
+        with self._lock:
+            binaries = dict(self._binaries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f'{self.cache_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as fh:
+                json.dump(binaries, fh)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            logger.debug('Unable to write file type cache %s', self.cache_file)
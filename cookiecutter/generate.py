@@ -1,21 +1,39 @@
 """Functions for generating a project from a project template."""
+import contextvars
+import errno
 import fnmatch
+import functools
 import json
 import logging
 import os
+import re
 import shutil
+import uuid
 import warnings
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from binaryornot.check import is_binary
-from jinja2 import Environment, FileSystemLoader
+from typing import NamedTuple, Optional
+from jinja2 import Environment, FileSystemLoader, meta
 from jinja2.exceptions import TemplateSyntaxError, UndefinedError
+from cookiecutter.environment import TemplateBytecodeCache
 from cookiecutter.exceptions import ContextDecodingException, OutputDirExistsException, UndefinedVariableInTemplate
+from cookiecutter.filetypes import SNIFF_SIZE, FileClassifier, classifier_cache_file
 from cookiecutter.find import find_template
-from cookiecutter.hooks import run_hook_from_repo_dir
-from cookiecutter.utils import create_env_with_context, make_sure_path_exists, rmtree, work_in
+from cookiecutter.hooks import find_hook, run_hook_from_repo_dir
+from cookiecutter.manifest import VOLATILE_KEYS, GenerationManifest, context_digest, manifest_file
+from cookiecutter.sinks import LocalSink
+from cookiecutter.timing import annotate, span, timed
+from cookiecutter.utils import create_env_with_context, discard_tree, make_sure_path_exists, rmtree, work_in
 logger = logging.getLogger(__name__)
 
+#: Prefix of the hidden directories new projects are generated in, next to
+#: where they are moved once complete.
+STAGING_PREFIX = '.cookiecutter-staging-'
+
+#: Size of the chunks files are scanned for template syntax in.
+SCAN_CHUNK_SIZE = 64 * 1024
+
 
 def is_copy_only_path(path, context):
     """Check whether the given `path` should only be copied and not rendered.
@@ -27,32 +45,249 @@ def is_copy_only_path(path, context):
         should be rendered or just copied.
     :param context: cookiecutter context.
     """
-    copy_without_render = context.get('_copy_without_render', [])
-    for pattern in copy_without_render:
-        if fnmatch.fnmatch(path, pattern):
-            return True
-    return False
+    return _copy_only_matcher(context)(path)
+
+
+def is_excluded_path(path, context):
+    """Check whether the given `path` is left out of the generated project.
+
+    Returns True if `path` matches a pattern of the ``_exclude`` list of the
+    given `context` dict, otherwise False.
+
+    :param path: A file-system path referring to a file or dir of the
+        template, relative to the template dir and not rendered.
+    :param context: cookiecutter context.
+    """
+    return _exclude_matcher(context)(path)
+
+
+class _PathMatcher:
+    """A list of path patterns compiled into one expression.
+
+    Paths match like they would match any of the patterns with
+    `fnmatch.fnmatch`, case-insensitively where the platform is.
+    """
+
+    def __init__(self, patterns):
+        patterns = [os.path.normcase(pattern) for pattern in patterns]
+        self._match = _compile_patterns(patterns)
+        # A directory matching the part of a pattern before its final ``*``
+        # has all its descendants match the pattern.
+        self._match_tree = _compile_patterns(
+            [pattern[:-1] for pattern in patterns if pattern.endswith('*')]
+        )
+
+    def __bool__(self):
+        return self._match is not None
+
+    def __call__(self, path):
+        """Return True if ``path`` matches one of the patterns."""
+        return bool(self._match and self._match(os.path.normcase(path)))
+
+    def covers_tree(self, path):
+        """Return True if everything below the directory ``path`` matches."""
+        return bool(
+            self._match_tree and self._match_tree(os.path.normcase(path + os.sep))
+        )
+
+    def ignore(self, directory, names):
+        """Return the ``names`` in ``directory`` that match.
+
+        This is the ``ignore`` callable of `shutil.copytree`, for a
+        ``directory`` relative to where the patterns apply.
+        """
+        return {
+            name
+            for name in names
+            if self(os.path.normpath(os.path.join(directory, name)))
+        }
+
+
+def _compile_patterns(patterns):
+    """Return the `match` method of a regex matching any of ``patterns``."""
+    if not patterns:
+        return None
+    regex = '|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in patterns)
+    return re.compile(regex).match
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_path_matcher(patterns):
+    """Return the `_PathMatcher` of a tuple of patterns."""
+    return _PathMatcher(patterns)
+
+
+def _context_matcher(context, key):
+    """Return the `_PathMatcher` of the patterns listed under ``key``.
+
+    Matchers are compiled once for each list of patterns.
+    """
+    try:
+        patterns = context['cookiecutter'][key]
+    except KeyError:
+        patterns = ()
+    return _compile_path_matcher(tuple(patterns))
+
+
+def _copy_only_matcher(context):
+    """Return the `_PathMatcher` of the ``_copy_without_render`` of ``context``."""
+    return _context_matcher(context, '_copy_without_render')
+
+
+def _exclude_matcher(context):
+    """Return the `_PathMatcher` of the ``_exclude`` of ``context``."""
+    return _context_matcher(context, '_exclude')
+
+
+def has_template_syntax(text, env):
+    """Check whether ``text`` contains anything Jinja would have to render.
+
+    Looks for the block, variable and comment start strings of ``env``, as
+    well as its line statement and line comment prefixes when configured, so
+    custom delimiters set through ``_jinja2_env_vars`` are honoured.
+
+    :param text: A `str` or `bytes` to scan. Bytes are assumed to be UTF-8.
+    :param env: Jinja2 template execution environment.
+    """
+    markers = _syntax_markers(env)
+    if isinstance(text, bytes):
+        markers = [marker.encode('utf-8') for marker in markers]
+    return any(marker in text for marker in markers)
+
+
+def _syntax_markers(env):
+    """Return the strings starting template syntax in ``env``."""
+    markers = [
+        env.block_start_string,
+        env.variable_start_string,
+        env.comment_start_string,
+        env.line_statement_prefix,
+        env.line_comment_prefix,
+    ]
+    return [marker for marker in markers if marker]
+
+
+def render_name(name, context, env):
+    """Render a file or directory name, skipping Jinja if it is plain text."""
+    if not has_template_syntax(name, env):
+        return name
+    return env.from_string(name).render(**context)
+
+
+def _scan_verbatim(fh, head, env):
+    """Return the line ending used throughout the file ``fh``, if it is plain.
+
+    The rest of the file after ``head`` is read in chunks of `SCAN_CHUNK_SIZE`
+    bytes, rather than all at once, looking for the template syntax that
+    `has_template_syntax()` would find.
+
+    :param fh: Binary file object, positioned right after ``head``.
+    :param head: The `bytes` read from ``fh`` so far.
+    :param env: Jinja2 template execution environment.
+    :return: The line ending, `None` when the file has no line ending at all,
+        and ``False`` when it mixes several kinds of them or has template
+        syntax.
+    """
+    markers = [marker.encode('utf-8') for marker in _syntax_markers(env)]
+    # Enough of the previous chunk to find markers, and CRLFs, split by chunks.
+    keep = max([len(marker) - 1 for marker in markers] + [1])
+    cr = lf = crlf = 0
+    tail = b''
+    chunk = head
+    while chunk:
+        window = tail + chunk
+        if any(marker in window for marker in markers):
+            return False
+        cr += chunk.count(b'\r')
+        lf += chunk.count(b'\n')
+        crlf += chunk.count(b'\r\n')
+        if tail.endswith(b'\r') and chunk.startswith(b'\n'):
+            crlf += 1
+        tail = window[-keep:]
+        chunk = fh.read(SCAN_CHUNK_SIZE)
+    if cr:
+        return '\r\n' if crlf == cr == lf else False
+    return '\n' if lf else None
+
+
+def _first_newline(data):
+    """Return the line ending of the first line of ``data``, if any."""
+    lf = data.find(b'\n')
+    cr = data.find(b'\r')
+    if cr == -1:
+        return '\n' if lf != -1 else None
+    if lf == cr + 1:
+        return '\r\n'
+    if lf == -1 or cr < lf:
+        return '\r'
+    return '\n'
 
 
 def apply_overwrites_to_context(context, overwrite_context, *,
     in_dictionary_variable=False):
     """Modify the given context in place based on the overwrite_context."""
-    for key, value in overwrite_context.items():
-        if isinstance(value, dict):
-            if key not in context:
-                context[key] = {}
-            apply_overwrites_to_context(context[key], value, in_dictionary_variable=True)
-        elif isinstance(value, list):
-            if key not in context:
-                context[key] = []
-            context[key].extend(value)
-        else:
+    for variable, overwrite in overwrite_context.items():
+        if variable not in context:
+            if not in_dictionary_variable:
+                # We are dealing with a new variable on first level, ignore
+                continue
+            # We are dealing with a new dictionary variable in a deeper level
+            context[variable] = overwrite
+
+        context_value = context[variable]
+        if isinstance(context_value, list):
             if in_dictionary_variable:
-                context[key] = value
+                context[variable] = overwrite
+                continue
+            if isinstance(overwrite, list):
+                # We are dealing with a multichoice variable
+                # Let's confirm all choices are valid for the given context
+                if set(overwrite).issubset(set(context_value)):
+                    context[variable] = overwrite
+                else:
+                    raise ValueError(
+                        f"{overwrite} provided for multi-choice variable "
+                        f"{variable}, but valid choices are {context_value}"
+                    )
             else:
-                context[key] = str(value)
+                # We are dealing with a choice variable
+                if overwrite in context_value:
+                    # This overwrite is actually valid for the given context
+                    # Let's set it as default (by definition first item in list)
+                    # see ``cookiecutter.prompt.prompt_choice_for_config``
+                    context_value.remove(overwrite)
+                    context_value.insert(0, overwrite)
+                else:
+                    raise ValueError(
+                        f"{overwrite} provided for choice variable "
+                        f"{variable}, but the choices are {context_value}."
+                    )
+        elif isinstance(context_value, dict) and isinstance(overwrite, dict):
+            # Partially overwrite some keys in original dict
+            apply_overwrites_to_context(
+                context_value, overwrite, in_dictionary_variable=True
+            )
+            context[variable] = context_value
+        elif isinstance(context_value, bool) and isinstance(overwrite, str):
+            # We are dealing with a boolean variable
+            # Convert overwrite to its boolean counterpart
+            from rich.prompt import InvalidResponse
 
+            from cookiecutter._prompts import YesNoPrompt
 
+            try:
+                context[variable] = YesNoPrompt().process_response(overwrite)
+            except InvalidResponse as err:
+                raise ValueError(
+                    f"{overwrite} provided for variable "
+                    f"{variable} could not be converted to a boolean."
+                ) from err
+        else:
+            # Simply overwrite the value for this variable
+            context[variable] = overwrite
+
+
+@timed
 def generate_context(context_file='cookiecutter.json', default_context=None,
     extra_context=None):
     """Generate the context for a Cookiecutter project template.
@@ -65,26 +300,76 @@ def generate_context(context_file='cookiecutter.json', default_context=None,
     :param extra_context: Dictionary containing configuration overrides
     """
     context = OrderedDict([])
+
     try:
-        with open(context_file) as file:
-            obj = json.load(file, object_pairs_hook=OrderedDict)
-        context = obj if isinstance(obj, dict) else obj[0]
+        with open(context_file, encoding='utf-8') as file_handle:
+            obj = json.load(file_handle, object_pairs_hook=OrderedDict)
     except ValueError as e:
-        raise ContextDecodingException(context_file, e)
-    
-    # Apply default context
+        # JSON decoding error.  Let's throw a new exception that is more
+        # friendly for the developer or user.
+        full_fpath = os.path.abspath(context_file)
+        json_exc_message = str(e)
+        our_exc_message = (
+            f"JSON decoding error while loading '{full_fpath}'. "
+            f"Decoding error details: '{json_exc_message}'"
+        )
+        raise ContextDecodingException(our_exc_message) from e
+
+    # Add the Python object to the context dictionary
+    file_name = os.path.split(context_file)[1]
+    file_stem = file_name.split('.')[0]
+    context[file_stem] = obj
+
+    # Overwrite context variable defaults with the default context from the
+    # user's global config, if available
     if default_context:
-        apply_overwrites_to_context(context, default_context)
-    
-    # Apply extra context
+        try:
+            apply_overwrites_to_context(obj, default_context)
+        except ValueError as error:
+            warnings.warn(f"Invalid default received: {error}")
     if extra_context:
-        apply_overwrites_to_context(context, extra_context)
-    
+        apply_overwrites_to_context(obj, extra_context)
+
+    logger.debug('Context generated is %s', context)
     return context
 
 
-def generate_file(project_dir, infile, context, env, skip_if_file_exists=False
-    ):
+def _copy_output(infile, outfile, manifest=None, sink=None):
+    """Copy ``infile`` to ``outfile``, through ``manifest`` if there is one."""
+    if manifest is None:
+        (sink or LocalSink()).copy_file(infile, outfile)
+    else:
+        manifest.copy(infile, outfile)
+        shutil.copymode(infile, outfile)
+
+
+def _write_output(infile, outfile, data, manifest=None, input_data=None,
+    sink=None, rerender=False):
+    """Write ``data`` to ``outfile``, through ``manifest`` if there is one."""
+    if manifest is None:
+        (sink or LocalSink()).write_file(outfile, data, infile)
+    else:
+        manifest.write(infile, outfile, data, input_data, rerender)
+        shutil.copymode(infile, outfile)
+
+
+def _needs_rerender(source, env):
+    """Check whether the output of template ``source`` depends on more than it.
+
+    That is whether it includes, extends or imports other templates, or uses
+    context keys left out of `cookiecutter.manifest.context_digest()`.
+
+    :param source: The template, as `bytes`.
+    :param env: Jinja2 template execution environment.
+    """
+    if any(key.encode('utf-8') in source for key in VOLATILE_KEYS):
+        return True
+    ast = env.parse(source.decode('utf-8'))
+    return any(True for _ in meta.find_referenced_templates(ast))
+
+
+def generate_file(project_dir, infile, context, env, skip_if_file_exists=False,
+    classifier=None, manifest=None, sink=None):
     """Render filename of infile as name of outfile, handle infile correctly.
 
     Dealing with infile appropriately:
@@ -104,66 +389,191 @@ def generate_file(project_dir, infile, context, env, skip_if_file_exists=False
         template dir.
     :param context: Dict for populating the cookiecutter's variables.
     :param env: Jinja2 template execution environment.
+    :param classifier: `FileClassifier` telling binary files apart, shared
+        between the files of a template. A fresh one is used when `None`.
+    :param manifest: `GenerationManifest` of an incremental run. Files it
+        finds up to date are skipped, and outputs are only written when their
+        contents change.
+    :param sink: Where to write the output file, a `cookiecutter.sinks.LocalSink`
+        when `None`.
+    :return: `True` if infile had no template syntax and was copied as is.
     """
-    logger.debug('Generating file %s', infile)
-    
-    # Render the path to the output file
-    outfile_tmpl = env.from_string(infile)
-    outfile = os.path.join(project_dir, outfile_tmpl.render(**context))
-    
-    # Ensure output directory exists
-    dirname = os.path.dirname(outfile)
-    make_sure_path_exists(dirname)
-    
-    # Skip if file exists and skip_if_file_exists is True
-    if skip_if_file_exists and os.path.exists(outfile):
-        logger.debug('File %s already exists, skipping', outfile)
+    logger.debug('Processing file %s', infile)
+    classifier = classifier or FileClassifier()
+    sink = sink or LocalSink()
+
+    # Render the path to the output file (not including the root project dir)
+    outfile = os.path.join(project_dir, render_name(infile, context, env))
+    file_name_is_empty = sink.is_dir(outfile)
+    if file_name_is_empty:
+        logger.debug('The resulting file name is empty: %s', outfile)
+        annotate(kind='skipped')
+        return False
+
+    if skip_if_file_exists and sink.exists(outfile):
+        logger.debug('The resulting file already exists: %s', outfile)
+        annotate(kind='skipped')
         return False
-    
-    # Check if infile is binary
-    if is_binary(infile):
-        logger.debug("Copying binary %s to %s without rendering", infile, outfile)
-        shutil.copyfile(infile, outfile)
+
+    if manifest is not None and manifest.is_current(infile, outfile):
+        logger.debug('The resulting file is up to date: %s', outfile)
+        annotate(kind='skipped')
+        return False
+
+    logger.debug('Created file at %s', outfile)
+
+    # Stream rendered contents to the output unless the manifest has to
+    # compare them with the existing file first.
+    kind, output, data = _file_output(
+        infile, context, env, classifier, stream=manifest is None
+    )
+    annotate(kind=kind)
+    if output is None:
+        # Just copy over binary and verbatim files. Don't render.
+        logger.debug('Copying %s %s to %s without rendering', kind, infile, outfile)
+        _copy_output(infile, outfile, manifest, sink)
+        return kind == 'verbatim'
+
+    logger.debug('Writing contents to file %s', outfile)
+    if isinstance(output, bytes):
+        rerender = (
+            manifest is not None and kind == 'rendered' and _needs_rerender(data, env)
+        )
+        _write_output(infile, outfile, output, manifest, data, sink, rerender)
     else:
-        # Render the file
-        try:
-            with open(infile, 'r') as in_file:
-                tmpl = env.from_string(in_file.read())
-            rendered_file = tmpl.render(**context)
-            with open(outfile, 'w') as out_file:
-                out_file.write(rendered_file)
-        except TemplateSyntaxError as e:
-            logger.error('Error in template syntax in %s', infile)
-            raise
-        except UndefinedError as e:
-            logger.error('Unable to render template in %s', infile)
-            raise UndefinedVariableInTemplate(str(e), infile, context, e.message)
-    
-    return True
+        sink.write_chunks(outfile, output, infile)
+    return kind == 'verbatim'
+
+
+def _file_output(infile, context, env, classifier, render=True, stream=False):
+    """Work out the contents generated from ``infile``, without writing them.
+
+    :param infile: Input file, relative to the root template dir, which must
+        be the current working directory.
+    :param context: Dict for populating the cookiecutter's variables.
+    :param env: Jinja2 template execution environment.
+    :param classifier: `FileClassifier` telling binary files apart.
+    :param render: Render templates. When `False`, the generated contents of
+        files that need rendering are left out.
+    :param stream: Return the contents of rendered files as an iterator of
+        `bytes` chunks, rendered as they are consumed, instead of `bytes`.
+        The contents read from ``infile`` are then not returned either, so
+        that they can be freed while rendering.
+    :return: A tuple of how the contents are generated, one of ``'binary'``,
+        ``'verbatim'`` and ``'rendered'``, the generated `bytes`, and the
+        `bytes` read from ``infile``. Binary and verbatim files are to be
+        copied, and are not held in memory, so both are `None` for them.
+    """
+    logger.debug("Check %s to see if it's a binary", infile)
+    if classifier.lookup(infile):
+        return 'binary', None, None
+
+    with open(infile, 'rb') as fh:
+        head = fh.read(SNIFF_SIZE)
+        stat = os.fstat(fh.fileno())
+        if classifier.sniff(infile, head, stat):
+            return 'binary', None, None
+
+        # Text without any template syntax renders to itself, as long as the
+        # line endings written back would be the same as the ones read.
+        if env.newline_sequence == '\n':
+            file_newline = _scan_verbatim(fh, head, env)
+            if file_newline is not False:
+                new_lines = context['cookiecutter'].get('_new_lines')
+                if file_newline is None or new_lines in (None, '', file_newline):
+                    logger.debug('%s has no template syntax, keeping it as is', infile)
+                    return 'verbatim', None, None
+
+        if len(head) < SNIFF_SIZE:
+            data = head
+        else:
+            fh.seek(0)
+            data = fh.read()
+
+    if not render:
+        return 'rendered', None, data
+
+    # Force fwd slashes on Windows for the template name
+    # This is a by-design Jinja issue
+    infile_fwd_slashes = infile.replace(os.path.sep, '/')
+
+    # Render the file
+    try:
+        tmpl = env.from_source(data.decode('utf-8'), infile_fwd_slashes, infile)
+    except TemplateSyntaxError as exception:
+        # Disable translated so that printed exception contains verbose
+        # information about syntax error location
+        exception.translated = False
+        raise
+
+    if context['cookiecutter'].get('_new_lines', False):
+        # Use `_new_lines` from context, if configured.
+        newline = context['cookiecutter']['_new_lines']
+        logger.debug('Using configured newline character %s', repr(newline))
+    else:
+        # Detect original file newline to output the rendered file.
+        # If the file contains mixed line endings, the first one is used.
+        newline = _first_newline(data)
+        logger.debug('Using detected newline character %s', repr(newline))
+
+    chunks = _encode_chunks(tmpl.generate(**context), newline)
+    if stream:
+        return 'rendered', chunks, None
+    return 'rendered', b''.join(chunks), data
+
+
+def _encode_chunks(chunks, newline):
+    """Encode the rendered `str` chunks, translating their line endings.
+
+    Line endings are translated as a file opened with ``newline`` would.
+    """
+    newline = os.linesep if newline is None else newline
+    for chunk in chunks:
+        if newline and newline != '\n':
+            chunk = chunk.replace('\n', newline)
+        yield chunk.encode('utf-8')
 
 
 def render_and_create_dir(dirname: str, context: dict, output_dir:
     'os.PathLike[str]', environment: Environment, overwrite_if_exists: bool
-    =False):
+    =False, sink=None):
     """Render name of a directory, create the directory, return its path."""
-    name_tmpl = environment.from_string(dirname)
-    rendered_dirname = name_tmpl.render(**context)
-    dir_to_create = os.path.normpath(os.path.join(output_dir, rendered_dirname))
+    sink = sink or LocalSink()
+    dir_to_create, output_dir_exists = _render_dir(
+        dirname, context, output_dir, environment, overwrite_if_exists, sink
+    )
+    if not output_dir_exists:
+        sink.make_dir(dir_to_create)
 
-    logger.debug('Rendered dir %s must exist in output_dir %s', dir_to_create, output_dir)
+    return dir_to_create, not output_dir_exists
+
+
+def _render_dir(dirname, context, output_dir, environment, overwrite_if_exists,
+    sink=None):
+    """Render name of a directory, check whether it may be generated.
+
+    :return: The path of the directory, and whether it exists already.
+    """
+    rendered_dirname = render_name(dirname, context, environment)
 
-    if os.path.exists(dir_to_create):
+    dir_to_create = Path(output_dir, rendered_dirname)
+
+    logger.debug(
+        'Rendered dir %s must exist in output_dir %s', dir_to_create, output_dir
+    )
+
+    output_dir_exists = (sink or LocalSink()).exists(dir_to_create)
+
+    if output_dir_exists:
         if overwrite_if_exists:
-            logger.debug('Overwriting %s', dir_to_create)
-        else:
-            logger.error('Error that %s already exists', dir_to_create)
-            raise OutputDirExistsException(
-                'Error: "{}" directory already exists'.format(dir_to_create)
+            logger.debug(
+                'Output directory %s already exists, overwriting it', dir_to_create
             )
-    else:
-        make_sure_path_exists(dir_to_create)
+        else:
+            msg = f'Error: "{dir_to_create}" directory already exists'
+            raise OutputDirExistsException(msg)
 
-    return dir_to_create
+    return dir_to_create, output_dir_exists
 
 
 def _run_hook_from_repo_dir(repo_dir, hook_name, project_dir, context,
@@ -177,38 +587,217 @@ def _run_hook_from_repo_dir(repo_dir, hook_name, project_dir, context,
     :param delete_project_on_failure: Delete the project directory on hook
         failure?
     """
-    with work_in(repo_dir):
+    warnings.warn(
+        "The '_run_hook_from_repo_dir' function is deprecated, "
+        "use 'cookiecutter.hooks.run_hook_from_repo_dir' instead",
+        DeprecationWarning,
+        2,
+    )
+    run_hook_from_repo_dir(
+        repo_dir, hook_name, project_dir, context, delete_project_on_failure
+    )
+
+
+def _generate_project_file(project_dir, infile, context, env,
+    skip_if_file_exists, classifier, manifest=None, sink=None, copy_only=None):
+    """Copy or render a single template file into the project directory.
+
+    Files matching ``_copy_without_render`` are copied verbatim, everything
+    else goes through `generate_file()`. Undefined variables are reported as
+    `UndefinedVariableInTemplate` naming the offending file.
+    """
+    copy_only = copy_only or _copy_only_matcher(context)
+    with span('file', path=infile):
+        if copy_only(infile):
+            outfile = os.path.join(project_dir, render_name(infile, context, env))
+            if manifest is not None and manifest.is_current(infile, outfile):
+                annotate(kind='skipped')
+                return False
+            logger.debug('Copying file %s to %s without rendering', infile, outfile)
+            annotate(kind='copy_only')
+            _copy_output(infile, outfile, manifest, sink)
+            return False
         try:
-            run_hook_from_repo_dir(
-                repo_dir=repo_dir,
-                hook_name=hook_name,
-                project_dir=project_dir,
-                context=context
+            return generate_file(
+                project_dir,
+                infile,
+                context,
+                env,
+                skip_if_file_exists,
+                classifier,
+                manifest,
+                sink,
             )
-        except FailedHookException:
-            if delete_project_on_failure:
-                logger.warning(
-                    "Hook script failed ({}). Removing project directory {}".format(
-                        hook_name, project_dir
-                    )
-                )
-                rmtree(project_dir)
-            raise
-        except Exception:
-            # Catch all other exceptions and raise a FailedHookException
-            logger.warning(
-                "Hook script failed ({}). Removing project directory {}".format(
-                    hook_name, project_dir
-                )
-            )
-            if delete_project_on_failure:
-                rmtree(project_dir)
-            raise FailedHookException(hook_name)
+        except UndefinedError as err:
+            msg = f"Unable to create file '{infile}'"
+            raise UndefinedVariableInTemplate(msg, err, context) from err
+
+
+def _walk_template(project_dir, context, env, exists=None):
+    """Walk the template in the current directory, in generation order.
+
+    Yields ``(kind, path, outdir)`` tuples, where ``kind`` is one of:
+
+    * ``'copy_dir'``: ``path`` is a directory matching
+      ``_copy_without_render``, to be copied as a whole to the rendered
+      ``outdir``, leaving out what matches ``_exclude``. It is not walked
+      into.
+    * ``'dir'``: ``path`` is the unrendered output path of a directory to
+      create, below ``project_dir``.
+    * ``'file'``: ``path`` is a file to generate, relative to the template.
+
+    ``outdir`` is `None` for the last two. Directories and files matching
+    ``_exclude`` are left out, and excluded directories are not walked into.
+
+    :param exists: Tells whether an output path exists. When given, a
+        directory whose contents all match ``_copy_without_render``, such as
+        ``assets`` for ``assets/*``, is copied as a whole too if its output
+        does not exist yet and the names of its entries have nothing to
+        render. Walking it would only create the same copy one entry at a
+        time.
+    """
+    copy_only = _copy_only_matcher(context)
+    exclude = _exclude_matcher(context)
+    for root, dirs, files in os.walk('.'):
+        # We must separate the two types of dirs into different lists.
+        # The reason is that we don't want ``os.walk`` to go through the
+        # unrendered directories, since they will just be copied.
+        copy_dirs = []
+        render_dirs = []
+
+        for d in dirs:
+            d_ = os.path.normpath(os.path.join(root, d))
+            # We check the full path, because that's how it can be
+            # specified in the ``_copy_without_render`` setting, but
+            # we store just the dir name
+            if exclude(d_):
+                logger.debug('Excluding dir %s', d_)
+            elif copy_only(d_) or (
+                exists is not None
+                and copy_only.covers_tree(d_)
+                and _copies_as_tree(d_, project_dir, context, env, exists)
+            ):
+                logger.debug('Found copy only path %s', d)
+                copy_dirs.append(d)
+            else:
+                render_dirs.append(d)
+
+        for copy_dir in copy_dirs:
+            indir = os.path.normpath(os.path.join(root, copy_dir))
+            outdir = os.path.normpath(os.path.join(project_dir, indir))
+            yield 'copy_dir', indir, render_name(outdir, context, env)
+
+        # We mutate ``dirs``, because we only want to go through these dirs
+        # recursively
+        dirs[:] = render_dirs
+        for d in dirs:
+            yield 'dir', os.path.join(project_dir, root, d), None
+
+        for f in files:
+            infile = os.path.normpath(os.path.join(root, f))
+            if exclude(infile):
+                logger.debug('Excluding file %s', infile)
+                continue
+            yield 'file', infile, None
+
+
+def _copies_as_tree(indir, project_dir, context, env, exists):
+    """Tell whether the copy-only contents of ``indir`` can be copied at once."""
+    if any(has_template_syntax(name, env) for name in os.listdir(indir)):
+        return False
+    try:
+        outdir = render_name(os.path.join(project_dir, indir), context, env)
+    except UndefinedError:
+        # Walk it to report the error for the directory.
+        return False
+    return not exists(outdir)
+
+
+def _sync_copy_only_dir(indir, outdir, manifest, ignore=None):
+    """Make ``outdir`` a copy of ``indir``, only writing the files that changed.
+
+    This is the incremental counterpart of replacing ``outdir`` with a fresh
+    copy of ``indir``: files and directories missing from ``indir``, or
+    left out by ``ignore``, are removed from ``outdir``.
+
+    :param ignore: Callable telling the names of a directory not to copy,
+        like the ``ignore`` of `shutil.copytree`.
+    """
+    def ignored(directory, names):
+        return ignore(directory, names) if ignore else set()
+
+    for root, dirs, files in os.walk(indir):
+        skip = ignored(root, dirs + files)
+        dirs[:] = [name for name in dirs if name not in skip]
+        target = os.path.join(outdir, os.path.relpath(root, indir))
+        make_sure_path_exists(target)
+        for name in files:
+            if name in skip:
+                continue
+            infile = os.path.join(root, name)
+            outfile = os.path.join(target, name)
+            if not manifest.is_current(infile, outfile):
+                _copy_output(infile, outfile, manifest)
+
+    for root, dirs, files in os.walk(outdir, topdown=False):
+        source = os.path.join(indir, os.path.relpath(root, outdir))
+        skip = ignored(source, dirs + files)
+        for name in files:
+            if name in skip or not os.path.isfile(os.path.join(source, name)):
+                os.remove(os.path.join(root, name))
+        for name in dirs:
+            if name in skip or not os.path.isdir(os.path.join(source, name)):
+                rmtree(os.path.join(root, name))
+
+
+class _FileJobs:
+    """Run per-file generation jobs inline or on a pool of threads.
+
+    With a single job every file is handled as soon as it is submitted, which
+    is the historical serial behaviour. Otherwise jobs go to a thread pool and
+    `wait()` re-raises the first failure in submission order, the order the
+    serial path would have hit it in.
+    """
+
+    def __init__(self, jobs):
+        self._executor = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        self._pending = []
+        self._results = []
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Jobs still running read from the template dir, so let them finish
+        # before the caller leaves it or removes the project they write into.
+        if self._executor is not None:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
 
+    def submit(self, func, *args):
+        """Run ``func(*args)`` now, or schedule it on the pool."""
+        if self._executor is None:
+            self._results.append(func(*args))
+        else:
+            # Run in a copy of the caller's context, so that the spans of
+            # `cookiecutter.timing` are reported from the pool too.
+            context = contextvars.copy_context()
+            self._pending.append(self._executor.submit(context.run, func, *args))
+
+    def wait(self):
+        """Wait for all jobs and return their results in submission order.
+
+        The first failure is re-raised instead.
+        """
+        return self._results + [future.result() for future in self._pending]
+
+
+@timed
 def generate_files(repo_dir, context=None, output_dir='.',
     overwrite_if_exists=False, skip_if_file_exists=False, accept_hooks=True,
-    keep_project_on_failure=False):
+    keep_project_on_failure=False, jobs=1, cache_dir=None,
+    hook_executor=None, incremental=False, sink=None):
     """Render the templates and saves them to files.
 
     :param repo_dir: Project template input directory.
@@ -221,58 +810,410 @@ def generate_files(repo_dir, context=None, output_dir='.',
     :param accept_hooks: Accept pre and post hooks if set to `True`.
     :param keep_project_on_failure: If `True` keep generated project directory even when
         generation fails
+    :param jobs: Number of threads used to render and write files. Directories
+        are always created in template order by the calling thread; with more
+        than one job the files are rendered and written concurrently.
+    :param cache_dir: Directory holding the persistent compiled-template
+        and file type caches. Templates are compiled from scratch and files
+        classified anew when `None`.
+    :param hook_executor: Hook executor running Python hooks instead of a new
+        interpreter per hook, see `cookiecutter.hooks.run_script_with_context`.
+    :param incremental: When regenerating a project over itself, skip the files
+        whose template, context and output are unchanged since the last run,
+        and leave outputs whose contents would not change untouched. What was
+        generated is recorded in a manifest in ``cache_dir``, see
+        `cookiecutter.manifest.GenerationManifest`.
+    :param sink: Where to write the project, such as a
+        `cookiecutter.sinks.ZipSink` streaming it into an archive. The project
+        is written to ``output_dir`` on disk when `None`. Hooks are not run
+        for sinks that do not write to disk, and ``incremental`` is only
+        supported on disk.
+    :return: The path of the project directory. It only exists on disk for
+        sinks that write to disk.
     """
-    template_dir = find_template(repo_dir)
+    context = context or OrderedDict([])
+    sink = sink or LocalSink()
+    if incremental and not sink.on_disk:
+        raise ValueError('incremental generation needs a sink writing to disk')
+    if accept_hooks and not sink.on_disk:
+        hooks_dir = os.path.join(repo_dir, 'hooks')
+        if any(
+            find_hook(hook_name, hooks_dir)
+            for hook_name in ('pre_gen_project', 'post_gen_project')
+        ):
+            logger.warning(
+                'The hooks of %s are not run, the project is not written to disk',
+                repo_dir,
+            )
+        accept_hooks = False
+
+    # The loader resolves templates from the template directory, the working
+    # directory while generating, see `_generate_tree()`.
+    env = create_env_with_context(context, repo_dir).overlay(
+        loader=FileSystemLoader(['.', '../templates']),
+        bytecode_cache=TemplateBytecodeCache(cache_dir) if cache_dir else None,
+    )
+
+    template_dir = find_template(repo_dir, env)
     logger.debug('Generating project from %s...', template_dir)
-    context = context or {}
-    env = create_env_with_context(context)
-
-    # Create project dir
-    project_dir = render_and_create_dir(
-        os.path.basename(repo_dir),
-        context,
-        output_dir,
-        env,
-        overwrite_if_exists
+    classifier = FileClassifier(
+        classifier_cache_file(cache_dir, template_dir) if cache_dir else None
     )
 
-    # Run pre-gen hook
-    if accept_hooks:
-        _run_hook_from_repo_dir(repo_dir, 'pre_gen_project', project_dir, context, not keep_project_on_failure)
+    unrendered_dir = os.path.split(template_dir)[1]
+    try:
+        target_dir, target_exists = _render_dir(
+            unrendered_dir, context, output_dir, env, overwrite_if_exists, sink
+        )
+    except UndefinedError as err:
+        msg = f"Unable to create project directory '{unrendered_dir}'"
+        raise UndefinedVariableInTemplate(msg, err, context) from err
 
+    # We want the Jinja path and the OS paths to match. Consequently, we'll:
+    #   + CD to the template folder
+    #   + Set Jinja's path to '.'
+    #
+    #  In order to build our files to the correct folder(s), we'll use an
+    # absolute path for the target folder (project_dir)
+
+    target_dir = os.path.abspath(target_dir)
+    staging_dir = None
+    if target_exists:
+        project_dir = target_dir
+    elif sink.on_disk and not incremental:
+        # Generate a new project in a hidden sibling of its final location,
+        # under its final name, and move it there once complete.
+        make_sure_path_exists(output_dir)
+        staging_dir = os.path.join(
+            os.path.abspath(output_dir), STAGING_PREFIX + uuid.uuid4().hex
+        )
+        os.mkdir(staging_dir)
+        project_dir = os.path.join(staging_dir, os.path.basename(target_dir))
+        os.mkdir(project_dir)
+    else:
+        project_dir = target_dir
+        sink.make_dir(project_dir)
     logger.debug('Project directory is %s', project_dir)
 
-    # Render the templates and save them to files
-    with work_in(template_dir):
-        for root, dirs, files in os.walk('.'):
-            for dirname in dirs:
-                indir = os.path.normpath(os.path.join(root, dirname))
-                outdir = os.path.normpath(os.path.join(project_dir, indir))
-                render_and_create_dir(
-                    indir,
-                    context,
+    # if we created the output directory, then it's ok to remove it
+    # if rendering fails. Staged projects are discarded as a whole below.
+    delete_project_on_failure = (
+        not target_exists and staging_dir is None and not keep_project_on_failure
+    )
+
+    manifest = None
+    if incremental:
+        manifest = GenerationManifest(
+            project_dir,
+            context_digest(context, template_dir),
+            manifest_file(cache_dir, project_dir) if cache_dir else None,
+        )
+
+    try:
+        if accept_hooks:
+            run_hook_from_repo_dir(
+                repo_dir,
+                'pre_gen_project',
+                project_dir,
+                context,
+                delete_project_on_failure,
+                hook_executor,
+            )
+
+        try:
+            _generate_tree(
+                project_dir,
+                template_dir,
+                context,
+                env,
+                overwrite_if_exists,
+                skip_if_file_exists,
+                jobs,
+                classifier,
+                manifest,
+                sink,
+            )
+        except UndefinedVariableInTemplate:
+            if delete_project_on_failure:
+                sink.remove_tree(project_dir)
+            raise
+    except BaseException:
+        if staging_dir is not None:
+            if keep_project_on_failure:
+                try:
+                    _publish_staged(staging_dir, project_dir, target_dir)
+                except OutputDirExistsException:
+                    logger.warning(
+                        'Could not keep the failed project, %s already exists',
+                        target_dir,
+                    )
+            else:
+                discard_tree(staging_dir)
+        raise
+
+    if staging_dir is not None:
+        # The post_gen_project hook runs on the project in its final location.
+        _publish_staged(staging_dir, project_dir, target_dir)
+
+    if accept_hooks:
+        run_hook_from_repo_dir(
+            repo_dir,
+            'post_gen_project',
+            target_dir,
+            context,
+            not target_exists and not keep_project_on_failure,
+            hook_executor,
+        )
+    return target_dir
+
+
+def _generate_tree(project_dir, template_dir, context, env, overwrite_if_exists,
+    skip_if_file_exists, jobs, classifier, manifest, sink):
+    """Generate the directories and files of the template into ``project_dir``."""
+    base_dir = os.path.dirname(project_dir)
+    copy_only = _copy_only_matcher(context)
+    exclude = _exclude_matcher(context)
+    ignore = exclude.ignore if exclude else None
+    with work_in(template_dir), _FileJobs(jobs) as file_jobs:
+        walk = _walk_template(project_dir, context, env, exists=sink.exists)
+        for kind, path, outdir in walk:
+            if kind == 'copy_dir':
+                logger.debug('Copying dir %s to %s without rendering', path, outdir)
+                with span('copy_dir', path=path):
+                    if manifest is not None:
+                        _sync_copy_only_dir(path, outdir, manifest, ignore)
+                        continue
+                    # The outdir is not the root dir, it is the dir which marked as
+                    # copy only in the config file. If the program hits this line,
+                    # which means the overwrite_if_exists = True, and root dir exists
+                    sink.copy_tree(path, outdir, ignore)
+            elif kind == 'dir':
+                try:
+                    render_and_create_dir(
+                        path, context, base_dir, env, overwrite_if_exists, sink
+                    )
+                except UndefinedError as err:
+                    _dir = os.path.relpath(path, base_dir)
+                    msg = f"Unable to create directory '{_dir}'"
+                    raise UndefinedVariableInTemplate(msg, err, context) from err
+            else:
+                file_jobs.submit(
+                    _generate_project_file,
                     project_dir,
+                    path,
+                    context,
                     env,
-                    overwrite_if_exists
+                    skip_if_file_exists,
+                    classifier,
+                    manifest,
+                    sink,
+                    copy_only,
                 )
 
-            for filename in files:
-                infile = os.path.normpath(os.path.join(root, filename))
-                if is_copy_only_path(infile, context):
-                    outfile = os.path.join(project_dir, infile)
-                    logger.debug('Copying %s to %s without rendering', infile, outfile)
-                    shutil.copyfile(infile, outfile)
-                else:
-                    generate_file(
-                        project_dir,
-                        infile,
-                        context,
-                        env,
-                        skip_if_file_exists
+        copied_verbatim = sum(file_jobs.wait())
+        classifier.save()
+        if manifest is not None:
+            manifest.save()
+        logger.debug(
+            '%s files had no template syntax and were copied as is',
+            copied_verbatim,
+        )
+
+
+def _publish_staged(staging_dir, project_dir, target_dir):
+    """Move the project generated in ``staging_dir`` to ``target_dir``.
+
+    Anything else in ``staging_dir``, such as files a pre_gen_project hook
+    wrote next to the project, is moved next to ``target_dir`` as well.
+    """
+    try:
+        os.rename(project_dir, target_dir)
+    except OSError as err:
+        discard_tree(staging_dir)
+        if err.errno in (errno.EEXIST, errno.ENOTEMPTY) or os.path.lexists(
+            target_dir
+        ):
+            msg = f'Error: "{target_dir}" directory already exists'
+            raise OutputDirExistsException(msg) from err
+        raise
+    logger.debug('Moved project from %s to %s', project_dir, target_dir)
+
+    output_dir = os.path.dirname(target_dir)
+    for name in os.listdir(staging_dir):
+        path = os.path.join(staging_dir, name)
+        if os.path.lexists(os.path.join(output_dir, name)):
+            logger.warning('Not moving %s, %s already exists', path, name)
+            continue
+        try:
+            os.rename(path, os.path.join(output_dir, name))
+        except OSError as err:
+            logger.warning('Could not move %s: %s', path, err)
+    try:
+        os.rmdir(staging_dir)
+    except OSError:
+        logger.warning('Leaving %s in place, it is not empty', staging_dir)
+
+
+class PlannedPath(NamedTuple):
+    """One path of the output tree computed by `plan_files()`."""
+
+    #: Path of the output, relative to ``output_dir``.
+    path: str
+    #: Either ``'directory'`` or ``'file'``.
+    type: str
+    #: Path of the input, relative to the template directory.
+    source: str
+    #: How the output would be generated: directories are ``'create'``-d,
+    #: files ``'render'``-ed or ``'copy'``-ed as is, and anything generation
+    #: would leave alone is a ``'skip'``.
+    action: str
+    #: Size of the generated file in bytes, if known without rendering it.
+    size: Optional[int]
+    #: Whether the output exists already.
+    exists: bool
+    #: The generated contents of the file, when planned with
+    #: ``render_contents``.
+    data: Optional[bytes] = None
+
+
+@timed
+def plan_files(repo_dir, context=None, output_dir='.',
+    overwrite_if_exists=False, skip_if_file_exists=False,
+    render_contents=False):
+    """Compute the output tree `generate_files()` would produce.
+
+    The names of the directories and files are rendered as they would be,
+    and the same errors are raised for existing outputs and undefined
+    variables, but nothing is written and no hooks are run. The output tree is
+    only looked at to tell which outputs exist already.
+
+    :param repo_dir: Project template input directory.
+    :param context: Dict for populating the template's variables.
+    :param output_dir: Where the generated project dir would be output into.
+    :param overwrite_if_exists: Plan overwriting the contents of the output
+        directory if it exists.
+    :param skip_if_file_exists: Plan skipping the files that exist already.
+    :param render_contents: Also render the contents of the files into memory,
+        returned as the `PlannedPath.data` of each file.
+    :return: A list of `PlannedPath`, in generation order, starting with the
+        project directory.
+    """
+    context = context or OrderedDict([])
+
+    env = create_env_with_context(context, repo_dir).overlay(
+        loader=FileSystemLoader(['.', '../templates'])
+    )
+
+    template_dir = find_template(repo_dir, env)
+    logger.debug('Planning project from %s...', template_dir)
+    classifier = FileClassifier()
+
+    unrendered_dir = os.path.split(template_dir)[1]
+    try:
+        project_dir, exists = _render_dir(
+            unrendered_dir, context, output_dir, env, overwrite_if_exists
+        )
+    except UndefinedError as err:
+        msg = f"Unable to create project directory '{unrendered_dir}'"
+        raise UndefinedVariableInTemplate(msg, err, context) from err
+    project_dir = os.path.abspath(project_dir)
+    output_dir = os.path.abspath(output_dir)
+
+    def planned(outpath, *args):
+        return PlannedPath(os.path.relpath(outpath, output_dir), *args)
+
+    plan = [planned(project_dir, 'directory', '.', 'create', None, exists)]
+    copy_only = _copy_only_matcher(context)
+    exclude = _exclude_matcher(context)
+
+    with work_in(template_dir):
+        for kind, path, outdir in _walk_template(project_dir, context, env):
+            if kind == 'copy_dir':
+                plan.append(
+                    planned(outdir, 'directory', path, 'copy', None,
+                        os.path.isdir(outdir))
+                )
+                for root, dirs, files in os.walk(path):
+                    skip = exclude.ignore(root, dirs + files)
+                    dirs[:] = sorted(name for name in dirs if name not in skip)
+                    files = [name for name in files if name not in skip]
+                    for name in dirs:
+                        outpath = os.path.join(outdir, os.path.relpath(
+                            os.path.join(root, name), path))
+                        plan.append(
+                            planned(outpath, 'directory', os.path.join(root, name),
+                                'copy', None, os.path.isdir(outpath))
+                        )
+                    for name in sorted(files):
+                        infile = os.path.join(root, name)
+                        outfile = os.path.join(outdir, os.path.relpath(infile, path))
+                        plan.append(
+                            _plan_copy(planned, infile, outfile, render_contents)
+                        )
+            elif kind == 'dir':
+                try:
+                    outpath, exists = _render_dir(
+                        path, context, output_dir, env, overwrite_if_exists
+                    )
+                except UndefinedError as err:
+                    _dir = os.path.relpath(path, output_dir)
+                    msg = f"Unable to create directory '{_dir}'"
+                    raise UndefinedVariableInTemplate(msg, err, context) from err
+                source = os.path.relpath(path, project_dir)
+                plan.append(planned(outpath, 'directory', source, 'create',
+                    None, exists))
+            else:
+                try:
+                    plan.append(
+                        _plan_file(
+                            planned,
+                            project_dir,
+                            path,
+                            context,
+                            env,
+                            skip_if_file_exists,
+                            classifier,
+                            render_contents,
+                            copy_only,
+                        )
                     )
+                except UndefinedError as err:
+                    msg = f"Unable to create file '{path}'"
+                    raise UndefinedVariableInTemplate(msg, err, context) from err
+
+    return plan
+
+
+def _plan_copy(planned, infile, outfile, render_contents):
+    """Plan copying ``infile`` to ``outfile`` as is."""
+    data = None
+    if render_contents:
+        with open(infile, 'rb') as fh:
+            data = fh.read()
+    return planned(outfile, 'file', infile, 'copy', os.path.getsize(infile),
+        os.path.exists(outfile), data)
 
-    # Run post-gen hook
-    if accept_hooks:
-        _run_hook_from_repo_dir(repo_dir, 'post_gen_project', project_dir, context, not keep_project_on_failure)
 
-    return project_dir
+def _plan_file(planned, project_dir, infile, context, env,
+    skip_if_file_exists, classifier, render_contents, copy_only):
+    """Plan generating ``infile`` the way `generate_file()` would."""
+    outfile = os.path.join(project_dir, render_name(infile, context, env))
+    exists = os.path.exists(outfile)
+    if copy_only(infile):
+        return _plan_copy(planned, infile, outfile, render_contents)
+
+    if not os.path.basename(outfile) or os.path.isdir(outfile):
+        logger.debug('The resulting file name is empty: %s', outfile)
+        return planned(outfile, 'file', infile, 'skip', None, exists)
+    if skip_if_file_exists and exists:
+        logger.debug('The resulting file already exists: %s', outfile)
+        return planned(outfile, 'file', infile, 'skip', None, exists)
+
+    kind, output, _ = _file_output(
+        infile, context, env, classifier, render=render_contents
+    )
+    if kind != 'rendered':
+        return _plan_copy(planned, infile, outfile, render_contents)
+    size = None if output is None else len(output)
+    return planned(outfile, 'file', infile, 'render', size, exists,
+        output if render_contents else None)
@@ -0,0 +1,106 @@
+"""Worker process of `cookiecutter.hooks.HookWorkerPool`.
+
+The worker reads one JSON request per line on its standard input, with the
+``source`` of a rendered Python hook, the ``path`` it is reported under, the
+``cwd`` and the ``env`` to run it with. For each request it writes one JSON
+line on its standard output, with the ``exit_status`` of the hook, its
+captured ``stdout`` and ``stderr``, and whether the worker will ``retire``
+after it. The worker exits at the end of its input.
+"""
+import json
+import os
+import sys
+import tempfile
+
+from cookiecutter.exceptions import FailedHookException
+from cookiecutter.hooks import EXIT_SUCCESS, run_python_in_process
+
+CAN_FORK = hasattr(os, 'fork')
+
+
+def run_request(request):
+    """Run the hook described by ``request`` in this process.
+
+    :return: The exit status of the hook.
+    """
+    os.environ.clear()
+    os.environ.update(request['env'])
+    try:
+        run_python_in_process(request['source'], request['path'], request['cwd'])
+    except FailedHookException as err:
+        cause = err.__cause__
+        if isinstance(cause, SystemExit) and isinstance(cause.code, int):
+            return cause.code
+        return 1
+    return EXIT_SUCCESS
+
+
+def run_captured(request):
+    """Run ``request`` with its standard streams redirected.
+
+    With ``os.fork`` the hook runs in a child process, so that whatever it
+    does to the interpreter ends with it.
+
+    :return: The exit status, standard output and standard error of the hook.
+    """
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork() if CAN_FORK else 0
+        if pid == 0:
+            exit_status = 1
+            saved_fds = [os.dup(fd) for fd in (1, 2)]
+            os.dup2(out.fileno(), 1)
+            os.dup2(err.fileno(), 2)
+            try:
+                exit_status = run_request(request)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                if CAN_FORK:
+                    os._exit(exit_status)
+                for fd, saved in zip((1, 2), saved_fds):
+                    os.dup2(saved, fd)
+                    os.close(saved)
+        else:
+            _, wait_status = os.waitpid(pid, 0)
+            if os.WIFSIGNALED(wait_status):
+                exit_status = -os.WTERMSIG(wait_status)
+            else:
+                exit_status = os.WEXITSTATUS(wait_status)
+
+        captured = []
+        for fh in (out, err):
+            fh.seek(0)
+            captured.append(fh.read().decode('utf-8', errors='replace'))
+    return exit_status, captured[0], captured[1]
+
+
+def main():
+    """Serve hook requests until the end of the standard input."""
+    requests_in = os.fdopen(os.dup(0), 'rb')
+    replies_out = os.fdopen(os.dup(1), 'wb')
+    # Keep stray output and reads away from the pipes to the pool.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for line in requests_in:
+        exit_status, stdout, stderr = run_captured(json.loads(line))
+        reply = {
+            'exit_status': exit_status,
+            'stdout': stdout,
+            'stderr': stderr,
+            'retire': not CAN_FORK,
+        }
+        replies_out.write(json.dumps(reply).encode('utf-8') + b'\n')
+        replies_out.flush()
+        if not CAN_FORK:
+            break
+
+
+if __name__ == '__main__':  # pragma: no cover
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -1,14 +1,21 @@
 """Functions for discovering and executing various cookiecutter hooks."""
+import builtins
 import errno
+import json
 import logging
 import os
+import queue
 import subprocess
 import sys
 import tempfile
+import threading
+import traceback
 from pathlib import Path
+from typing import NamedTuple
 from jinja2.exceptions import UndefinedError
 from cookiecutter import utils
 from cookiecutter.exceptions import FailedHookException
+from cookiecutter.timing import span
 from cookiecutter.utils import create_env_with_context, create_tmp_repo_dir, rmtree, work_in
 logger = logging.getLogger(__name__)
 _HOOKS = ['pre_prompt', 'pre_gen_project', 'post_gen_project']
@@ -22,11 +29,13 @@ def valid_hook(hook_file, hook_name):
     :param hook_name: The hook to find
     :return: The hook file validity
     """
-    return (
-        hook_file.startswith(hook_name) and
-        hook_file.endswith(('.py', '.sh')) and
-        not hook_file.endswith('.pyc')
-    )
+    filename = os.path.basename(hook_file)
+    basename = os.path.splitext(filename)[0]
+    matching_hook = basename == hook_name
+    supported_hook = basename in _HOOKS
+    backup_file = filename.endswith('~')
+
+    return matching_hook and supported_hook and not backup_file
 
 
 def find_hook(hook_name, hooks_dir='hooks'):
@@ -41,15 +50,20 @@ def find_hook(hook_name, hooks_dir='hooks'):
     :param hooks_dir: The hook directory in the template
     :return: The absolute path to the hook script or None
     """
-    hooks_dir = os.path.abspath(hooks_dir)
+    logger.debug('hooks_dir is %s', os.path.abspath(hooks_dir))
+
     if not os.path.isdir(hooks_dir):
+        logger.debug('No hooks/dir in template_dir')
         return None
 
+    scripts = []
     for hook_file in os.listdir(hooks_dir):
         if valid_hook(hook_file, hook_name):
-            return os.path.join(hooks_dir, hook_file)
+            scripts.append(os.path.abspath(os.path.join(hooks_dir, hook_file)))
 
-    return None
+    if len(scripts) == 0:
+        return None
+    return scripts
 
 
 def run_script(script_path, cwd='.'):
@@ -58,60 +72,306 @@ def run_script(script_path, cwd='.'):
     :param script_path: Absolute path to the script to run.
     :param cwd: The directory to run the script from.
     """
-    with work_in(cwd):
-        if script_path.endswith('.py'):
-            subprocess.check_call([sys.executable, script_path], cwd=cwd)
+    run_thru_shell = sys.platform.startswith('win')
+    if script_path.endswith('.py'):
+        script_command = [sys.executable, script_path]
+    else:
+        script_command = [script_path]
+
+    utils.make_executable(script_path)
+
+    try:
+        proc = subprocess.Popen(script_command, shell=run_thru_shell, cwd=cwd)
+        exit_status = proc.wait()
+        if exit_status != EXIT_SUCCESS:
+            raise FailedHookException(
+                f'Hook script failed (exit status: {exit_status})'
+            )
+    except OSError as err:
+        if err.errno == errno.ENOEXEC:
+            raise FailedHookException(
+                'Hook script failed, might be an empty file or missing a shebang'
+            ) from err
+        raise FailedHookException(f'Hook script failed (error: {err})') from err
+
+
+def run_python_in_process(source, script_path, cwd='.'):
+    """Execute Python source in this interpreter, as if it were run as a script.
+
+    The code runs as ``__main__`` in a fresh module namespace, from ``cwd``,
+    with ``sys.argv`` set to ``[script_path]`` and the directory of
+    ``script_path`` first on ``sys.path``. The working directory, ``sys.argv``
+    and ``sys.path`` are restored afterwards. Modules imported by the code stay
+    imported, which is what makes later hooks cheaper than a new interpreter.
+
+    ``sys.exit()`` behaves as it would in a subprocess: no argument or zero is
+    a success, anything else a failure. An uncaught exception prints its
+    traceback and fails the hook.
+
+    :param source: The Python source to run.
+    :param script_path: Path the source is reported under in tracebacks.
+    :param cwd: The directory to run the source from.
+    """
+    try:
+        code = compile(source, script_path, 'exec')
+    except SyntaxError as err:
+        traceback.print_exception(type(err), err, None)
+        raise FailedHookException(f'Hook script failed (error: {err})') from err
+
+    namespace = {
+        '__name__': '__main__',
+        '__file__': script_path,
+        '__builtins__': builtins,
+    }
+    saved_argv, saved_path = sys.argv, sys.path[:]
+    sys.argv = [script_path]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+    try:
+        with work_in(cwd):
+            exec(code, namespace)
+    except SystemExit as err:
+        if err.code is None or err.code == EXIT_SUCCESS:
+            return
+        if isinstance(err.code, int):
+            exit_status = err.code
         else:
-            subprocess.check_call([script_path], cwd=cwd)
+            print(err.code, file=sys.stderr)
+            exit_status = 1
+        raise FailedHookException(
+            f'Hook script failed (exit status: {exit_status})'
+        ) from err
+    except Exception as err:
+        traceback.print_exc()
+        raise FailedHookException(f'Hook script failed (error: {err!r})') from err
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+
+class InProcessHookExecutor:
+    """Hook executor running Python hooks in this interpreter.
+
+    Hook executors run the rendered source of Python hooks in place of a new
+    interpreter per hook, through their ``run(source, script_path, cwd)``
+    method which raises `FailedHookException` when the hook fails. This one
+    uses `run_python_in_process()`.
+    """
+
+    def run(self, source, script_path, cwd):
+        """Run the Python hook ``source`` from ``cwd``."""
+        run_python_in_process(source, script_path, cwd)
+
+
+class HookResult(NamedTuple):
+    """Outcome of a hook run by a `HookWorkerPool`."""
 
+    exit_status: int
+    stdout: str
+    stderr: str
+
+
+class HookWorkerPool:
+    """Hook executor running Python hooks on pre-started worker interpreters.
+
+    Each worker is a ``python -m cookiecutter.hook_worker`` process waiting
+    for hooks on its standard input. Where ``os.fork`` is available a worker
+    forks a child per hook, so a hook can neither crash the worker nor leak
+    state into the next hook, while interpreter startup and the imports of
+    cookiecutter are paid once per worker. Elsewhere a worker runs a single
+    hook and is replaced by a fresh one, started in the background.
+
+    Hooks run with their standard input closed, and with their output
+    captured and replayed once they finish.
+
+    The pool can be used as a context manager, and must be closed to stop
+    its workers. Pickling it, for example to hand it to other processes,
+    gives a new pool of the same size in the receiving process.
+
+    :param size: Number of workers, thus of hooks run concurrently.
+    """
 
-def run_script_with_context(script_path, cwd, context):
+    def __init__(self, size=1):
+        """Start ``size`` workers."""
+        self.size = size
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(size):
+            self._idle.put(self._start_worker())
+
+    def _start_worker(self):
+        worker = subprocess.Popen(
+            [sys.executable, '-m', 'cookiecutter.hook_worker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _stop_worker(self, worker, kill=False):
+        with self._lock:
+            self._workers.discard(worker)
+        if kill:
+            worker.kill()
+        try:
+            worker.stdin.close()
+        except OSError:
+            pass
+        try:
+            worker.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+        worker.stdout.close()
+
+    def execute(self, source, script_path, cwd):
+        """Run the Python hook ``source`` on a worker and wait for it.
+
+        :param source: The Python source to run.
+        :param script_path: Path the source is reported under in tracebacks.
+        :param cwd: The directory to run the source from.
+        :return: A `HookResult` with the exit status and output of the hook.
+        """
+        if self._closed:
+            raise RuntimeError('HookWorkerPool is closed')
+        request = {
+            'source': source,
+            'path': os.path.abspath(script_path),
+            'cwd': os.path.abspath(cwd),
+            'env': dict(os.environ),
+        }
+        worker = self._idle.get()
+        try:
+            worker.stdin.write(json.dumps(request).encode('utf-8') + b'\n')
+            worker.stdin.flush()
+            line = worker.stdout.readline()
+            reply = json.loads(line)
+        except (OSError, ValueError) as err:
+            self._stop_worker(worker, kill=True)
+            self._idle.put(self._start_worker())
+            raise FailedHookException(f'Hook worker failed (error: {err!r})') from err
+
+        if reply['retire']:
+            self._stop_worker(worker)
+            worker = self._start_worker()
+        self._idle.put(worker)
+        return HookResult(reply['exit_status'], reply['stdout'], reply['stderr'])
+
+    def run(self, source, script_path, cwd):
+        """Run the Python hook ``source`` on a worker, replaying its output."""
+        result = self.execute(source, script_path, cwd)
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+        sys.stderr.write(result.stderr)
+        sys.stderr.flush()
+        if result.exit_status != EXIT_SUCCESS:
+            raise FailedHookException(
+                f'Hook script failed (exit status: {result.exit_status})'
+            )
+
+    def close(self):
+        """Stop the workers, waiting for running hooks to finish."""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            with self._lock:
+                if not self._workers:
+                    break
+            self._stop_worker(self._idle.get())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        return {'size': self.size}
+
+    def __setstate__(self, state):
+        self.__init__(state['size'])
+
+
+def run_script_with_context(script_path, cwd, context, executor=None):
     """Execute a script after rendering it with Jinja.
 
     :param script_path: Absolute path to the script to run.
     :param cwd: The directory to run the script from.
     :param context: Cookiecutter project template context.
+    :param executor: Hook executor running Python scripts instead of a new
+        interpreter, such as `InProcessHookExecutor` or `HookWorkerPool`.
+        Other scripts always get a subprocess.
     """
-    env = create_env_with_context(context)
-    with open(script_path, 'r') as f:
-        script = f.read()
+    _, extension = os.path.splitext(script_path)
 
-    try:
-        rendered_script = env.from_string(script).render(**context)
-    except UndefinedError as err:
-        msg = f"Unable to render script '{script_path}': {err.message}"
-        raise FailedHookException(msg)
+    with open(script_path, encoding='utf-8') as file:
+        contents = file.read()
 
-    with tempfile.NamedTemporaryFile(mode='w', delete=False) as temp_script:
-        temp_script.write(rendered_script)
-        temp_script.flush()
-        temp_script_path = temp_script.name
+    if executor is not None and extension == '.py':
+        env = create_env_with_context(context)
+        output = env.from_string(contents).render(**context)
+        executor.run(output, script_path, cwd)
+        return
+
+    with tempfile.NamedTemporaryFile(delete=False, mode='wb', suffix=extension) as temp:
+        env = create_env_with_context(context)
+        template = env.from_string(contents)
+        output = template.render(**context)
+        temp.write(output.encode('utf-8'))
 
     try:
-        run_script(temp_script_path, cwd)
+        run_script(temp.name, cwd)
     finally:
-        os.remove(temp_script_path)
+        os.remove(temp.name)
 
 
-def run_hook(hook_name, project_dir, context):
+def run_hook(hook_name, project_dir, context, executor=None):
     """
     Try to find and execute a hook from the specified project directory.
 
     :param hook_name: The hook to execute.
     :param project_dir: The directory to execute the script from.
     :param context: Cookiecutter project context.
+    :param executor: Hook executor for Python hooks, see
+        `run_script_with_context()`.
     """
-    hook_path = find_hook(hook_name)
-    if hook_path:
-        logger.debug(f"Running hook {hook_name}")
-        if hook_path.endswith('.py'):
-            run_script_with_context(hook_path, project_dir, context)
-        else:
-            run_script(hook_path, project_dir)
+    scripts = find_hook(hook_name)
+    if scripts:
+        scripts = [
+            script for script in scripts if not _is_excluded_hook(script, context)
+        ]
+    if not scripts:
+        logger.debug('No %s hook found', hook_name)
+        return
+    logger.debug('Running hook %s', hook_name)
+    for script in scripts:
+        with span('hook', hook=hook_name, script=os.path.basename(script)):
+            run_script_with_context(script, project_dir, context, executor)
+
+
+def _is_excluded_hook(script, context):
+    """Tell whether ``script`` matches the ``_exclude`` patterns of ``context``.
+
+    Scripts are matched by their path relative to the template dir, which must
+    be the current working directory, such as ``hooks/<name>``. Like the paths
+    `cookiecutter.generate.generate_files()` walks, they are also left out when
+    one of the directories above them matches.
+    """
+    # The generate module imports this one.
+    from cookiecutter.generate import _exclude_matcher
+
+    excluded = _exclude_matcher(context)
+    parts = Path(os.path.relpath(script)).parts
+    return any(
+        excluded(os.path.join(*parts[:depth])) for depth in range(1, len(parts) + 1)
+    )
 
 
 def run_hook_from_repo_dir(repo_dir, hook_name, project_dir, context,
-    delete_project_on_failure):
+    delete_project_on_failure, executor=None):
     """Run hook from repo directory, clean project directory if hook fails.
 
     :param repo_dir: Project template input directory.
@@ -120,46 +380,48 @@ def run_hook_from_repo_dir(repo_dir, hook_name, project_dir, context,
     :param context: Cookiecutter project context.
     :param delete_project_on_failure: Delete the project directory on hook
         failure?
+    :param executor: Hook executor for Python hooks, see
+        `run_script_with_context()`.
     """
     with work_in(repo_dir):
         try:
-            run_hook(hook_name, project_dir, context)
-        except FailedHookException:
+            run_hook(hook_name, project_dir, context, executor)
+        except (FailedHookException, UndefinedError):
             if delete_project_on_failure:
-                logger.debug(
-                    "Hook script failed ({}). Removing project directory {}"
-                    .format(hook_name, project_dir)
-                )
-                rmtree(project_dir)
-            raise
-        except Exception:
-            # Log the exception here, but do not raise it,
-            # to avoid a cryptic error message
-            logger.exception(f'Hook script failed ({hook_name})')
-            if delete_project_on_failure:
-                logger.debug(
-                    "Hook script failed ({}). Removing project directory {}"
-                    .format(hook_name, project_dir)
-                )
                 rmtree(project_dir)
+            logger.error(
+                "Stopping generation because %s hook "
+                "script didn't exit successfully",
+                hook_name,
+            )
             raise
 
 
-def run_pre_prompt_hook(repo_dir: 'os.PathLike[str]') ->Path:
+def run_pre_prompt_hook(repo_dir: 'os.PathLike[str]', executor=None) -> Path:
     """Run pre_prompt hook from repo directory.
 
     :param repo_dir: Project template input directory.
+    :param executor: Hook executor for a Python hook, see
+        `run_script_with_context()`.
     """
+    # Check if we have a valid pre_prompt script
+    with work_in(repo_dir):
+        scripts = find_hook('pre_prompt')
+        if not scripts:
+            return repo_dir
+
+    # Create a temporary directory
+    repo_dir = create_tmp_repo_dir(repo_dir)
     with work_in(repo_dir):
-        hook_path = find_hook('pre_prompt')
-        if hook_path:
-            logger.debug("Running pre_prompt hook")
-            tmp_repo_dir = create_tmp_repo_dir()
+        scripts = find_hook('pre_prompt')
+        for script in scripts:
             try:
-                run_script(hook_path, tmp_repo_dir)
-                return Path(tmp_repo_dir)
-            except Exception:
-                logger.exception('Pre-prompt hook failed')
-                rmtree(tmp_repo_dir)
-                raise
-    return Path(repo_dir)
+                with span('hook', hook='pre_prompt', script=os.path.basename(script)):
+                    if executor is not None and script.endswith('.py'):
+                        with open(script, encoding='utf-8') as file:
+                            executor.run(file.read(), script, repo_dir)
+                    else:
+                        run_script(script, repo_dir)
+            except FailedHookException:
+                raise FailedHookException('Pre-Prompt Hook script failed')
+    return repo_dir
@@ -7,11 +7,11 @@ LOG_FORMATS = {'DEBUG': '%(levelname)s %(name)s: %(message)s', 'INFO':
     '%(levelname)s: %(message)s'}
 
 
-def configure_logger(stream_level='DEBUG', debug_file=None):
+def configure_logger(stream_level='DEBUG', debug_file=None, stream=None):
     """Configure logging for cookiecutter.
 
-    Set up logging to stdout with given level. If ``debug_file`` is given set
-    up logging to file with DEBUG level.
+    Set up logging to stdout, or to ``stream`` when given, with given level.
+    If ``debug_file`` is given set up logging to file with DEBUG level.
     """
     # Get the root logger
     logger = logging.getLogger()
@@ -22,7 +22,7 @@ def configure_logger(stream_level='DEBUG', debug_file=None):
         logger.removeHandler(handler)
 
     # Set up console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = logging.StreamHandler(stream or sys.stdout)
     console_handler.setLevel(LOG_LEVELS.get(stream_level.upper(), logging.DEBUG))
     console_formatter = logging.Formatter(LOG_FORMATS.get(stream_level.upper(), LOG_FORMATS['DEBUG']))
     console_handler.setFormatter(console_formatter)
@@ -4,27 +4,37 @@ Main entry point for the `cookiecutter` command.
 The code in this module is also a good example of how to use Cookiecutter as a
 library rather than a script.
 """
+import functools
 import logging
 import os
+import pickle
 import sys
-from copy import copy
+from copy import copy, deepcopy
 from pathlib import Path
+from typing import Any, NamedTuple, Optional
+from cookiecutter.bundle import create_bundle
 from cookiecutter.config import get_user_config
-from cookiecutter.exceptions import InvalidModeException
-from cookiecutter.generate import generate_context, generate_files
+from cookiecutter.environment import TEMPLATE_CACHE_DIR
+from cookiecutter.exceptions import CookiecutterException, InvalidModeException
+from cookiecutter.generate import apply_overwrites_to_context, generate_context, generate_files, plan_files
 from cookiecutter.hooks import run_pre_prompt_hook
 from cookiecutter.prompt import choose_nested_template, prompt_for_config
-from cookiecutter.replay import dump, load
+from cookiecutter.replay import ReplayStore, dump, load
 from cookiecutter.repository import determine_repo_dir
+from cookiecutter.timing import span, timed
 from cookiecutter.utils import rmtree
+from cookiecutter.vcs import release_clone_lock
 logger = logging.getLogger(__name__)
 
 
+@timed
 def cookiecutter(template, checkout=None, no_input=False, extra_context=
     None, replay=None, overwrite_if_exists=False, output_dir='.',
     config_file=None, default_config=False, password=None, directory=None,
-    skip_if_file_exists=False, accept_hooks=True, keep_project_on_failure=False
-    ):
+    skip_if_file_exists=False, accept_hooks=True, keep_project_on_failure=False,
+    jobs=1, template_cache=True, repo_cache=False, hook_executor=None,
+    incremental=False, plan=False, plan_contents=False, sink=None, config=None,
+    replay_store=None):
     """
     Run Cookiecutter just as if using it from the command line.
 
@@ -51,77 +61,545 @@ def cookiecutter(template, checkout=None, no_input=False, extra_context=
     :param accept_hooks: Accept pre and post hooks if set to `True`.
     :param keep_project_on_failure: If `True` keep generated project directory even when
         generation fails
+    :param jobs: Number of threads used to render and write the project files.
+    :param template_cache: Keep compiled templates in a persistent cache below
+        the ``cookiecutters_dir`` so that later runs skip compilation.
+    :param repo_cache: Update the clone of a repository template kept in the
+        ``cookiecutters_dir`` instead of cloning it again, holding a lock on it
+        while baking. Zip archives are downloaded with conditional requests
+        and unpacked once into the same directory.
+    :param hook_executor: Hook executor running Python hooks instead of a new
+        interpreter per hook, such as `cookiecutter.hooks.InProcessHookExecutor`
+        or a `cookiecutter.hooks.HookWorkerPool` shared by many calls.
+    :param incremental: With ``overwrite_if_exists``, only regenerate the files
+        whose template or context changed since the last run into the same
+        directory, and only write outputs whose contents change. The manifest
+        this relies on is kept with the template cache, without which only
+        unchanged outputs are left alone.
+    :param plan: Only compute the project that would be generated, see
+        `cookiecutter.generate.plan_files`. No hooks are run, and neither the
+        project nor the replay file is written.
+    :param plan_contents: With ``plan``, also render the contents of the
+        files into memory.
+    :param sink: Where to write the project instead of ``output_dir`` on disk,
+        see `cookiecutter.generate.generate_files`.
+    :param config: A user config returned by
+        `cookiecutter.config.get_user_config`, used as is instead of loading
+        one with ``config_file`` and ``default_config``. Programs baking many
+        projects can load it once and pass it to every call.
+    :param replay_store: A `cookiecutter.replay.ReplayStore` to record the
+        context of the bake into, besides the replay file. Defaults to the
+        store at the ``replay_store`` path of the user config, if any.
+    :return: The path of the generated project or, with ``plan``, the list
+        of `cookiecutter.generate.PlannedPath` it would consist of.
     """
-    # Get user configuration
-    config_dict = get_user_config(config_file=config_file, default_config=default_config)
+    if replay and ((no_input is not False) or (extra_context is not None)):
+        err_msg = (
+            "You can not use both replay and no_input or extra_context "
+            "at the same time."
+        )
+        raise InvalidModeException(err_msg)
 
-    # Determine the template directory
-    repo_dir, cleanup = determine_repo_dir(
+    config_dict = config if config is not None else get_user_config(
+        config_file=config_file,
+        default_config=default_config,
+    )
+    base_repo_dir, cleanup_base_repo_dir = determine_repo_dir(
         template=template,
-        checkout=checkout,
+        abbreviations=config_dict['abbreviations'],
         clone_to_dir=config_dict['cookiecutters_dir'],
+        checkout=checkout,
         no_input=no_input,
         password=password,
-        directory=directory
+        directory=directory,
+        use_cache=repo_cache,
     )
-
-    # Ensure cleanup function is called
     try:
-        with _patch_import_path_for_repo(repo_dir):
-            # Run pre-prompt hook
-            if accept_hooks:
-                run_pre_prompt_hook(repo_dir, config_dict)
+        repo_dir, cleanup = base_repo_dir, cleanup_base_repo_dir
+        # Run pre_prompt hook
+        repo_dir = (
+            str(run_pre_prompt_hook(base_repo_dir, hook_executor))
+            if accept_hooks and not plan
+            else repo_dir
+        )
+        # Always remove temporary dir if it was created
+        cleanup = repo_dir != base_repo_dir
+
+        import_patch = _patch_import_path_for_repo(repo_dir)
+        template_name = os.path.basename(os.path.abspath(repo_dir))
+        if replay:
+            with import_patch:
+                if isinstance(replay, bool):
+                    context_from_replayfile = load(
+                        config_dict['replay_dir'], template_name
+                    )
+                else:
+                    path, template_name = os.path.split(os.path.splitext(replay)[0])
+                    context_from_replayfile = load(path, template_name)
 
-            # Generate or load context
-            context_file = os.path.join(repo_dir, 'cookiecutter.json')
+        context_file = os.path.join(repo_dir, 'cookiecutter.json')
+        logger.debug('context_file is %s', context_file)
+
+        if replay:
+            context = generate_context(
+                context_file=context_file,
+                default_context=config_dict['default_context'],
+                extra_context=None,
+            )
+            logger.debug('replayfile context: %s', context_from_replayfile)
+            items_for_prompting = {
+                k: v
+                for k, v in context['cookiecutter'].items()
+                if k not in context_from_replayfile['cookiecutter'].keys()
+            }
+            context_for_prompting = {}
+            context_for_prompting['cookiecutter'] = items_for_prompting
+            context = context_from_replayfile
+            logger.debug('prompting context: %s', context_for_prompting)
+        else:
             context = generate_context(
                 context_file=context_file,
                 default_context=config_dict['default_context'],
                 extra_context=extra_context,
             )
+            context_for_prompting = context
+        # preserve the original cookiecutter options
+        context['_cookiecutter'] = {
+            k: v for k, v in context['cookiecutter'].items() if not k.startswith("_")
+        }
+
+        # prompt the user to manually configure at the command line.
+        # except when 'no-input' flag is set
 
-            # Prompt the user to manually configure the context
-            if not no_input:
-                nested_template = choose_nested_template(repo_dir, context)
-                if nested_template:
-                    repo_dir = os.path.join(repo_dir, nested_template)
-                    context_file = os.path.join(repo_dir, 'cookiecutter.json')
-                    context = generate_context(
-                        context_file=context_file,
-                        default_context=config_dict['default_context'],
-                        extra_context=extra_context,
+        with import_patch:
+            if {"template", "templates"} & set(context["cookiecutter"].keys()):
+                nested_template = choose_nested_template(context, repo_dir, no_input)
+                return cookiecutter(
+                    template=nested_template,
+                    checkout=checkout,
+                    no_input=no_input,
+                    extra_context=extra_context,
+                    replay=replay,
+                    overwrite_if_exists=overwrite_if_exists,
+                    output_dir=output_dir,
+                    config_file=config_file,
+                    default_config=default_config,
+                    config=config_dict,
+                    replay_store=replay_store,
+                    password=password,
+                    directory=directory,
+                    skip_if_file_exists=skip_if_file_exists,
+                    accept_hooks=accept_hooks,
+                    keep_project_on_failure=keep_project_on_failure,
+                    jobs=jobs,
+                    template_cache=template_cache,
+                    hook_executor=hook_executor,
+                    incremental=incremental,
+                    plan=plan,
+                    plan_contents=plan_contents,
+                    sink=sink,
+                )
+            if context_for_prompting['cookiecutter']:
+                with span('prompt_for_config'):
+                    context['cookiecutter'].update(
+                        prompt_for_config(
+                            context_for_prompting, no_input, template_dir=repo_dir
+                        )
                     )
-                context = prompt_for_config(context, no_input)
 
-            # Load context from replay file
-            if replay:
-                context = load(config_dict['replay_dir'], template)
+        logger.debug('context is %s', context)
 
-            # Create project from local context
-            project_dir = generate_files(
-                repo_dir=repo_dir,
-                context=context,
+        # include template dir or url in the context dict
+        context['cookiecutter']['_template'] = template
+
+        # include output+dir in the context dict
+        context['cookiecutter']['_output_dir'] = os.path.abspath(output_dir)
+
+        # include repo dir or url in the context dict
+        context['cookiecutter']['_repo_dir'] = f"{repo_dir}"
+
+        # include checkout details in the context dict
+        context['cookiecutter']['_checkout'] = checkout
+
+        if plan:
+            with import_patch:
+                result = plan_files(
+                    repo_dir=repo_dir,
+                    context=context,
+                    output_dir=output_dir,
+                    overwrite_if_exists=overwrite_if_exists,
+                    skip_if_file_exists=skip_if_file_exists,
+                    render_contents=plan_contents,
+                )
+        else:
+            with span('dump_replay'):
+                dump(config_dict['replay_dir'], template_name, context)
+
+            if template_cache:
+                cache_dir = os.path.join(
+                    config_dict['cookiecutters_dir'], TEMPLATE_CACHE_DIR
+                )
+            else:
+                cache_dir = None
+
+            # Create project from local context and project template.
+            with import_patch:
+                result = generate_files(
+                    repo_dir=repo_dir,
+                    context=context,
+                    overwrite_if_exists=overwrite_if_exists,
+                    skip_if_file_exists=skip_if_file_exists,
+                    output_dir=output_dir,
+                    accept_hooks=accept_hooks,
+                    keep_project_on_failure=keep_project_on_failure,
+                    jobs=jobs,
+                    cache_dir=cache_dir,
+                    hook_executor=hook_executor,
+                    incremental=incremental,
+                    sink=sink,
+                )
+
+            replay_store = _replay_store(replay_store, config_dict)
+            if replay_store is not None:
+                with span('record_replay'):
+                    replay_store.record(
+                        template,
+                        context,
+                        output_dir,
+                        project_dir=result,
+                        ref=checkout,
+                        directory=directory,
+                    )
+
+        # Cleanup (if required)
+        if cleanup:
+            rmtree(repo_dir)
+        if cleanup_base_repo_dir:
+            rmtree(base_repo_dir)
+        return result
+    finally:
+        if repo_cache:
+            release_clone_lock(base_repo_dir)
+
+
+def bundle_template(template, bundle_file, checkout=None, no_input=False,
+    config_file=None, default_config=False, password=None, directory=None,
+    config=None):
+    """
+    Pack a template into a precompiled bundle.
+
+    The template is located like `cookiecutter()` does, cloned or unzipped if
+    needed, and written to ``bundle_file``, which `cookiecutter()` accepts as
+    a template in turn. See `cookiecutter.bundle.create_bundle`.
+
+    :param template: A directory containing a project template directory,
+        or a URL to a git repository.
+    :param bundle_file: Path of the bundle to write.
+    :param checkout: The branch, tag or commit ID to checkout after clone.
+    :param no_input: Do not prompt for user input.
+    :param config_file: User configuration file path.
+    :param default_config: Use default values rather than a config file.
+    :param password: The password to use when extracting the repository.
+    :param directory: Relative path to a cookiecutter template in a repository.
+    :param config: A user config to use instead of loading one, see
+        `cookiecutter()`.
+    :return: The number of compiled templates in the bundle.
+    """
+    config_dict = config if config is not None else get_user_config(
+        config_file=config_file,
+        default_config=default_config,
+    )
+    repo_dir, cleanup = determine_repo_dir(
+        template=template,
+        abbreviations=config_dict['abbreviations'],
+        clone_to_dir=config_dict['cookiecutters_dir'],
+        checkout=checkout,
+        no_input=no_input,
+        password=password,
+        directory=directory,
+    )
+    try:
+        with _patch_import_path_for_repo(repo_dir):
+            return create_bundle(repo_dir, bundle_file)
+    finally:
+        if cleanup:
+            rmtree(repo_dir)
+
+
+class BakeResult(NamedTuple):
+    """Outcome of baking one project with `cookiecutter_batch()`."""
+
+    #: Directory the project was generated into.
+    output_dir: str
+    #: Path of the generated project, or `None` when baking failed.
+    project_dir: Optional[str]
+    #: The exception that made baking fail, or `None` on success.
+    error: Optional[Any]
+
+
+@timed
+def cookiecutter_batch(template, contexts, output_dirs=None, checkout=None,
+    config_file=None, default_config=False, password=None, directory=None,
+    overwrite_if_exists=False, skip_if_file_exists=False, accept_hooks=True,
+    keep_project_on_failure=False, jobs=1, template_cache=True, repo_cache=False,
+    hook_executor=None, incremental=False, processes=1, config=None,
+    replay_store=None):
+    """
+    Bake one project per context from a single template.
+
+    The configuration is loaded, the template is located (cloned or
+    unzipped if needed), its pre-prompt hook is run and ``cookiecutter.json``
+    is read only once. Each project is then generated without prompting, as
+    ``cookiecutter(template, no_input=True, extra_context=...)`` would, except
+    that no replay file is written.
+
+    A failing project does not stop the others: its error is reported in the
+    matching `BakeResult`. Errors while preparing the template are raised.
+
+    :param template: A directory containing a project template directory,
+        or a URL to a git repository.
+    :param contexts: Iterable of dictionaries overriding the template's
+        defaults, one per project to bake.
+    :param output_dirs: Iterable of directories to generate each project
+        into, matching ``contexts``. Defaults to the current directory.
+    :param checkout: The branch, tag or commit ID to checkout after clone.
+    :param config_file: User configuration file path.
+    :param default_config: Use default values rather than a config file.
+    :param password: The password to use when extracting the repository.
+    :param directory: Relative path to a cookiecutter template in a repository.
+    :param overwrite_if_exists: Overwrite the contents of the output directory
+        if it exists.
+    :param skip_if_file_exists: Skip the files in the corresponding directories
+        if they already exist.
+    :param accept_hooks: Accept pre and post hooks if set to `True`.
+    :param keep_project_on_failure: If `True` keep generated project directory even when
+        generation fails
+    :param jobs: Number of threads used to render and write each project's
+        files.
+    :param template_cache: Keep compiled templates in a persistent cache below
+        the ``cookiecutters_dir`` so that later runs skip compilation.
+    :param repo_cache: Update the clone of a repository template kept in the
+        ``cookiecutters_dir`` instead of cloning it again, and reuse
+        downloaded and unpacked zip archives.
+    :param hook_executor: Hook executor running Python hooks instead of a new
+        interpreter per hook, see `cookiecutter()`. With several ``processes``,
+        each of them gets its own copy of the executor.
+    :param incremental: Only regenerate what changed in projects baked before,
+        see `cookiecutter()`.
+    :param processes: Number of worker processes baking projects concurrently.
+    :param config: A user config to use instead of loading one, see
+        `cookiecutter()`.
+    :param replay_store: A `cookiecutter.replay.ReplayStore` to record the
+        context of each project baked into, see `cookiecutter()`.
+    :return: A list of `BakeResult`, in the order of ``contexts``.
+    """
+    contexts = list(contexts)
+    if output_dirs is None:
+        output_dirs = ['.'] * len(contexts)
+    else:
+        output_dirs = [str(output_dir) for output_dir in output_dirs]
+        if len(output_dirs) != len(contexts):
+            raise ValueError('contexts and output_dirs must have the same length')
+
+    config_dict = config if config is not None else get_user_config(
+        config_file=config_file,
+        default_config=default_config,
+    )
+    base_repo_dir, cleanup_base_repo_dir = determine_repo_dir(
+        template=template,
+        abbreviations=config_dict['abbreviations'],
+        clone_to_dir=config_dict['cookiecutters_dir'],
+        checkout=checkout,
+        no_input=True,
+        password=password,
+        directory=directory,
+        use_cache=repo_cache,
+    )
+    repo_dir, cleanup = base_repo_dir, False
+
+    try:
+        if accept_hooks:
+            repo_dir = str(run_pre_prompt_hook(base_repo_dir, hook_executor))
+            cleanup = repo_dir != base_repo_dir
+        context_file = os.path.join(repo_dir, 'cookiecutter.json')
+        base_context = generate_context(
+            context_file=context_file,
+            default_context=config_dict['default_context'],
+        )
+        if {"template", "templates"} & set(base_context["cookiecutter"].keys()):
+            with _patch_import_path_for_repo(repo_dir):
+                nested_template = choose_nested_template(base_context, repo_dir, True)
+            return cookiecutter_batch(
+                nested_template,
+                contexts,
+                output_dirs,
+                checkout=checkout,
+                config_file=config_file,
+                default_config=default_config,
+                config=config_dict,
+                replay_store=replay_store,
+                password=password,
+                directory=directory,
                 overwrite_if_exists=overwrite_if_exists,
                 skip_if_file_exists=skip_if_file_exists,
-                output_dir=output_dir,
                 accept_hooks=accept_hooks,
+                keep_project_on_failure=keep_project_on_failure,
+                jobs=jobs,
+                template_cache=template_cache,
+                hook_executor=hook_executor,
+                incremental=incremental,
+                processes=processes,
             )
 
-    except Exception:
-        # Cleanup on failure
-        if cleanup and not keep_project_on_failure:
-            if os.path.exists(project_dir):
-                rmtree(project_dir)
-        raise
-    else:
-        # Successful project creation
-        dump(config_dict['replay_dir'], template, context)
+        if template_cache:
+            cache_dir = os.path.join(
+                config_dict['cookiecutters_dir'], TEMPLATE_CACHE_DIR
+            )
+        else:
+            cache_dir = None
+        options = {
+            'overwrite_if_exists': overwrite_if_exists,
+            'skip_if_file_exists': skip_if_file_exists,
+            'accept_hooks': accept_hooks,
+            'keep_project_on_failure': keep_project_on_failure,
+            'jobs': jobs,
+            'cache_dir': cache_dir,
+            'incremental': incremental,
+        }
+        base_context['cookiecutter']['_template'] = template
+        base_context['cookiecutter']['_repo_dir'] = f"{repo_dir}"
+        base_context['cookiecutter']['_checkout'] = checkout
+        replay_store = _replay_store(replay_store, config_dict)
+        if replay_store is not None:
+            record = functools.partial(
+                replay_store.record, template, ref=checkout, directory=directory
+            )
+        else:
+            record = None
+        args = [
+            (repo_dir, base_context, extra_context, output_dir, options, record)
+            for extra_context, output_dir in zip(contexts, output_dirs)
+        ]
 
+        if processes > 1 and len(args) > 1:
+            # Imported here, as it imports multiprocessing.
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=_init_bake_worker,
+                # Pickled here so that forked workers do not share the
+                # executor of this process, such as the pipes of a pool.
+                initargs=(pickle.dumps(hook_executor),),
+            ) as executor:
+                results = list(executor.map(_bake_in_worker, args))
+        else:
+            results = [_bake(*item, hook_executor=hook_executor) for item in args]
     finally:
         if cleanup:
-            cleanup()
+            rmtree(repo_dir)
+        if cleanup_base_repo_dir:
+            rmtree(base_repo_dir)
+        if repo_cache:
+            release_clone_lock(base_repo_dir)
+    return results
+
+
+def replay_batch(records, **kwargs):
+    """
+    Bake projects again from the contexts recorded in a replay store.
+
+    Records are grouped by template, ref and directory, and each group is
+    baked by `cookiecutter_batch()` into the output directories of its
+    records. The public variables of each recorded context are applied to
+    the current defaults of the template, see
+    `cookiecutter.replay.ReplayRecord.extra_context`.
+
+    :param records: Iterable of `cookiecutter.replay.ReplayRecord`, such as
+        returned by `cookiecutter.replay.ReplayStore.find` with
+        ``latest=True``.
+    :param kwargs: Other arguments of `cookiecutter_batch()`, such as
+        ``overwrite_if_exists`` to bake into existing projects.
+    :return: A list of `BakeResult`, in the order of ``records``.
+    """
+    records = list(records)
+    groups = {}
+    for index, record in enumerate(records):
+        key = (record.template, record.ref, record.directory)
+        groups.setdefault(key, []).append(index)
+
+    results = [None] * len(records)
+    for (template, ref, directory), indexes in groups.items():
+        batch = cookiecutter_batch(
+            template,
+            [records[index].extra_context() for index in indexes],
+            [records[index].output_dir for index in indexes],
+            checkout=ref,
+            directory=directory,
+            **kwargs,
+        )
+        for index, result in zip(indexes, batch):
+            results[index] = result
+    return results
+
+
+def _replay_store(replay_store, config_dict):
+    """Return the replay store to record bakes into, if any."""
+    if replay_store is None and config_dict.get('replay_store'):
+        return ReplayStore(config_dict['replay_store'])
+    return replay_store
+
+
+def _bake(repo_dir, base_context, extra_context, output_dir, options,
+    record=None, hook_executor=None):
+    """Bake a single project of `cookiecutter_batch()`.
+
+    ``record``, if any, is called with the context, output directory and
+    project directory of the project once it is generated.
+    """
+    try:
+        context = deepcopy(base_context)
+        if extra_context:
+            apply_overwrites_to_context(context['cookiecutter'], extra_context)
+        context['_cookiecutter'] = {
+            k: v for k, v in context['cookiecutter'].items() if not k.startswith("_")
+        }
+        with _patch_import_path_for_repo(repo_dir):
+            context['cookiecutter'].update(prompt_for_config(context, True))
+            context['cookiecutter']['_output_dir'] = os.path.abspath(output_dir)
+            project_dir = generate_files(
+                repo_dir=repo_dir,
+                context=context,
+                output_dir=output_dir,
+                hook_executor=hook_executor,
+                **options,
+            )
+        if record is not None:
+            record(context, output_dir, project_dir=project_dir)
+    except Exception as error:
+        logger.debug('Baking into %s failed', output_dir, exc_info=True)
+        return BakeResult(output_dir, None, error)
+    return BakeResult(output_dir, project_dir, None)
+
+
+_worker_hook_executor = None
+
+
+def _init_bake_worker(hook_executor):
+    """Keep the pickled hook executor of `cookiecutter_batch()` in a worker process."""
+    global _worker_hook_executor
+    _worker_hook_executor = pickle.loads(hook_executor)
+
 
-    return project_dir
+def _bake_in_worker(args):
+    """Run `_bake()` in a worker process, keeping its error picklable."""
+    result = _bake(*args, hook_executor=_worker_hook_executor)
+    if result.error is not None:
+        try:
+            pickle.loads(pickle.dumps(result.error))
+        except Exception:
+            result = result._replace(error=CookiecutterException(str(result.error)))
+    return result
 
 
 class _patch_import_path_for_repo:
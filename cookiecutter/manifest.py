@@ -0,0 +1,218 @@
+"""Remembering what was generated, so that unchanged files are left alone."""
+import filecmp
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+
+logger = logging.getLogger(__name__)
+
+#: Bumped whenever the layout of the manifest changes.
+MANIFEST_VERSION = 2
+
+#: Context keys describing where a project is generated from and into, left
+#: out of `context_digest()` as they differ between runs of the same project.
+VOLATILE_KEYS = ('_repo_dir', '_output_dir', '_checkout')
+
+
+def manifest_file(cache_dir, project_dir):
+    """Return where the manifest of ``project_dir`` is persisted.
+
+    :param cache_dir: Directory holding cookiecutter's persistent caches.
+    :param project_dir: The generated project the manifest describes.
+    """
+    key = hashlib.sha1(os.path.abspath(project_dir).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, f'manifest-{key}.json')
+
+
+def context_digest(context, template_dir):
+    """Hash everything besides a file itself that its output depends on.
+
+    That is the context, and the shared templates a file may include or
+    extend, found next to ``template_dir``. The `VOLATILE_KEYS` of the
+    context are left out. Files using them, or other templates of the
+    template directory, are generated again on every run instead, see the
+    ``rerender`` argument of `GenerationManifest.write()`.
+
+    :param context: Dict for populating the template's variables.
+    :param template_dir: The template directory being generated from.
+    """
+    stable_context = {
+        key: {k: v for k, v in value.items() if k not in VOLATILE_KEYS}
+        if isinstance(value, dict)
+        else value
+        for key, value in context.items()
+    }
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(stable_context, sort_keys=True, default=str).encode('utf-8')
+    )
+    templates_dir = os.path.join(os.path.dirname(template_dir), 'templates')
+    for root, dirs, files in os.walk(templates_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, templates_dir).encode('utf-8'))
+            with open(path, 'rb') as fh:
+                digest.update(hashlib.sha256(fh.read()).digest())
+    return digest.hexdigest()
+
+
+def _signature(stat):
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _sha256(path):
+    with open(path, 'rb') as fh:
+        return hashlib.sha256(fh.read()).hexdigest()
+
+
+class GenerationManifest:
+    """Record the input, context and output of each generated file.
+
+    A file whose input, context and output are all as recorded by the
+    previous run into the same project is up to date, and need not be
+    generated again, see `is_current()`. Files that are generated are only
+    written when the bytes on disk differ, see `write()` and `copy()`, so that
+    unchanged outputs keep their modification time.
+
+    Inputs and outputs are compared by size and modification time first, and
+    inputs by SHA-256 when their modification time changed. The entries are
+    persisted in ``manifest_file`` by `save()`, and discarded when the
+    ``context`` digest they were recorded with differs.
+    """
+
+    def __init__(self, project_dir, context, manifest_file=None):
+        """Load the entries persisted in ``manifest_file``, if any.
+
+        :param project_dir: The generated project the manifest describes.
+        :param context: Digest of the context, see `context_digest()`.
+        :param manifest_file: Where to persist the entries. They are kept for
+            this run only when `None`.
+        """
+        self.project_dir = project_dir
+        self.context = context
+        self.manifest_file = manifest_file
+        self._previous = {}
+        self._files = {}
+        self._lock = threading.Lock()
+        if manifest_file is None:
+            return
+        try:
+            with open(manifest_file, encoding='utf-8') as fh:
+                data = json.load(fh)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logger.debug('Ignoring unreadable manifest %s', manifest_file)
+            return
+        if data.get('version') == MANIFEST_VERSION and data.get('context') == context:
+            self._previous = data.get('files', {})
+
+    def is_current(self, infile, outfile):
+        """Check whether ``outfile`` is up to date with ``infile``.
+
+        A current file is recorded again as is, so it stays in the manifest.
+
+        :param infile: Input file, relative to the template directory.
+        :param outfile: The output file it was last generated into.
+        """
+        entry = self._previous.get(infile)
+        if entry is None or entry['rerender']:
+            return False
+        if entry['output'] != self._relative(outfile):
+            return False
+        try:
+            input_stat = os.stat(infile)
+            output_stat = os.stat(outfile)
+        except OSError:
+            return False
+        if _signature(output_stat) != entry['output_stat']:
+            return False
+        if _signature(input_stat) != entry['input_stat']:
+            input_sha256 = entry['input_sha256']
+            if input_sha256 is None or _sha256(infile) != input_sha256:
+                return False
+            entry = dict(entry, input_stat=_signature(input_stat))
+        with self._lock:
+            self._files[infile] = entry
+        return True
+
+    def write(self, infile, outfile, data, input_data=None, rerender=False):
+        """Write ``data`` to ``outfile``, unless it holds exactly that already.
+
+        :param infile: Input file ``data`` was generated from.
+        :param outfile: Output file to write.
+        :param data: The generated `bytes`.
+        :param input_data: Contents of ``infile``, when already read.
+        :param rerender: Whether ``data`` depends on more than ``infile`` and
+            the context digest, such as on the templates ``infile`` includes.
+            The file is then never up to date, see `is_current()`.
+        :return: `True` if ``outfile`` was written.
+        """
+        written = True
+        try:
+            if os.path.getsize(outfile) == len(data):
+                with open(outfile, 'rb') as fh:
+                    written = fh.read() != data
+        except OSError:
+            pass
+        if written:
+            with open(outfile, 'wb') as fh:
+                fh.write(data)
+        input_sha256 = None
+        if input_data is not None:
+            input_sha256 = hashlib.sha256(input_data).hexdigest()
+        self._record(infile, outfile, input_sha256, rerender)
+        return written
+
+    def copy(self, infile, outfile):
+        """Copy ``infile`` to ``outfile``, unless their contents are the same.
+
+        :return: `True` if ``outfile`` was written.
+        """
+        written = not (
+            os.path.isfile(outfile) and filecmp.cmp(infile, outfile, shallow=False)
+        )
+        if written:
+            shutil.copyfile(infile, outfile)
+        self._record(infile, outfile, None, False)
+        return written
+
+    def _relative(self, outfile):
+        return os.path.relpath(outfile, self.project_dir)
+
+    def _record(self, infile, outfile, input_sha256, rerender):
+        entry = {
+            'input_stat': _signature(os.stat(infile)),
+            'input_sha256': input_sha256,
+            'output': self._relative(outfile),
+            'output_stat': _signature(os.stat(outfile)),
+            'rerender': rerender,
+        }
+        with self._lock:
+            self._files[infile] = entry
+
+    def save(self):
+        """Persist the entries of this run to ``manifest_file``.
+
+        Files that were not generated by this run are dropped.
+        """
+        if self.manifest_file is None:
+            return
+        with self._lock:
+            data = {
+                'version': MANIFEST_VERSION,
+                'context': self.context,
+                'files': dict(self._files),
+            }
+        try:
+            os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+            tmp_file = f'{self.manifest_file}.{os.getpid()}.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh)
+            os.replace(tmp_file, self.manifest_file)
+        except OSError:
+            logger.debug('Unable to write manifest %s', self.manifest_file)
@@ -6,7 +6,6 @@ import sys
 from collections import OrderedDict
 from pathlib import Path
 from jinja2.exceptions import UndefinedError
-from rich.prompt import Confirm, InvalidResponse, Prompt, PromptBase
 from cookiecutter.exceptions import UndefinedVariableInTemplate
 from cookiecutter.utils import create_env_with_context, rmtree
 
@@ -17,27 +16,20 @@ def read_user_variable(var_name, default_value, prompts=None, prefix=''):
     :param str var_name: Variable of the context to query the user
     :param default_value: Value that will be returned if no input happens
     """
-    prompt_text = f"{prefix}{var_name}"
-    if prompts and var_name in prompts:
-        prompt_text = prompts[var_name]
-    
-    return Prompt.ask(prompt_text, default=default_value)
-
-
-class YesNoPrompt(Confirm):
-    """A prompt that returns a boolean for yes/no questions."""
-    yes_choices = ['1', 'true', 't', 'yes', 'y', 'on']
-    no_choices = ['0', 'false', 'f', 'no', 'n', 'off']
-
-    def process_response(self, value: str) ->bool:
-        """Convert choices to a bool."""
-        value = value.lower()
-        if value in self.yes_choices:
-            return True
-        elif value in self.no_choices:
-            return False
-        else:
-            raise InvalidResponse(self.validate_error_message)
+    question = (
+        prompts[var_name]
+        if prompts and var_name in prompts.keys() and prompts[var_name]
+        else var_name
+    )
+
+    from rich.prompt import Prompt
+
+    while True:
+        variable = Prompt.ask(f"{prefix}{question}", default=default_value)
+        if variable is not None:
+            break
+
+    return variable
 
 
 def read_user_yes_no(var_name, default_value, prompts=None, prefix=''):
@@ -54,11 +46,14 @@ def read_user_yes_no(var_name, default_value, prompts=None, prefix=''):
     :param str question: Question to the user
     :param default_value: Value that will be returned if no input happens
     """
-    prompt_text = f"{prefix}{var_name}"
-    if prompts and var_name in prompts:
-        prompt_text = prompts[var_name]
-    
-    return YesNoPrompt.ask(prompt_text, default=default_value)
+    question = (
+        prompts[var_name]
+        if prompts and var_name in prompts.keys() and prompts[var_name]
+        else var_name
+    )
+    from cookiecutter._prompts import YesNoPrompt
+
+    return YesNoPrompt.ask(f"{prefix}{question}", default=default_value)
 
 
 def read_repo_password(question):
@@ -66,6 +61,8 @@ def read_repo_password(question):
 
     :param str question: Question to the user
     """
+    from rich.prompt import Prompt
+
     return Prompt.ask(question, password=True)
 
 
@@ -78,17 +75,50 @@ def read_user_choice(var_name, options, prompts=None, prefix=''):
     :param list options: Sequence of options that are available to select from
     :return: Exactly one item of ``options`` that has been chosen by the user
     """
-    prompt_text = f"{prefix}{var_name}"
-    if prompts and var_name in prompts:
-        prompt_text = prompts[var_name]
-    
-    choices = [str(i) for i in range(len(options))]
-    choice_text = "\n".join(f"{i}: {option}" for i, option in enumerate(options))
-    
-    while True:
-        print(f"{prompt_text}\n{choice_text}")
-        choice = Prompt.ask("Enter the number of your choice", choices=choices, default="0")
-        return options[int(choice)]
+    if not isinstance(options, list):
+        raise TypeError
+
+    if not options:
+        raise ValueError
+
+    choice_map = OrderedDict((f'{i}', value) for i, value in enumerate(options, 1))
+    choices = choice_map.keys()
+    default = '1'
+
+    question = f"Select {var_name}"
+
+    choice_lines = [
+        '    [bold magenta]{}[/] - [bold]{}[/]'.format(*c) for c in choice_map.items()
+    ]
+
+    # Handle if human-readable prompt is provided
+    if prompts and var_name in prompts.keys():
+        if isinstance(prompts[var_name], str):
+            question = prompts[var_name]
+        else:
+            if "__prompt__" in prompts[var_name]:
+                question = prompts[var_name]["__prompt__"]
+            choice_lines = [
+                (
+                    f"    [bold magenta]{i}[/] - [bold]{prompts[var_name][p]}[/]"
+                    if p in prompts[var_name]
+                    else f"    [bold magenta]{i}[/] - [bold]{p}[/]"
+                )
+                for i, p in choice_map.items()
+            ]
+
+    prompt = '\n'.join(
+        (
+            f"{prefix}{question}",
+            "\n".join(choice_lines),
+            "    Choose from",
+        )
+    )
+
+    from rich.prompt import Prompt
+
+    user_choice = Prompt.ask(prompt, choices=list(choices), default=default)
+    return choice_map[user_choice]
 
 
 DEFAULT_DISPLAY = 'default'
@@ -99,25 +129,19 @@ def process_json(user_value, default_value=None):
 
     :param str user_value: User-supplied value to load as a JSON dict
     """
-    try:
-        return json.loads(user_value)
-    except json.JSONDecodeError:
-        return default_value
+    from rich.prompt import InvalidResponse
 
+    try:
+        user_dict = json.loads(user_value, object_pairs_hook=OrderedDict)
+    except Exception as error:
+        # Leave it up to click to ask the user again
+        raise InvalidResponse('Unable to decode to JSON.') from error
 
-class JsonPrompt(PromptBase[dict]):
-    """A prompt that returns a dict from JSON string."""
-    default = None
-    response_type = dict
-    validate_error_message = (
-        '[prompt.invalid]  Please enter a valid JSON string')
+    if not isinstance(user_dict, dict):
+        # Leave it up to click to ask the user again
+        raise InvalidResponse('Requires JSON dict.')
 
-    def process_response(self, value: str) ->dict:
-        """Convert choices to a dict."""
-        try:
-            return json.loads(value)
-        except json.JSONDecodeError:
-            raise InvalidResponse(self.validate_error_message)
+    return user_dict
 
 
 def read_user_dict(var_name, default_value, prompts=None, prefix=''):
@@ -127,12 +151,22 @@ def read_user_dict(var_name, default_value, prompts=None, prefix=''):
     :param default_value: Value that will be returned if no input is provided
     :return: A Python dictionary to use in the context.
     """
-    prompt_text = f"{prefix}{var_name}"
-    if prompts and var_name in prompts:
-        prompt_text = prompts[var_name]
-    
-    default_json = json.dumps(default_value) if default_value else None
-    return JsonPrompt.ask(prompt_text, default=default_json)
+    if not isinstance(default_value, dict):
+        raise TypeError
+
+    question = (
+        prompts[var_name]
+        if prompts and var_name in prompts.keys() and prompts[var_name]
+        else var_name
+    )
+    from cookiecutter._prompts import JsonPrompt
+
+    user_value = JsonPrompt.ask(
+        f"{prefix}{question} [cyan bold]({DEFAULT_DISPLAY})[/]",
+        default=default_value,
+        show_default=False,
+    )
+    return user_value
 
 
 def render_variable(env, raw, cookiecutter_dict):
@@ -152,24 +186,33 @@ def render_variable(env, raw, cookiecutter_dict):
         being populated with variables.
     :return: The rendered value for the default variable.
     """
-    if not isinstance(raw, str):
+    if raw is None or isinstance(raw, bool):
         return raw
+    elif isinstance(raw, dict):
+        return {
+            render_variable(env, k, cookiecutter_dict): render_variable(
+                env, v, cookiecutter_dict
+            )
+            for k, v in raw.items()
+        }
+    elif isinstance(raw, list):
+        return [render_variable(env, v, cookiecutter_dict) for v in raw]
+    elif not isinstance(raw, str):
+        raw = str(raw)
 
     template = env.from_string(raw)
-    try:
-        return template.render(**cookiecutter_dict)
-    except UndefinedError as err:
-        raise UndefinedVariableInTemplate(str(err), err, cookiecutter_dict)
+
+    return template.render(cookiecutter=cookiecutter_dict)
 
 
 def _prompts_from_options(options: dict) ->dict:
     """Process template options and return friendly prompt information."""
-    prompts = {}
-    for key, value in options.items():
-        if isinstance(value, dict):
-            prompts[key] = value.get('_prompt', key)
-        else:
-            prompts[key] = key
+    prompts = {"__prompt__": "Select a template"}
+    for option_key, option_value in options.items():
+        title = str(option_value.get("title", option_key))
+        description = option_value.get("description", option_key)
+        label = title if title == description else f"{title} ({description})"
+        prompts.update({option_key: label})
     return prompts
 
 
@@ -178,12 +221,9 @@ def prompt_choice_for_template(key, options, no_input):
 
     :param no_input: Do not prompt for user input and return the first available option.
     """
-    if no_input:
-        return next(iter(options.values()))
-
-    prompts = _prompts_from_options(options)
-    choices = list(options.keys())
-    return read_user_choice(key, choices, prompts=prompts)
+    opts = list(options.keys())
+    prompts = {"templates": _prompts_from_options(options)}
+    return opts[0] if no_input else read_user_choice(key, opts, prompts, "")
 
 
 def prompt_choice_for_config(cookiecutter_dict, env, key, options, no_input,
@@ -192,40 +232,90 @@ def prompt_choice_for_config(cookiecutter_dict, env, key, options, no_input,
 
     :param no_input: Do not prompt for user input and return the first available option.
     """
+    rendered_options = [render_variable(env, raw, cookiecutter_dict) for raw in options]
     if no_input:
-        return next(iter(options.values()))
-
-    rendered_options = OrderedDict()
-    for option_key, option_value in options.items():
-        rendered_options[option_key] = render_variable(env, option_value, cookiecutter_dict)
-
-    choice = read_user_choice(key, list(rendered_options.keys()), prompts=prompts, prefix=prefix)
-    return rendered_options[choice]
+        return rendered_options[0]
+    return read_user_choice(key, rendered_options, prompts, prefix)
 
 
-def prompt_for_config(context, no_input=False):
+def prompt_for_config(context, no_input=False, template_dir=None):
     """Prompt user to enter a new config.
 
     :param dict context: Source for field names and sample values.
     :param no_input: Do not prompt for user input and use only values from context.
+    :param template_dir: Directory of the template, see
+        `cookiecutter.utils.create_env_with_context()`.
     """
     cookiecutter_dict = OrderedDict([])
-    env = create_env_with_context(context)
+    env = create_env_with_context(context, template_dir)
+    prompts = context['cookiecutter'].pop('__prompts__', {})
+
+    # First pass: Handle simple and raw variables, plus choices.
+    # These must be done first because the dictionaries keys and
+    # values might refer to them.
+    count = 0
+    all_prompts = context['cookiecutter'].items()
+    visible_prompts = [k for k, _ in all_prompts if not k.startswith("_")]
+    size = len(visible_prompts)
+    for key, raw in all_prompts:
+        if key.startswith('_') and not key.startswith('__'):
+            cookiecutter_dict[key] = raw
+            continue
+        elif key.startswith('__'):
+            cookiecutter_dict[key] = render_variable(env, raw, cookiecutter_dict)
+            continue
+
+        if not isinstance(raw, dict):
+            count += 1
+            prefix = f"  [dim][{count}/{size}][/] "
 
+        try:
+            if isinstance(raw, list):
+                # We are dealing with a choice variable
+                val = prompt_choice_for_config(
+                    cookiecutter_dict, env, key, raw, no_input, prompts, prefix
+                )
+                cookiecutter_dict[key] = val
+            elif isinstance(raw, bool):
+                # We are dealing with a boolean variable
+                if no_input:
+                    cookiecutter_dict[key] = render_variable(
+                        env, raw, cookiecutter_dict
+                    )
+                else:
+                    cookiecutter_dict[key] = read_user_yes_no(key, raw, prompts, prefix)
+            elif not isinstance(raw, dict):
+                # We are dealing with a regular variable
+                val = render_variable(env, raw, cookiecutter_dict)
+
+                if not no_input:
+                    val = read_user_variable(key, val, prompts, prefix)
+
+                cookiecutter_dict[key] = val
+        except UndefinedError as err:
+            msg = f"Unable to render variable '{key}'"
+            raise UndefinedVariableInTemplate(msg, err, context) from err
+
+    # Second pass; handle the dictionaries.
     for key, raw in context['cookiecutter'].items():
-        if key.startswith('_'):
-            cookiecutter_dict[key] = raw
+        # Skip private type dicts not to be rendered.
+        if key.startswith('_') and not key.startswith('__'):
             continue
 
-        if isinstance(raw, dict):
-            cookiecutter_dict[key] = prompt_choice_for_config(
-                cookiecutter_dict, env, key, raw, no_input
-            )
-        else:
-            if no_input:
-                cookiecutter_dict[key] = render_variable(env, raw, cookiecutter_dict)
-            else:
-                cookiecutter_dict[key] = read_user_variable(key, raw)
+        try:
+            if isinstance(raw, dict):
+                # We are dealing with a dict variable
+                count += 1
+                prefix = f"  [dim][{count}/{size}][/] "
+                val = render_variable(env, raw, cookiecutter_dict)
+
+                if not no_input and not key.startswith('__'):
+                    val = read_user_dict(key, val, prompts, prefix)
+
+                cookiecutter_dict[key] = val
+        except UndefinedError as err:
+            msg = f"Unable to render variable '{key}'"
+            raise UndefinedVariableInTemplate(msg, err, context) from err
 
     return cookiecutter_dict
 
@@ -239,17 +329,33 @@ def choose_nested_template(context: dict, repo_dir: str, no_input: bool=False
     :param no_input: Do not prompt for user input and use only values from context.
     :returns: Path to the selected template.
     """
-    template_dir = Path(repo_dir) / 'templates'
-    template_names = [d.name for d in template_dir.iterdir() if d.is_dir()]
-
-    if not template_names:
-        raise ValueError("No nested templates found in the repository.")
-
-    if no_input or len(template_names) == 1:
-        return str(template_dir / template_names[0])
-
-    choice = read_user_choice("Select a template", template_names)
-    return str(template_dir / choice)
+    cookiecutter_dict = OrderedDict([])
+    env = create_env_with_context(context, repo_dir)
+    prefix = ""
+    prompts = context['cookiecutter'].pop('__prompts__', {})
+    key = "templates"
+    config = context['cookiecutter'].get(key, {})
+    if config:
+        # Pass
+        val = prompt_choice_for_template(key, config, no_input)
+        template = config[val]["path"]
+    else:
+        # Old style
+        key = "template"
+        config = context['cookiecutter'].get(key, [])
+        val = prompt_choice_for_config(
+            cookiecutter_dict, env, key, config, no_input, prompts, prefix
+        )
+        template = re.search(r'\((.+)\)', val).group(1)
+
+    template = Path(template) if template else None
+    if not (template and not template.is_absolute()):
+        raise ValueError("Illegal template path")
+
+    repo_dir = Path(repo_dir).resolve()
+    template_path = (repo_dir / template).resolve()
+    # Return path as string
+    return f"{template_path}"
 
 
 def prompt_and_delete(path, no_input=False):
@@ -263,25 +369,28 @@ def prompt_and_delete(path, no_input=False):
     :param no_input: Suppress prompt to delete repo and just delete it.
     :return: True if the content was deleted
     """
+    # Suppress prompt if called via API
     if no_input:
-        rmtree(path)
-        return True
+        ok_to_delete = True
+    else:
+        question = (
+            f"You've downloaded {path} before. Is it okay to delete and re-download it?"
+        )
 
-    delete = read_user_yes_no(
-        f"You've downloaded {path} before. Is it okay to delete and re-download it?",
-        default_value=True
-    )
+        ok_to_delete = read_user_yes_no(question, 'yes')
 
-    if delete:
-        rmtree(path)
+    if ok_to_delete:
+        if os.path.isdir(path):
+            rmtree(path)
+        else:
+            os.remove(path)
         return True
+    else:
+        ok_to_reuse = read_user_yes_no(
+            "Do you want to re-use the existing version?", 'yes'
+        )
 
-    reuse = read_user_yes_no(
-        "Do you want to re-use the existing version?",
-        default_value=True
-    )
-
-    if reuse:
-        return False
+        if ok_to_reuse:
+            return False
 
-    sys.exit()
+        sys.exit()
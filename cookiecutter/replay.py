@@ -5,6 +5,9 @@ cookiecutter.replay.
 """
 import json
 import os
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
 from cookiecutter.utils import make_sure_path_exists
 
 
@@ -27,3 +30,212 @@ def load(replay_dir, template_name):
     file_path = get_file_name(replay_dir, template_name)
     with open(file_path, 'r') as f:
         return json.load(f)
+
+
+#: Bumped whenever the schema of the replay store changes.
+STORE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bakes (
+    id INTEGER PRIMARY KEY,
+    template TEXT NOT NULL,
+    ref TEXT,
+    directory TEXT,
+    output_dir TEXT NOT NULL,
+    project_dir TEXT,
+    created REAL NOT NULL,
+    context TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bakes_template ON bakes (template, ref, created);
+CREATE INDEX IF NOT EXISTS bakes_output_dir ON bakes (output_dir, created);
+CREATE INDEX IF NOT EXISTS bakes_project_dir ON bakes (project_dir, created);
+"""
+
+
+def _template_key(template):
+    """Return ``template``, as an absolute path when it is a local one."""
+    if os.path.exists(template):
+        return os.path.abspath(template)
+    return template
+
+
+class ReplayRecord(NamedTuple):
+    """The context of a bake, as kept by a `ReplayStore`."""
+
+    #: Identifier of the record in its store.
+    id: int
+    #: The template baked, as given to `cookiecutter.main.cookiecutter`.
+    template: str
+    #: The branch, tag or commit checked out, if any.
+    ref: Optional[str]
+    #: Directory of the template within its repository, if any.
+    directory: Optional[str]
+    #: Absolute path of the directory the project was generated into.
+    output_dir: str
+    #: Path of the generated project, if known.
+    project_dir: Optional[str]
+    #: When the project was baked, in seconds since the epoch.
+    created: float
+    #: The context the project was generated with.
+    context: dict
+
+    def extra_context(self):
+        """Return the variables to bake the project again with.
+
+        These are the public variables of the context, to be applied to the
+        current defaults of the template as an ``extra_context``.
+        """
+        return {
+            key: value
+            for key, value in self.context['cookiecutter'].items()
+            if not key.startswith('_')
+        }
+
+
+class ReplayStore:
+    """Keep the context of every bake in an SQLite database.
+
+    Unlike the replay files of `dump()`, which only hold the last context of
+    each template name, each bake is kept as a `ReplayRecord`, indexed by
+    template, ref, output directory, project and time. Records can be looked
+    up with `find()`, written as JSON Lines with `export()`, and baked again
+    with `cookiecutter.main.replay_batch`.
+
+    Each operation uses a connection of its own, so that a store can be
+    shared between threads, and processes can write to the same database.
+    """
+
+    def __init__(self, path):
+        """Create the database at ``path`` if it does not exist.
+
+        :param path: Path of the SQLite database.
+        """
+        self.path = os.fspath(path)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        make_sure_path_exists(directory)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+            connection.execute(f'PRAGMA user_version = {STORE_VERSION}')
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection, committing on success and closing it after."""
+        # Imported here, most bakes do not use a store.
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record(self, template, context, output_dir, project_dir=None, ref=None,
+        directory=None, created=None):
+        """Add the context of a bake to the store.
+
+        :param template: The template baked, as given to `cookiecutter()`.
+            Local paths are made absolute.
+        :param context: The context the project was generated with.
+        :param output_dir: Directory the project was generated into.
+        :param project_dir: Path of the generated project, if known.
+        :param ref: The branch, tag or commit checked out, if any.
+        :param directory: Directory of the template within its repository.
+        :param created: When the project was baked, now by default.
+        :return: The identifier of the new record.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'INSERT INTO bakes (template, ref, directory, output_dir, project_dir,'
+                ' created, context) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    _template_key(template),
+                    ref,
+                    directory,
+                    os.path.abspath(output_dir),
+                    None if project_dir is None else os.path.abspath(project_dir),
+                    time.time() if created is None else created,
+                    json.dumps(context),
+                ),
+            )
+            return cursor.lastrowid
+
+    def get(self, record_id):
+        """Return the record with identifier ``record_id``.
+
+        :raises KeyError: When there is no such record.
+        """
+        records = self._select('WHERE id = ?', (record_id,))
+        if not records:
+            raise KeyError(record_id)
+        return records[0]
+
+    def find(self, template=None, ref=None, output_dir=None, project_dir=None,
+        since=None, until=None, latest=False):
+        """Return the records matching all the given criteria, oldest first.
+
+        :param template: Only records of this template, local paths being
+            compared as absolute paths.
+        :param ref: Only records of this branch, tag or commit.
+        :param output_dir: Only records generated into this directory.
+        :param project_dir: Only records of this project.
+        :param since: Only records created at or after this time.
+        :param until: Only records created before this time.
+        :param latest: Only the latest matching record of each project, such
+            as to bake a fleet of projects again with their last context.
+        """
+        conditions = []
+        params = []
+        for column, value in (
+            ('template', template and _template_key(template)),
+            ('ref', ref),
+            ('output_dir', output_dir and os.path.abspath(output_dir)),
+            ('project_dir', project_dir and os.path.abspath(project_dir)),
+        ):
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            conditions.append('created >= ?')
+            params.append(since)
+        if until is not None:
+            conditions.append('created < ?')
+            params.append(until)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        if latest:
+            where = (
+                'WHERE id IN (SELECT MAX(id) FROM bakes'
+                f' {where} GROUP BY COALESCE(project_dir, output_dir))'
+            )
+        return self._select(where, params)
+
+    def export(self, fh, records=None):
+        """Write records to ``fh`` as JSON Lines.
+
+        Each line is an object with the fields of a `ReplayRecord`, and its
+        ``extra_context``. Lines of a single template can therefore be given
+        to the ``--batch`` option of the command line to bake them again.
+
+        :param fh: Text file object to write to.
+        :param records: Records to write, all of them by default.
+        :return: The number of records written.
+        """
+        if records is None:
+            records = self._select('', ())
+        count = 0
+        for record in records:
+            line = record._asdict()
+            line['extra_context'] = record.extra_context()
+            fh.write(json.dumps(line) + '\n')
+            count += 1
+        return count
+
+    def _select(self, where, params):
+        with self._connect() as connection:
+            rows = connection.execute(
+                'SELECT id, template, ref, directory, output_dir, project_dir, created,'
+                ' context'
+                f' FROM bakes {where} ORDER BY created, id',
+                params,
+            ).fetchall()
+        return [ReplayRecord(*row[:-1], json.loads(row[-1])) for row in rows]
@@ -1,9 +1,11 @@
 """Cookiecutter repository functions."""
 import os
 import re
+from cookiecutter.bundle import is_bundle, unpack_bundle
 from cookiecutter.exceptions import RepositoryNotFound
+from cookiecutter.timing import timed
 from cookiecutter.vcs import clone
-from cookiecutter.zipfile import unzip
+from cookiecutter.zipfile import is_cached_tree, unzip
 REPO_REGEX = re.compile(
     """
 # something like git:// ssh:// file:// etc.
@@ -33,6 +35,13 @@ def expand_abbreviations(template, abbreviations):
     """
     if template in abbreviations:
         return abbreviations[template]
+
+    # Split on colon. If there is no colon, rest will be empty
+    # and prefix will be the whole template
+    prefix, sep, rest = template.partition(':')
+    if prefix in abbreviations:
+        return abbreviations[prefix].format(rest)
+
     return template
 
 
@@ -48,14 +57,16 @@ def repository_has_cookiecutter_json(repo_directory):
     return repo_dir_exists and has_cookiecutter_json
 
 
+@timed
 def determine_repo_dir(template, abbreviations, clone_to_dir, checkout,
-    no_input, password=None, directory=None):
+    no_input, password=None, directory=None, use_cache=False):
     """
     Locate the repository directory from a template reference.
 
     Applies repository abbreviations to the template reference.
     If the template refers to a repository URL, clone it.
     If the template is a path to a local repository, use it.
+    If the template is a bundle, unpack it once into ``clone_to_dir``.
 
     :param template: A directory containing a project template directory,
         or a URL to a git repository.
@@ -67,6 +78,9 @@ def determine_repo_dir(template, abbreviations, clone_to_dir, checkout,
         cached resources.
     :param password: The password to use when extracting the repository.
     :param directory: Directory within repo where cookiecutter.json lives.
+    :param use_cache: Update a clone kept from a previous run instead of
+        cloning again, and reuse downloaded and unpacked zip archives. See
+        `cookiecutter.vcs.clone` and `cookiecutter.zipfile.unzip`.
     :return: A tuple containing the cookiecutter template directory, and
         a boolean describing whether that directory should be cleaned up
         after the template has been instantiated.
@@ -74,33 +88,45 @@ def determine_repo_dir(template, abbreviations, clone_to_dir, checkout,
     """
     template = expand_abbreviations(template, abbreviations)
 
-    if is_repo_url(template):
-        repo_dir = clone(
-            repo_url=template,
-            checkout=checkout,
-            clone_to_dir=clone_to_dir,
-            no_input=no_input
-        )
-        cleanup = True
+    if is_bundle(template) and not is_repo_url(template):
+        repository_candidates = [unpack_bundle(template, clone_to_dir)]
+        cleanup = False
     elif is_zip_file(template):
-        repo_dir = unzip(
+        unzipped_dir = unzip(
             zip_uri=template,
             is_url=is_repo_url(template),
             clone_to_dir=clone_to_dir,
             no_input=no_input,
-            password=password
+            password=password,
+            use_cache=use_cache,
+        )
+        repository_candidates = [unzipped_dir]
+        cleanup = not is_cached_tree(unzipped_dir, clone_to_dir)
+    elif is_repo_url(template):
+        cloned_repo = clone(
+            repo_url=template,
+            checkout=checkout,
+            clone_to_dir=clone_to_dir,
+            no_input=no_input,
+            use_cache=use_cache,
+            directory=directory,
         )
-        cleanup = True
+        repository_candidates = [cloned_repo]
+        cleanup = False
     else:
-        repo_dir = template
+        repository_candidates = [template, os.path.join(clone_to_dir, template)]
         cleanup = False
 
     if directory:
-        repo_dir = os.path.join(repo_dir, directory)
-
-    if not repository_has_cookiecutter_json(repo_dir):
-        raise RepositoryNotFound(
-            'The repository {} does not contain a cookiecutter.json file'.format(repo_dir)
-        )
-
-    return repo_dir, cleanup
+        repository_candidates = [
+            os.path.join(s, directory) for s in repository_candidates
+        ]
+
+    for repo_candidate in repository_candidates:
+        if repository_has_cookiecutter_json(repo_candidate):
+            return repo_candidate, cleanup
+
+    raise RepositoryNotFound(
+        'A valid repository for "{}" could not be found in the following '
+        'locations:\n{}'.format(template, '\n'.join(repository_candidates))
+    )
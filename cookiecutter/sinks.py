@@ -0,0 +1,326 @@
+"""Where `cookiecutter.generate.generate_files` writes the generated project.
+
+A sink receives the directories and files of the project as they are
+generated, under the same paths they would have on disk. `LocalSink` writes
+them to the file system and is the default. `MemorySink` keeps them in
+memory, and `ZipSink` and `TarSink` stream them into an archive without
+writing them to disk first.
+
+Hooks work on the project directory, so they are only run for sinks that are
+``on_disk``.
+"""
+import abc
+import io
+import os
+import shutil
+import stat
+import tarfile
+import threading
+import time
+import zipfile
+
+from cookiecutter.utils import make_sure_path_exists, rmtree
+
+
+class LocalSink:
+    """Write the project to the file system."""
+
+    #: Whether the project ends up on disk, where hooks can work on it.
+    on_disk = True
+
+    def exists(self, path):
+        """Check whether ``path`` was generated, or exists already."""
+        return os.path.exists(path)
+
+    def is_dir(self, path):
+        """Check whether ``path`` is a directory."""
+        return os.path.isdir(path)
+
+    def make_dir(self, path):
+        """Create the directory ``path`` and its parents."""
+        make_sure_path_exists(path)
+
+    def write_file(self, path, data, source):
+        """Write the `bytes` ``data`` to the file ``path``.
+
+        :param source: The template file ``data`` was generated from, whose
+            permission bits the output gets.
+        """
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        shutil.copymode(source, path)
+
+    def write_chunks(self, path, chunks, source):
+        """Write the `bytes` chunks of the iterable ``chunks`` to ``path``.
+
+        Each chunk is written as soon as it is produced, so that the whole
+        contents of the file are never held in memory.
+
+        :param source: The template file the chunks were generated from, whose
+            permission bits the output gets.
+        """
+        try:
+            with open(path, 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+        except BaseException:
+            # Producing the chunks failed, leave no truncated file behind.
+            os.unlink(path)
+            raise
+        shutil.copymode(source, path)
+
+    def copy_file(self, source, path):
+        """Copy the template file ``source`` to ``path`` as is."""
+        shutil.copyfile(source, path)
+        shutil.copymode(source, path)
+
+    def copy_tree(self, source, path, ignore=None):
+        """Copy the template directory ``source`` to ``path``, replacing it.
+
+        :param ignore: Callable telling the names of a directory not to copy,
+            see `shutil.copytree`.
+        """
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        shutil.copytree(source, path, ignore=ignore)
+
+    def remove_tree(self, path):
+        """Remove the directory ``path`` after generation failed."""
+        rmtree(path)
+
+
+class VirtualSink(abc.ABC):
+    """Base class of the sinks that keep the project off the file system.
+
+    Paths are stored relative to ``root``, with forward slashes, and must be
+    below it. Directories and files only exist once they were generated.
+    Sinks may be used by several threads at once, see
+    `cookiecutter.generate.generate_files`.
+    """
+
+    on_disk = False
+
+    def __init__(self, root='.'):
+        """Name the outputs relative to ``root``.
+
+        :param root: Directory that would hold the outputs on disk, usually
+            the ``output_dir`` they are generated into.
+        """
+        self.root = os.path.abspath(root)
+        self._dirs = set()
+        self._files = set()
+        self._lock = threading.Lock()
+
+    def name(self, path):
+        """Return the name ``path`` is stored under."""
+        name = os.path.relpath(os.path.abspath(path), self.root)
+        if name == os.pardir or name.startswith(os.pardir + os.sep):
+            raise ValueError(f'{path} is not below {self.root}')
+        return name.replace(os.sep, '/')
+
+    def exists(self, path):
+        """Check whether ``path`` was generated."""
+        name = self.name(path)
+        return name in self._dirs or name in self._files
+
+    def is_dir(self, path):
+        """Check whether ``path`` is a generated directory."""
+        return self.name(path) in self._dirs
+
+    def make_dir(self, path):
+        """Add the directory ``path`` and its parents."""
+        names = []
+        name = self.name(path)
+        while name not in ('.', '') and name not in self._dirs:
+            names.append(name)
+            name = os.path.dirname(name)
+        with self._lock:
+            for name in reversed(names):
+                if name not in self._dirs:
+                    self._dirs.add(name)
+                    self._add_dir(name)
+
+    def write_file(self, path, data, source):
+        """Add the file ``path`` holding the `bytes` ``data``.
+
+        :param source: The template file ``data`` was generated from, whose
+            permission bits the output gets.
+        """
+        name = self.name(path)
+        mode = stat.S_IMODE(os.stat(source).st_mode)
+        with self._lock:
+            self._files.add(name)
+            self._add_file(name, data, mode)
+
+    def write_chunks(self, path, chunks, source):
+        """Add the file ``path`` holding the `bytes` chunks of ``chunks``."""
+        self.write_file(path, b''.join(chunks), source)
+
+    def copy_file(self, source, path):
+        """Add the file ``path`` with the contents of the template ``source``."""
+        with open(source, 'rb') as fh:
+            data = fh.read()
+        self.write_file(path, data, source)
+
+    def copy_tree(self, source, path, ignore=None):
+        """Add the contents of the template directory ``source`` below ``path``.
+
+        :param ignore: Callable telling the names of a directory not to copy,
+            see `shutil.copytree`.
+        """
+        self.make_dir(path)
+        for root, dirs, files in os.walk(source):
+            skip = ignore(root, dirs + files) if ignore else set()
+            dirs[:] = sorted(name for name in dirs if name not in skip)
+            outdir = os.path.join(path, os.path.relpath(root, source))
+            for name in dirs:
+                self.make_dir(os.path.join(outdir, name))
+            for name in sorted(files):
+                if name not in skip:
+                    self.copy_file(os.path.join(root, name), os.path.join(outdir, name))
+
+    def remove_tree(self, path):
+        """Leave the outputs below ``path`` in place.
+
+        Nothing was written to disk, and the incomplete output is discarded
+        with the sink by the caller, who gets the exception.
+        """
+
+    def close(self):
+        """Finish the output."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abc.abstractmethod
+    def _add_dir(self, name):
+        """Add the directory stored under ``name`` to the output."""
+
+    @abc.abstractmethod
+    def _add_file(self, name, data, mode):
+        """Add the file stored under ``name``, holding the `bytes` ``data``.
+
+        :param mode: The permission bits of the file.
+        """
+
+
+class MemorySink(VirtualSink):
+    """Keep the project in memory.
+
+    The generated files are available in `files`, mapping their names to their
+    `bytes`, and the directories in `dirs`.
+    """
+
+    def __init__(self, root='.'):
+        super().__init__(root)
+        #: The contents of the generated files, by name.
+        self.files = {}
+        #: The permission bits of the generated files, by name.
+        self.modes = {}
+        #: The names of the generated directories, parents first.
+        self.dirs = []
+
+    def _add_dir(self, name):
+        self.dirs.append(name)
+
+    def _add_file(self, name, data, mode):
+        self.files[name] = data
+        self.modes[name] = mode
+
+
+class ZipSink(VirtualSink):
+    """Stream the project into a zip archive.
+
+    Each file is compressed into the archive as soon as it is generated. The
+    archive is complete once the sink is closed.
+    """
+
+    def __init__(self, file, root='.', compression=zipfile.ZIP_DEFLATED):
+        """Open the archive.
+
+        :param file: Path or binary file object to write the archive to. The
+            file object need not be seekable.
+        :param root: Directory the members are named relative to.
+        :param compression: Compression method of the members, one of the
+            constants of the `zipfile` module.
+        """
+        super().__init__(root)
+        self._archive = zipfile.ZipFile(file, 'w', compression)
+
+    def _add_dir(self, name):
+        info = zipfile.ZipInfo(f'{name}/', time.localtime()[:6])
+        info.external_attr = (stat.S_IFDIR | 0o755) << 16 | 0x10
+        self._archive.writestr(info, b'')
+
+    def _add_file(self, name, data, mode):
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self._archive.compression
+        info.external_attr = (stat.S_IFREG | mode) << 16
+        self._archive.writestr(info, data)
+
+    def write_chunks(self, path, chunks, source):
+        """Compress the `bytes` chunks of ``chunks`` into the member ``path``.
+
+        The chunks are compressed as they are produced. Other files wait for
+        the member to be complete.
+        """
+        name = self.name(path)
+        mode = stat.S_IMODE(os.stat(source).st_mode)
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self._archive.compression
+        info.external_attr = (stat.S_IFREG | mode) << 16
+        with self._lock:
+            self._files.add(name)
+            with self._archive.open(info, 'w', force_zip64=True) as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+
+    def close(self):
+        """Write the central directory of the archive."""
+        with self._lock:
+            self._archive.close()
+
+
+class TarSink(VirtualSink):
+    """Stream the project into a tar archive.
+
+    Each file is appended to the archive as soon as it is generated. The
+    archive is complete once the sink is closed.
+    """
+
+    def __init__(self, file, root='.', compression=''):
+        """Open the archive.
+
+        :param file: Path or binary file object to write the archive to. The
+            file object need not be seekable.
+        :param root: Directory the members are named relative to.
+        :param compression: ``''``, ``'gz'``, ``'bz2'`` or ``'xz'``.
+        """
+        super().__init__(root)
+        mode = f'w|{compression}'
+        if isinstance(file, (str, os.PathLike)):
+            self._archive = tarfile.open(file, mode)
+        else:
+            self._archive = tarfile.open(fileobj=file, mode=mode)
+
+    def _add_dir(self, name):
+        info = tarfile.TarInfo(name)
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        info.mtime = int(time.time())
+        self._archive.addfile(info)
+
+    def _add_file(self, name, data, mode):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mode = mode
+        info.mtime = int(time.time())
+        self._archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        """Write the end of the archive."""
+        with self._lock:
+            self._archive.close()
@@ -0,0 +1,201 @@
+"""Timing of the phases of a bake.
+
+The phases of a bake, from locating the template to the rendering of each
+file and the hooks, are timed as spans reported to the callbacks registered
+with `record()`, and only when there are any. `Profile` is such a callback,
+collecting the spans to summarize them or write them as JSON or in the Chrome
+trace event format.
+
+Spans are reported from the threads rendering files too. They are not
+reported from the worker processes of `cookiecutter.main.cookiecutter_batch`
+nor from hook subprocesses, which are timed as a whole.
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import NamedTuple
+
+_listeners = contextvars.ContextVar('cookiecutter_timing_listeners', default=())
+_current_args = contextvars.ContextVar('cookiecutter_timing_args', default=None)
+
+
+class Span(NamedTuple):
+    """A timed phase of a bake."""
+
+    #: Name of the phase, such as ``'generate_files'`` or ``'file'``.
+    name: str
+    #: `time.perf_counter()` when the phase started, in seconds.
+    start: float
+    #: Duration of the phase, in seconds.
+    duration: float
+    #: Identifier of the thread it ran in.
+    thread: int
+    #: Details of the phase, such as the ``path`` of a file and its ``kind``.
+    args: dict
+
+
+@contextmanager
+def record(callback):
+    """Report the spans of the bakes run in this context to ``callback``.
+
+    Contexts can be nested, each callback receives the spans of its own.
+
+    :param callback: Called with each `Span` once it ends, possibly from
+        other threads. Nothing is recorded when `None`.
+    """
+    if callback is None:
+        yield
+        return
+    token = _listeners.set(_listeners.get() + (callback,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+@contextmanager
+def span(name, **args):
+    """Time the code run in this context as a span called ``name``.
+
+    :param name: Name of the span.
+    :param args: Details of the span, which `annotate()` can add to.
+    """
+    listeners = _listeners.get()
+    if not listeners:
+        yield
+        return
+    token = _current_args.set(args)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        _current_args.reset(token)
+        result = Span(name, start, duration, threading.get_ident(), args)
+        for listener in listeners:
+            listener(result)
+
+
+def annotate(**args):
+    """Add details to the innermost span being recorded, if any."""
+    current = _current_args.get()
+    if current is not None:
+        current.update(args)
+
+
+def timed(func):
+    """Decorate ``func`` to time its calls as spans named after it."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class Profile:
+    """Collect spans, as a callback of `record()`, and report on them."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def __call__(self, span):
+        """Add ``span`` to the profile."""
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self):
+        """Return the number of spans and their total duration, by name.
+
+        Names are listed in the order of their first span.
+        """
+        totals = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            count, duration = totals.get(span.name, (0, 0.0))
+            totals[span.name] = (count + 1, duration + span.duration)
+        return totals
+
+    def slowest(self, name='file', top=10):
+        """Return the ``top`` longest spans called ``name``, longest first."""
+        spans = [span for span in self.spans if span.name == name]
+        return sorted(spans, key=lambda span: span.duration, reverse=True)[:top]
+
+    def summary(self, top=10):
+        """Return a text summary of the phases and the slowest files.
+
+        Spans of nested phases are included in the totals of both.
+        """
+        lines = [f'{"Phase":24} {"Calls":>7} {"Total":>12}']
+        for name, (count, duration) in self.totals().items():
+            lines.append(f'{name:24} {count:7} {duration * 1e3:9.1f} ms')
+        slowest = self.slowest(top=top)
+        if slowest:
+            lines.append('')
+            lines.append(f'Slowest {len(slowest)} files:')
+            for span in slowest:
+                kind = span.args.get('kind', '')
+                path = span.args['path']
+                lines.append(f'{span.duration * 1e3:9.1f} ms  {path} {kind}'.rstrip())
+        return '\n'.join(lines)
+
+    def to_json(self):
+        """Return the spans as a list of JSON serializable dicts."""
+        origin = self._origin()
+        return [
+            {
+                'name': span.name,
+                'start': span.start - origin,
+                'duration': span.duration,
+                'thread': span.thread,
+                'args': span.args,
+            }
+            for span in sorted(self.spans, key=lambda span: span.start)
+        ]
+
+    def to_chrome_trace(self):
+        """Return the spans in the Chrome trace event format.
+
+        The result can be loaded into ``chrome://tracing`` or Perfetto.
+        """
+        origin = self._origin()
+        return {
+            'traceEvents': [
+                {
+                    'name': span.name,
+                    'cat': 'cookiecutter',
+                    'ph': 'X',
+                    'ts': (span.start - origin) * 1e6,
+                    'dur': span.duration * 1e6,
+                    'pid': 1,
+                    'tid': span.thread,
+                    'args': span.args,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def write(self, path, format='json'):
+        """Write the spans to ``path``.
+
+        :param path: File to write.
+        :param format: ``'json'`` for `to_json()` or ``'chrome'`` for
+            `to_chrome_trace()`.
+        """
+        if format == 'chrome':
+            data = self.to_chrome_trace()
+        elif format == 'json':
+            data = self.to_json()
+        else:
+            raise ValueError(f'Unknown profile format {format!r}')
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=1, default=str)
+
+    def _origin(self):
+        """Return the start of the earliest span."""
+        return min((span.start for span in self.spans), default=0.0)
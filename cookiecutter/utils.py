@@ -1,15 +1,19 @@
 """Helper functions used throughout Cookiecutter."""
 import contextlib
+import json
 import logging
 import os
 import shutil
 import stat
 import tempfile
+import threading
 from pathlib import Path
 from typing import Dict
 from jinja2.ext import Extension
+from jinja2.utils import LRUCache
 from cookiecutter.environment import StrictEnvironment
 logger = logging.getLogger(__name__)
+_environments = LRUCache(16)
 
 
 def force_delete(func, path, exc_info):
@@ -30,12 +34,34 @@ def rmtree(path):
     shutil.rmtree(path, onerror=force_delete)
 
 
+def discard_tree(path):
+    """Remove a directory and all its contents in a background thread.
+
+    Callers do not wait for large trees to be deleted. The thread is not a
+    daemon, so the interpreter still finishes the deletion before exiting.
+
+    :param path: A directory path no one uses any more.
+    """
+
+    def remove():
+        try:
+            rmtree(path)
+        except OSError:
+            logger.warning('Unable to remove %s', path, exc_info=True)
+
+    threading.Thread(target=remove, name=f'discard {path}').start()
+
+
 def make_sure_path_exists(path: 'os.PathLike[str]') ->None:
     """Ensure that a directory exists.
 
     :param path: A directory tree path for creation.
     """
-    os.makedirs(path, exist_ok=True)
+    logger.debug('Making sure path exists (creates tree if not exist): %s', path)
+    try:
+        Path(path).mkdir(parents=True, exist_ok=True)
+    except OSError as error:
+        raise OSError(f'Unable to create directory at {path}') from error
 
 
 @contextlib.contextmanager
@@ -74,12 +100,46 @@ def simple_filter(filter_function):
 
 def create_tmp_repo_dir(repo_dir: 'os.PathLike[str]') ->Path:
     """Create a temporary dir with a copy of the contents of repo_dir."""
-    temp_dir = Path(tempfile.mkdtemp())
-    shutil.copytree(repo_dir, temp_dir, symlinks=True)
-    return temp_dir
-
-
-def create_env_with_context(context: Dict):
-    """Create a jinja environment using the provided context."""
-    env = StrictEnvironment(context=context)
+    repo_dir = Path(repo_dir).resolve()
+    base_dir = tempfile.mkdtemp(prefix='cookiecutter')
+    new_dir = f"{base_dir}/{repo_dir.name}"
+    logger.debug(f'Copying repo_dir from {repo_dir} to {new_dir}')
+    shutil.copytree(repo_dir, new_dir)
+    return Path(new_dir)
+
+
+def create_env_with_context(context: Dict, template_dir=None):
+    """Create a jinja environment using the provided context.
+
+    Environments only depend on the template directory, which local extensions
+    are imported from, and the ``_extensions`` and ``_jinja2_env_vars`` of the
+    context, so one is built per distinct set of them and handed out again
+    afterwards. Prompting, path and file rendering and hook rendering of a
+    template thus share the loaded extensions and compiled templates.
+    The environment is shared between bakes, possibly running concurrently,
+    so callers must not change it. A bake needing a ``loader`` or a
+    ``bytecode_cache`` sets them on an ``overlay()`` of its own.
+
+    :param context: Cookiecutter project context.
+    :param template_dir: Directory of the template, the ``_repo_dir`` of the
+        context when `None`.
+    """
+    cookiecutter_dict = context.get('cookiecutter', {})
+    envvars = cookiecutter_dict.get('_jinja2_env_vars', {})
+    if template_dir is None:
+        template_dir = cookiecutter_dict.get('_repo_dir')
+    if template_dir is not None:
+        template_dir = os.path.abspath(template_dir)
+    try:
+        key = json.dumps(
+            [template_dir, cookiecutter_dict.get('_extensions', []), envvars],
+            sort_keys=True,
+        )
+    except TypeError:
+        return StrictEnvironment(context=context, keep_trailing_newline=True, **envvars)
+
+    env = _environments.get(key)
+    if env is None:
+        env = StrictEnvironment(context=context, keep_trailing_newline=True, **envvars)
+        _environments[key] = env
     return env
@@ -1,15 +1,29 @@
 """Helper functions for working with version control systems."""
 import logging
 import os
+import re
 import subprocess
+import threading
 from pathlib import Path
 from shutil import which
 from typing import Optional
 from cookiecutter.exceptions import RepositoryCloneFailed, RepositoryNotFound, UnknownRepoType, VCSNotInstalled
 from cookiecutter.prompt import prompt_and_delete
-from cookiecutter.utils import make_sure_path_exists
+from cookiecutter.timing import timed
+from cookiecutter.utils import make_sure_path_exists, rmtree
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
 logger = logging.getLogger(__name__)
 BRANCH_ERRORS = ['error: pathspec', 'unknown revision']
+# Reasons for a minimal git clone to fail that a full clone does not have
+MINIMAL_CLONE_ERRORS = ['remote branch', 'unknown option', 'usage: git clone']
+COMMIT_SHA_REGEX = re.compile(r'^[0-9a-fA-F]{7,40}$')
+# Lock files held by the bakes of this process, by clone directory. Each bake
+# holds a lock file of its own, released by `release_clone_lock()`.
+_clone_locks = {}
+_clone_locks_guard = threading.Lock()
 
 
 def identify_repo(repo_url):
@@ -20,34 +34,35 @@ def identify_repo(repo_url):
     :param repo_url: Repo URL of unknown type.
     :returns: ('git', repo_url), ('hg', repo_url), or None.
     """
-    repo_url = repo_url.lower()
-    if repo_url.startswith('git+'):
-        return 'git', repo_url[4:]
-    elif repo_url.startswith('hg+'):
-        return 'hg', repo_url[3:]
-    elif repo_url.endswith('.git') or 'github.com' in repo_url:
-        return 'git', repo_url
-    elif 'bitbucket.org' in repo_url:
-        return 'hg', repo_url
-    return None
+    repo_url_values = repo_url.split('+')
+    if len(repo_url_values) == 2:
+        repo_type = repo_url_values[0]
+        if repo_type in ["git", "hg"]:
+            return repo_type, repo_url_values[1]
+        else:
+            raise UnknownRepoType
+    else:
+        if 'git' in repo_url:
+            return 'git', repo_url
+        elif 'bitbucket' in repo_url:
+            return 'hg', repo_url
+        else:
+            raise UnknownRepoType
 
 
 def is_vcs_installed(repo_type):
     """
     Check if the version control system for a repo type is installed.
 
-    :param repo_type: The type of repository ('git' or 'hg').
-    :return: True if the VCS is installed, False otherwise.
+    :param repo_type:
     """
-    if repo_type == 'git':
-        return which('git') is not None
-    elif repo_type == 'hg':
-        return which('hg') is not None
-    return False
+    return bool(which(repo_type))
 
 
-def clone(repo_url: str, checkout: Optional[str]=None, clone_to_dir:
-    'os.PathLike[str]'='.', no_input: bool=False):
+@timed
+def clone(repo_url: str, checkout: Optional[str] = None, clone_to_dir:
+    'os.PathLike[str]' = '.', no_input: bool = False, use_cache: bool = False,
+    directory: Optional[str] = None):
     """Clone a repo to the current directory.
 
     :param repo_url: Repo URL of unknown type.
@@ -56,59 +71,300 @@ def clone(repo_url: str, checkout: Optional[str]=None, clone_to_dir:
                          Defaults to the current directory.
     :param no_input: Do not prompt for user input and eventually force a refresh of
         cached resources.
+    :param use_cache: Keep the clone between runs, see `_clone_cached()`.
+        The returned directory is then locked until `release_clone_lock()`
+        is called.
+    :param directory: Directory within the repository holding the template.
+        Git clones only check out this directory, ``hooks`` and the files at
+        the top of the repository.
     :returns: str with path to the new directory of the repository.
     """
+    # Ensure that clone_to_dir exists
+    clone_to_dir = Path(clone_to_dir).expanduser()
+    make_sure_path_exists(clone_to_dir)
+
+    # identify the repo_type
     repo_type, repo_url = identify_repo(repo_url)
-    if repo_type is None:
-        raise UnknownRepoType(f"Couldn't determine repository type for {repo_url}")
 
+    # check that the appropriate VCS for the repo_type is installed
     if not is_vcs_installed(repo_type):
-        raise VCSNotInstalled(f"{repo_type} is not installed.")
+        msg = f"'{repo_type}' is not installed."
+        raise VCSNotInstalled(msg)
 
-    clone_to_dir = Path(clone_to_dir).resolve()
-    make_sure_path_exists(clone_to_dir)
+    repo_url = repo_url.rstrip('/')
+    repo_name = os.path.split(repo_url)[1]
+    if repo_type == 'git':
+        repo_name = repo_name.split(':')[-1].rsplit('.git')[0]
+        repo_dir = os.path.normpath(os.path.join(clone_to_dir, repo_name))
+    if repo_type == 'hg':
+        repo_dir = os.path.normpath(os.path.join(clone_to_dir, repo_name))
+    logger.debug(f'repo_dir is {repo_dir}')
 
-    repo_dir = clone_to_dir / Path(repo_url).stem
+    if use_cache:
+        return _clone_cached(
+            repo_type, repo_url, checkout, clone_to_dir, repo_dir, directory
+        )
 
-    if repo_dir.exists():
-        if no_input:
-            logger.warning("'%s' directory already exists, deleting it", repo_dir)
-            subprocess.check_call([repo_type, 'init', str(repo_dir)])
-        else:
-            prompt_and_delete(repo_dir)
+    if os.path.isdir(repo_dir):
+        clone = prompt_and_delete(repo_dir, no_input=no_input)
+    else:
+        clone = True
 
-    if repo_type == 'git':
-        clone_cmd = ['git', 'clone', repo_url, str(repo_dir)]
-    else:  # hg
-        clone_cmd = ['hg', 'clone', repo_url, str(repo_dir)]
+    if clone:
+        _clone_fresh(repo_type, repo_url, checkout, clone_to_dir, repo_dir, directory)
+
+    return repo_dir
+
+
+def _clone_fresh(repo_type, repo_url, checkout, clone_to_dir, repo_dir,
+    directory=None, shallow=True):
+    """Clone ``repo_url`` into ``repo_dir`` and check out ``checkout``.
+
+    Git repositories are cloned with `_clone_git_minimal()` when possible.
+    """
+    try:
+        if repo_type == 'git' and _clone_git_minimal(
+            repo_url, checkout, clone_to_dir, repo_dir, directory, shallow
+        ):
+            return
+        subprocess.check_output(  # nosec
+            [repo_type, 'clone', repo_url],
+            cwd=clone_to_dir,
+            stderr=subprocess.STDOUT,
+        )
+        if checkout is not None:
+            checkout_params = [checkout]
+            # Avoid Mercurial "--config" and "--debugger" injection vulnerability
+            if repo_type == "hg":
+                checkout_params.insert(0, "--")
+            subprocess.check_output(  # nosec
+                [repo_type, 'checkout', *checkout_params],
+                cwd=repo_dir,
+                stderr=subprocess.STDOUT,
+            )
+    except subprocess.CalledProcessError as clone_error:
+        output = clone_error.output.decode('utf-8')
+        if 'not found' in output.lower():
+            raise RepositoryNotFound(
+                f'The repository {repo_url} could not be found, '
+                'have you made a typo?'
+            ) from clone_error
+        if any(error in output for error in BRANCH_ERRORS):
+            raise RepositoryCloneFailed(
+                f'The {checkout} branch of repository '
+                f'{repo_url} could not found, have you made a typo?'
+            ) from clone_error
+        logger.error('git clone failed with error: %s', output)
+        raise
+
+
+def _clone_git_minimal(repo_url, checkout, clone_to_dir, repo_dir, directory,
+    shallow):
+    """Clone only the parts of a git repository needed to bake from it.
+
+    Branches and tags, or the default branch, are cloned with a depth of 1.
+    Commit SHAs, and clones meant to be fetched into later (``shallow`` is
+    false), get the whole history without file contents, and git downloads
+    the blobs of the checked out revision only. When ``directory`` is given,
+    the checkout is sparse: just ``directory``, ``hooks`` and the top-level
+    files such as ``cookiecutter.json``.
+
+    :returns: `False` if the clone was not possible this way, for instance
+        because ``checkout`` is neither a branch nor a tag, or git is too old.
+        The caller should then fall back to a full clone.
+    """
+    shallow = shallow and not (checkout and COMMIT_SHA_REGEX.match(checkout))
+    options = []
+    if shallow:
+        options += ['--depth', '1']
+        if checkout is not None:
+            options += ['--branch', checkout]
+    if directory or not shallow:
+        options.append('--filter=blob:none')
+    if directory:
+        options.append('--sparse')
 
     try:
-        subprocess.check_output(clone_cmd, stderr=subprocess.STDOUT)
-    except subprocess.CalledProcessError as e:
-        output = e.output.decode('utf-8')
-        if 'Repository not found' in output:
-            raise RepositoryNotFound(f"The repository {repo_url} could not be found")
-        else:
-            raise RepositoryCloneFailed(f"Cloning {repo_url} failed: {output}")
+        subprocess.check_output(  # nosec
+            ['git', 'clone', *options, repo_url],
+            cwd=clone_to_dir,
+            stderr=subprocess.STDOUT,
+        )
+    except subprocess.CalledProcessError as error:
+        output = error.output.decode('utf-8', 'replace').lower()
+        if not any(reason in output for reason in MINIMAL_CLONE_ERRORS):
+            raise
+        logger.debug('Falling back to a full clone of %s: %s', repo_url, output)
+        if os.path.isdir(repo_dir):
+            rmtree(repo_dir)
+        return False
 
-    if checkout:
-        if repo_type == 'git':
-            checkout_cmd = ['git', 'checkout', checkout]
-        else:  # hg
-            checkout_cmd = ['hg', 'update', checkout]
+    if directory:
+        subprocess.check_output(  # nosec
+            ['git', 'sparse-checkout', 'set', '--', *_sparse_paths(directory)],
+            cwd=repo_dir,
+            stderr=subprocess.STDOUT,
+        )
+    if checkout is not None and not shallow:
+        subprocess.check_output(  # nosec
+            ['git', 'checkout', checkout],
+            cwd=repo_dir,
+            stderr=subprocess.STDOUT,
+        )
+    return True
 
-        with Path.cwd():
-            os.chdir(repo_dir)
-            try:
-                subprocess.check_output(checkout_cmd, stderr=subprocess.STDOUT)
-            except subprocess.CalledProcessError as e:
-                output = e.output.decode('utf-8')
-                if any(error in output for error in BRANCH_ERRORS):
-                    raise RepositoryCloneFailed(
-                        f"Couldn't checkout {checkout} in {repo_url}. "
-                        f"Error: {output}"
+
+def _sparse_paths(directory):
+    """Return the directories a sparse checkout for ``directory`` needs."""
+    return [os.path.normpath(directory).replace(os.sep, '/'), 'hooks']
+
+
+def _clone_cached(repo_type, repo_url, checkout, clone_to_dir, repo_dir,
+    directory=None):
+    """Bring a clone kept in ``repo_dir`` up to date with ``repo_url``.
+
+    An existing clone is fetched (``git fetch``, ``hg pull``) and the
+    requested revision is checked out, discarding any local change. The
+    repository is only cloned again when the existing clone is unusable or
+    points to another remote.
+
+    Updates hold an exclusive lock on ``<repo_dir>.lock``. Once up to date the
+    lock is downgraded to a shared one, kept until `release_clone_lock()`, so
+    other processes can bake from the same revision meanwhile but none of them
+    can check out another one under our feet. Every call opens the lock file
+    anew, so other threads of this process wait for the lock just as other
+    processes do.
+    """
+    lock_file = open(f'{repo_dir}.lock', 'a')
+    try:
+        while True:
+            _lock(lock_file, exclusive=True)
+            revision = None
+            if os.path.isdir(repo_dir):
+                try:
+                    revision = _update_clone(
+                        repo_type, repo_url, checkout, repo_dir, directory
+                    )
+                except subprocess.CalledProcessError as error:
+                    output = error.output.decode('utf-8', 'replace')
+                    if any(branch_error in output for branch_error in BRANCH_ERRORS):
+                        raise RepositoryCloneFailed(
+                            f'The {checkout} branch of repository '
+                            f'{repo_url} could not found, have you made a typo?'
+                        ) from error
+                    logger.warning(
+                        'Cached clone %s is unusable, cloning it again: %s',
+                        repo_dir,
+                        output,
                     )
-                else:
-                    raise
+                if revision is None:
+                    rmtree(repo_dir)
+            if revision is None:
+                _clone_fresh(
+                    repo_type,
+                    repo_url,
+                    checkout,
+                    clone_to_dir,
+                    repo_dir,
+                    directory,
+                    shallow=False,
+                )
+                revision = _head(repo_type, repo_dir)
+
+            # Converting the lock is not atomic: make sure nobody checked out
+            # another revision in between, or start over.
+            _lock(lock_file, exclusive=False)
+            if _head(repo_type, repo_dir) == revision:
+                break
+    except BaseException:
+        lock_file.close()
+        raise
+
+    with _clone_locks_guard:
+        _clone_locks.setdefault(repo_dir, []).append(lock_file)
+    return repo_dir
+
+
+def _update_clone(repo_type, repo_url, checkout, repo_dir, directory=None):
+    """Fetch and check out ``checkout`` in an existing clone.
+
+    :returns: The checked out revision, or `None` if the clone is not one of
+        ``repo_url``.
+    """
+    def run(*args):
+        output = subprocess.check_output(  # nosec
+            [repo_type, *args], cwd=repo_dir, stderr=subprocess.STDOUT
+        )
+        return output.decode('utf-8').strip()
+
+    if repo_type == 'git':
+        if run('remote', 'get-url', 'origin') != repo_url:
+            return None
+        run('fetch', '--prune', '--tags', '--force', 'origin')
+        if directory:
+            run('sparse-checkout', 'set', '--', *_sparse_paths(directory))
+        else:
+            run('sparse-checkout', 'disable')
+        if checkout is None:
+            try:
+                run('rev-parse', '--verify', '--quiet', 'refs/remotes/origin/HEAD')
+            except subprocess.CalledProcessError:
+                run('remote', 'set-head', 'origin', '--auto')
+            candidates = ['refs/remotes/origin/HEAD']
+        else:
+            # Prefer the remote branch, the local one is not fetched into
+            candidates = [f'refs/remotes/origin/{checkout}', checkout]
+        for candidate in candidates:
+            try:
+                revision = run(
+                    'rev-parse', '--verify', '--quiet', f'{candidate}^{{commit}}'
+                )
+            except subprocess.CalledProcessError:
+                continue
+            run('checkout', '--force', '--detach', revision)
+            run('clean', '-ffdxq')
+            return revision
+        raise RepositoryCloneFailed(
+            f'The {checkout} branch of repository '
+            f'{repo_url} could not found, have you made a typo?'
+        )
+
+    if run('paths', 'default') != repo_url:
+        return None
+    run('pull')
+    run('update', '--clean', '--', checkout or 'default')
+    run('--config', 'extensions.purge=', 'purge', '--all')
+    return _head(repo_type, repo_dir)
+
+
+def _head(repo_type, repo_dir):
+    """Return the revision checked out in ``repo_dir``."""
+    if repo_type == 'git':
+        cmd = ['git', 'rev-parse', 'HEAD']
+    else:
+        cmd = ['hg', 'log', '-r', '.', '--template', '{node}']
+    return subprocess.check_output(cmd, cwd=repo_dir).decode('utf-8').strip()  # nosec
 
-    return str(repo_dir)
+
+def _lock(lock_file, exclusive):
+    """Take, or convert, the lock on ``lock_file``, waiting for it if needed."""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+def release_clone_lock(path):
+    """Release the lock taken by ``clone(use_cache=True)`` on a cached clone.
+
+    Each call releases one of the locks taken on the clone, so it must be
+    called once for each `clone()` returning it.
+
+    :param path: The directory returned by `clone()`, or a directory in it.
+    """
+    path = os.path.normpath(path)
+    with _clone_locks_guard:
+        for repo_dir, lock_files in list(_clone_locks.items()):
+            if path == repo_dir or path.startswith(repo_dir + os.sep):
+                lock_files.pop().close()
+                if not lock_files:
+                    del _clone_locks[repo_dir]
+                return
@@ -1,17 +1,36 @@
 """Utility functions for handling and fetching repo archives in zip format."""
+import hashlib
+import json
+import logging
 import os
 import tempfile
+import zlib
 from pathlib import Path
 from typing import Optional
 from zipfile import BadZipFile, ZipFile
-import requests
+
 from cookiecutter.exceptions import InvalidZipRepository
 from cookiecutter.prompt import prompt_and_delete, read_repo_password
-from cookiecutter.utils import make_sure_path_exists
+from cookiecutter.timing import timed
+from cookiecutter.utils import make_sure_path_exists, rmtree
+
+logger = logging.getLogger(__name__)
+
+#: Directory, inside ``clone_to_dir``, holding the cached archives and trees.
+ZIP_CACHE_DIR = '.zip_cache'
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
-def unzip(zip_uri: str, is_url: bool, clone_to_dir: 'os.PathLike[str]'='.',
-    no_input: bool=False, password: Optional[str]=None):
+@timed
+def unzip(
+    zip_uri: str,
+    is_url: bool,
+    clone_to_dir: 'os.PathLike[str]' = '.',
+    no_input: bool = False,
+    password: Optional[str] = None,
+    use_cache: bool = False,
+):
     """Download and unpack a zipfile at a given URI.
 
     This will download the zipfile to the cookiecutter repository,
@@ -24,47 +43,284 @@ def unzip(zip_uri: str, is_url: bool, clone_to_dir: 'os.PathLike[str]'='.',
     :param no_input: Do not prompt for user input and eventually force a refresh of
         cached resources.
     :param password: The password to use when unpacking the repository.
+    :param use_cache: Keep archives and their unpacked trees in the zip cache
+        of ``clone_to_dir``, see `unzip_cached()`. The returned directory then
+        belongs to the cache and must not be removed, see `is_cached_tree()`.
     """
-    clone_to_dir = Path(clone_to_dir)
+    # Ensure that clone_to_dir exists
+    clone_to_dir = Path(clone_to_dir).expanduser()
     make_sure_path_exists(clone_to_dir)
 
+    if use_cache:
+        return unzip_cached(zip_uri, is_url, clone_to_dir, no_input, password)
+
+    if is_url:
+        # Build the name of the cached zipfile,
+        # and prompt to delete if it already exists.
+        identifier = zip_uri.rsplit('/', 1)[1]
+        zip_path = os.path.join(clone_to_dir, identifier)
+
+        if os.path.exists(zip_path):
+            download = prompt_and_delete(zip_path, no_input=no_input)
+        else:
+            download = True
+
+        if download:
+            # (Re) download the zipfile
+            import requests
+
+            r = requests.get(zip_uri, stream=True, timeout=100)
+            os.replace(_download_to_temp(r, clone_to_dir), zip_path)
+    else:
+        # Just use the local zipfile as-is.
+        zip_path = os.path.abspath(zip_uri)
+
+    # Now unpack the repository. The zipfile will be unpacked
+    # into a temporary directory
+    unzip_base = tempfile.mkdtemp()
+    try:
+        project_name = _extract(zip_path, zip_uri, unzip_base, no_input, password)
+    except BaseException:
+        rmtree(unzip_base)
+        raise
+    return os.path.join(unzip_base, project_name)
+
+
+def unzip_cached(zip_uri, is_url, clone_to_dir, no_input=False, password=None):
+    """Unpack a zipfile through the zip cache of ``clone_to_dir``.
+
+    Archives are stored under the SHA-256 of their contents. A URL is fetched
+    with a conditional request built from the ``ETag`` and ``Last-Modified``
+    headers of its previous download, so an unchanged archive is not
+    transferred again. Each archive is unpacked once, into a tree named after
+    its hash that later calls return as is. Password protected archives are
+    unpacked into a temporary directory on every call instead, so that their
+    contents are never kept on disk unencrypted.
+
+    :param zip_uri: The URI for the zipfile.
+    :param is_url: Is the zip URI a URL or a file?
+    :param clone_to_dir: The cookiecutter repository directory holding the
+        cache.
+    :param no_input: Do not prompt for user input.
+    :param password: The password to use when unpacking the repository.
+    """
+    cache_dir = os.path.join(clone_to_dir, ZIP_CACHE_DIR)
     if is_url:
-        # Download the file
-        response = requests.get(zip_uri)
-        response.raise_for_status()
-        zip_file = tempfile.NamedTemporaryFile(delete=False, suffix='.zip', dir=clone_to_dir)
-        zip_file.write(response.content)
-        zip_file.close()
-        zip_path = Path(zip_file.name)
+        digest = _download_cached(zip_uri, cache_dir)
+        zip_path = _archive_path(cache_dir, digest)
     else:
-        zip_path = Path(zip_uri)
+        zip_path = os.path.abspath(zip_uri)
+        digest = _file_digest(zip_path)
+
+    tree_dir = os.path.join(cache_dir, 'trees', digest)
+    if os.path.isdir(tree_dir):
+        project_name = _only_entry(tree_dir)
+        if project_name is not None:
+            logger.debug('Using unpacked %s from %s', zip_uri, tree_dir)
+            return os.path.join(tree_dir, project_name)
+        rmtree(tree_dir)
+
+    if _is_encrypted(zip_path):
+        unzip_base = tempfile.mkdtemp()
+        project_name = _extract(zip_path, zip_uri, unzip_base, no_input, password)
+        return os.path.join(unzip_base, project_name)
 
-    # Create a temporary directory to extract the contents
-    with tempfile.TemporaryDirectory(dir=clone_to_dir) as temp_dir:
-        try:
-            with ZipFile(zip_path, 'r') as zip_ref:
-                if zip_ref.namelist() and zip_ref.testzip() is not None:
-                    raise InvalidZipRepository(f"The zip file {zip_uri} is invalid or corrupt.")
+    make_sure_path_exists(os.path.dirname(tree_dir))
+    unzip_base = tempfile.mkdtemp(dir=os.path.dirname(tree_dir))
+    try:
+        project_name = _extract(zip_path, zip_uri, unzip_base, no_input, password)
+    except BaseException:
+        rmtree(unzip_base)
+        raise
 
-                if password is None and zip_ref.namelist()[0].endswith('/'):
-                    password = read_repo_password('Enter the password for the encrypted repository:')
+    try:
+        os.rename(unzip_base, tree_dir)
+    except OSError:
+        # Another run unpacked the same archive first.
+        rmtree(unzip_base)
+    return os.path.join(tree_dir, project_name)
 
+
+def is_cached_tree(path, clone_to_dir):
+    """Check whether ``path`` was unpacked into the zip cache of ``clone_to_dir``.
+
+    :param path: A directory returned by `unzip()`.
+    :param clone_to_dir: The ``clone_to_dir`` it was passed.
+    """
+    trees_dir = os.path.abspath(os.path.join(clone_to_dir, ZIP_CACHE_DIR, 'trees'))
+    path = os.path.abspath(path)
+    return os.path.commonpath([trees_dir, path]) == trees_dir
+
+
+def _download_cached(zip_uri, cache_dir):
+    """Download ``zip_uri`` into the archive cache unless it is unchanged.
+
+    :return: The SHA-256 of the archive now cached for ``zip_uri``.
+    """
+    url_key = hashlib.sha256(zip_uri.encode('utf-8')).hexdigest()
+    meta_file = os.path.join(cache_dir, 'urls', f'{url_key}.json')
+    try:
+        with open(meta_file, encoding='utf-8') as fh:
+            meta = json.load(fh)
+    except FileNotFoundError:
+        meta = {}
+    except (OSError, ValueError):
+        logger.debug('Ignoring unreadable zip cache entry %s', meta_file)
+        meta = {}
+
+    headers = {}
+    if meta.get('sha256') and os.path.exists(
+        _archive_path(cache_dir, meta['sha256'])
+    ):
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    import requests
+
+    with requests.get(zip_uri, headers=headers, stream=True, timeout=100) as r:
+        if r.status_code == requests.codes.not_modified and headers:
+            logger.debug('%s is unchanged, using the cached archive', zip_uri)
+            return meta['sha256']
+        r.raise_for_status()
+
+        archives_dir = os.path.join(cache_dir, 'archives')
+        make_sure_path_exists(archives_dir)
+        sha256 = hashlib.sha256()
+        tmp_path = _download_to_temp(r, archives_dir, sha256)
+        digest = sha256.hexdigest()
+        os.replace(tmp_path, _archive_path(cache_dir, digest))
+
+        meta = {
+            'etag': r.headers.get('ETag'),
+            'last_modified': r.headers.get('Last-Modified'),
+            'sha256': digest,
+        }
+
+    make_sure_path_exists(os.path.dirname(meta_file))
+    tmp_meta = f'{meta_file}.{os.getpid()}.tmp'
+    with open(tmp_meta, 'w', encoding='utf-8') as fh:
+        json.dump(meta, fh)
+    os.replace(tmp_meta, meta_file)
+    return digest
+
+
+def _download_to_temp(response, directory, sha256=None):
+    """Write the body of ``response`` to a new file one chunk at a time.
+
+    The caller moves the file into place once it is complete, so that an
+    interrupted download never leaves a truncated archive behind.
+
+    :param response: A `requests.Response` made with ``stream=True``.
+    :param directory: Directory to create the file in.
+    :param sha256: A ``hashlib`` object to update with the body, if any.
+    :return: Path of the file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:  # filter out keep-alive new chunks
+                    f.write(chunk)
+                    if sha256 is not None:
+                        sha256.update(chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _archive_path(cache_dir, digest):
+    return os.path.join(cache_dir, 'archives', f'{digest}.zip')
+
+
+def _file_digest(path):
+    sha256 = hashlib.sha256()
+    try:
+        with open(path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(DOWNLOAD_CHUNK_SIZE), b''):
+                sha256.update(chunk)
+    except OSError:
+        raise InvalidZipRepository(f'Zip repository {path} could not be read')
+    return sha256.hexdigest()
+
+
+def _is_encrypted(zip_path):
+    try:
+        with ZipFile(zip_path) as zip_file:
+            return any(info.flag_bits & 0x1 for info in zip_file.infolist())
+    except BadZipFile:
+        # Reported by _extract()
+        return False
+
+
+def _only_entry(directory):
+    """Return the single directory in ``directory``, or `None`."""
+    entries = os.listdir(directory)
+    if len(entries) == 1 and os.path.isdir(os.path.join(directory, entries[0])):
+        return entries[0]
+    return None
+
+
+def _extract(zip_path, zip_uri, unzip_base, no_input, password):
+    """Unpack the repository in ``zip_path`` into ``unzip_base``.
+
+    :return: The name of the repository's top-level directory.
+    """
+    try:
+        with ZipFile(zip_path) as zip_file:
+            if len(zip_file.namelist()) == 0:
+                raise InvalidZipRepository(f'Zip repository {zip_uri} is empty')
+
+            # The first record in the zipfile should be the directory entry for
+            # the archive. If it isn't a directory, there's a problem.
+            first_filename = zip_file.namelist()[0]
+            if not first_filename.endswith('/'):
+                raise InvalidZipRepository(
+                    f"Zip repository {zip_uri} does not include a top-level directory"
+                )
+            project_name = first_filename[:-1]
+
+            # Extract the zip file into the temporary directory
+            try:
+                zip_file.extractall(path=unzip_base)
+                return project_name
+            except RuntimeError:
+                # File is encrypted
+                pass
+
+            if password is not None:
                 try:
-                    zip_ref.extractall(path=temp_dir, pwd=password.encode() if password else None)
-                except RuntimeError as e:
-                    if "Bad password" in str(e):
-                        raise InvalidZipRepository(f"Invalid password for encrypted repository: {zip_uri}")
-                    raise
-
-            # If everything is successful, return the path to the extracted contents
-            return Path(temp_dir)
-
-        except BadZipFile:
-            raise InvalidZipRepository(f"The zip file {zip_uri} is invalid or corrupt.")
-
-        finally:
-            if is_url:
-                if no_input:
-                    os.unlink(zip_path)
-                else:
-                    prompt_and_delete(zip_path)
+                    zip_file.extractall(path=unzip_base, pwd=password.encode('utf-8'))
+                except RuntimeError:
+                    raise InvalidZipRepository(
+                        'Invalid password provided for protected repository'
+                    )
+            elif no_input:
+                raise InvalidZipRepository(
+                    'Unable to unlock password protected repository'
+                )
+            else:
+                retry = 0
+                while retry is not None:
+                    try:
+                        password = read_repo_password('Repo password')
+                        zip_file.extractall(
+                            path=unzip_base, pwd=password.encode('utf-8')
+                        )
+                        retry = None
+                    except RuntimeError:
+                        retry += 1
+                        if retry == 3:
+                            raise InvalidZipRepository(
+                                'Invalid password provided for protected repository'
+                            )
+            return project_name
+
+    except (BadZipFile, zlib.error) as e:
+        # Members are checked against their CRC while they are extracted,
+        # instead of decompressing the whole archive once more up front.
+        raise InvalidZipRepository(
+            f'Zip repository {zip_uri} is not a valid zip archive: {e}'
+        )
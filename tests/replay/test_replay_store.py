@@ -0,0 +1,132 @@
+"""Tests for keeping the context of every bake in a replay store."""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from cookiecutter.main import cookiecutter, cookiecutter_batch, replay_batch
+from cookiecutter.replay import ReplayStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create an empty replay store."""
+    return ReplayStore(tmp_path / 'replay' / 'replay.sqlite3')
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with a single rendered file."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    project.mkdir(parents=True)
+    (repo_dir / 'cookiecutter.json').write_text(
+        '{"name": "project", "license": ["MIT", "BSD"], "_private": "x"}'
+    )
+    (project / 'LICENSE').write_text('{{ cookiecutter.license }}\n')
+    return repo_dir
+
+
+def context(name, license='MIT'):
+    """Return a context as recorded for a bake."""
+    return {'cookiecutter': {'name': name, 'license': license, '_template': 'gh:a/b'}}
+
+
+def test_find(store, tmp_path):
+    """Records are looked up by template, ref, directories and time."""
+    project_dir = tmp_path / 'a' / 'one'
+    store.record('gh:a/b', context('one'), tmp_path / 'a', project_dir, created=1.0)
+    second = store.record(
+        'gh:a/b', context('two'), tmp_path / 'b', ref='v2', created=2.0
+    )
+    store.record('gh:c/d', context('three'), tmp_path / 'a', created=3.0)
+    last = store.record(
+        'gh:a/b', context('one', 'BSD'), tmp_path / 'a', project_dir, created=4.0
+    )
+
+    def names(records):
+        return [record.context['cookiecutter']['name'] for record in records]
+
+    assert names(store.find()) == ['one', 'two', 'three', 'one']
+    assert names(store.find(template='gh:a/b', ref='v2')) == ['two']
+    found = store.find(output_dir=tmp_path / 'a', since=2.0, until=4.0)
+    assert names(found) == ['three']
+    assert names(store.find(project_dir=project_dir)) == ['one', 'one']
+    latest = store.find(template='gh:a/b', latest=True)
+    assert [record.id for record in latest] == [second, last]
+    assert store.get(last).extra_context() == {'name': 'one', 'license': 'BSD'}
+    with pytest.raises(KeyError):
+        store.get(last + 1)
+
+
+def test_export(store, tmp_path):
+    """Records are written as JSON Lines usable with --batch."""
+    store.record('gh:a/b', context('one'), tmp_path / 'a')
+    store.record('gh:a/b', context('two'), tmp_path / 'b')
+    fh = io.StringIO()
+
+    assert store.export(fh, store.find(output_dir=tmp_path / 'b')) == 1
+
+    (line,) = [json.loads(line) for line in fh.getvalue().splitlines()]
+    assert line['template'] == 'gh:a/b'
+    assert line['output_dir'] == str(tmp_path / 'b')
+    assert line['extra_context'] == {'name': 'two', 'license': 'MIT'}
+    assert line['context'] == context('two')
+
+
+def test_record_bakes(store, template, tmp_path):
+    """Bakes and batches record their contexts, which replay_batch bakes again."""
+    cookiecutter(
+        str(template),
+        no_input=True,
+        extra_context={'name': 'single', 'license': 'BSD'},
+        output_dir=str(tmp_path / 'out'),
+        default_config={'replay_dir': str(tmp_path / 'replay')},
+        replay_store=store,
+    )
+    cookiecutter_batch(
+        str(template),
+        [{'name': 'first'}, {'name': 'second', 'license': 'BSD'}],
+        [tmp_path / 'out', tmp_path / 'other'],
+        default_config=True,
+        replay_store=store,
+    )
+
+    records = store.find(template=template)
+    assert [record.project_dir for record in records] == [
+        str(tmp_path / 'out' / 'single'),
+        str(tmp_path / 'out' / 'first'),
+        str(tmp_path / 'other' / 'second'),
+    ]
+    assert records[0].context['cookiecutter']['_private'] == 'x'
+
+    for record in records:
+        Path(record.project_dir, 'LICENSE').unlink()
+    results = replay_batch(
+        records, default_config=True, overwrite_if_exists=True, replay_store=store
+    )
+
+    assert [result.error for result in results] == [None, None, None]
+    licenses = [Path(record.project_dir, 'LICENSE').read_text() for record in records]
+    assert licenses == ['BSD\n', 'MIT\n', 'BSD\n']
+    assert len(store.find(template=template)) == 6
+    assert len(store.find(template=template, latest=True)) == 3
+
+
+def test_replay_store_from_config(template, tmp_path):
+    """The user config can name a store to record every bake into."""
+    cookiecutter(
+        str(template),
+        no_input=True,
+        output_dir=str(tmp_path / 'out'),
+        default_config={
+            'replay_dir': str(tmp_path / 'replay'),
+            'replay_store': str(tmp_path / 'replay.sqlite3'),
+        },
+    )
+
+    (record,) = ReplayStore(tmp_path / 'replay.sqlite3').find()
+    assert record.template == str(template)
+    assert record.output_dir == str(tmp_path / 'out')
@@ -42,6 +42,7 @@ def test_zipfile_unzip(mocker, template, is_url, user_config_data):
         clone_to_dir=user_config_data['cookiecutters_dir'],
         no_input=True,
         password=None,
+        use_cache=False,
     )
 
     assert os.path.isdir(project_dir)
@@ -83,6 +84,8 @@ def test_repository_url_should_clone(mocker, template_url, user_config_data):
         checkout=None,
         clone_to_dir=user_config_data['cookiecutters_dir'],
         no_input=True,
+        use_cache=False,
+        directory=None,
     )
 
     assert os.path.isdir(project_dir)
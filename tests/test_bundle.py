@@ -0,0 +1,96 @@
+"""Tests for precompiled template bundles."""
+
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from cookiecutter import bundle, main
+from cookiecutter.cli import main as cli_main
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.exceptions import InvalidBundleException
+from cookiecutter.filetypes import FileClassifier
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with rendered, plain and binary files, and a hook."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'src').mkdir(parents=True)
+    (repo_dir / 'hooks').mkdir()
+    (repo_dir / 'cookiecutter.json').write_text('{"name": "project"}')
+    (repo_dir / 'hooks' / 'post_gen_project.py').write_text(
+        'open("hooked.txt", "w").write("{{ cookiecutter.name }}")\n'
+    )
+    (project / 'README.md').write_text('# {{ cookiecutter.name }}\n')
+    (project / 'src' / 'main.py').write_text('print("{{ cookiecutter.name }}")\n')
+    (project / 'plain.txt').write_text('Nothing to render here\n')
+    (project / 'data.bin').write_bytes(b'\x00\x01\x02\xff' * 64)
+    (project / 'run.sh').write_text('echo {{ cookiecutter.name }}\n')
+    (project / 'run.sh').chmod(0o755)
+    return repo_dir
+
+
+def test_bake_from_bundle(mocker, template, tmp_path):
+    """Projects baked from a bundle reuse its compiled templates."""
+    bundle_file = tmp_path / 'template.ccbundle'
+    assert bundle.create_bundle(template, bundle_file) == 3
+
+    compile_ = mocker.spy(StrictEnvironment, 'compile')
+    sniff = mocker.spy(FileClassifier, 'sniff')
+    project_dir = main.cookiecutter(
+        str(bundle_file),
+        no_input=True,
+        output_dir=str(tmp_path / 'out'),
+        default_config=True,
+        extra_context={'name': 'baked'},
+    )
+
+    project = Path(project_dir)
+    assert project == tmp_path / 'out' / 'baked'
+    assert (project / 'README.md').read_text() == '# baked\n'
+    assert (project / 'src' / 'main.py').read_text() == 'print("baked")\n'
+    assert (project / 'data.bin').read_bytes() == b'\x00\x01\x02\xff' * 64
+    assert (project / 'run.sh').stat().st_mode & 0o100
+    assert (project / 'hooked.txt').read_text() == 'baked'
+    compiled = [call.args[2:3] for call in compile_.call_args_list]
+    assert ('README.md',) not in compiled
+    assert ('src/main.py',) not in compiled
+    assert 'data.bin' not in [call.args[1] for call in sniff.call_args_list]
+
+
+def test_bundle_unpacked_once(mocker, template, tmp_path):
+    """A bundle is unpacked into the cookiecutters dir once."""
+    bundle_file = tmp_path / 'template.ccbundle'
+    bundle.create_bundle(template, bundle_file)
+    unpack_tree = mocker.spy(bundle, '_unpack_tree')
+
+    first = bundle.unpack_bundle(bundle_file, tmp_path / 'cookiecutters')
+    second = bundle.unpack_bundle(bundle_file, tmp_path / 'cookiecutters')
+
+    assert first == second
+    assert unpack_tree.call_count == 1
+    assert Path(first, 'cookiecutter.json').read_text() == '{"name": "project"}'
+
+
+def test_invalid_bundle(tmp_path):
+    """Files that are not bundles are reported."""
+    bundle_file = tmp_path / 'broken.ccbundle'
+    bundle_file.write_bytes(b'PK\x03\x04 not a bundle at all')
+
+    with pytest.raises(InvalidBundleException):
+        bundle.unpack_bundle(bundle_file, tmp_path / 'cookiecutters')
+
+
+def test_cli_bundle(template, tmp_path):
+    """The command line writes bundles with --bundle."""
+    bundle_file = tmp_path / 'template.ccbundle'
+
+    result = CliRunner().invoke(
+        cli_main, [str(template), '--bundle', str(bundle_file), '--default-config']
+    )
+
+    assert result.exit_code == 0
+    assert 'with 3 compiled templates' in result.output
+    assert bundle_file.read_bytes().startswith(bundle.BUNDLE_MAGIC)
@@ -1,6 +1,7 @@
 """Collection of tests around cookiecutter's command-line interface."""
 
 import json
+import logging
 import os
 import re
 from pathlib import Path
@@ -12,7 +13,8 @@ from cookiecutter import utils
 from cookiecutter.__main__ import main
 from cookiecutter.environment import StrictEnvironment
 from cookiecutter.exceptions import UnknownExtension
-from cookiecutter.main import cookiecutter
+from cookiecutter.hooks import InProcessHookExecutor
+from cookiecutter.main import BakeResult, cookiecutter
 
 
 @pytest.fixture(scope='session')
@@ -104,7 +106,7 @@ def test_cli_verbose(cli_runner):
 @pytest.mark.usefixtures('remove_fake_project_dir')
 def test_cli_replay(mocker, cli_runner):
     """Test cli invocation display log with `verbose` and `replay` flags."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, '--replay', '-v')
@@ -125,13 +127,20 @@ def test_cli_replay(mocker, cli_runner):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
 @pytest.mark.usefixtures('remove_fake_project_dir')
 def test_cli_replay_file(mocker, cli_runner):
     """Test cli invocation correctly pass --replay-file option."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, '--replay-file', '~/custom-replay-file', '-v')
@@ -152,6 +161,13 @@ def test_cli_replay_file(mocker, cli_runner):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
@@ -175,7 +191,7 @@ def test_cli_replay_generated(mocker, cli_runner):
 def test_cli_exit_on_noinput_and_replay(mocker, cli_runner):
     """Test cli invocation fail if both `no-input` and `replay` flags passed."""
     mock_cookiecutter = mocker.patch(
-        'cookiecutter.cli.cookiecutter', side_effect=cookiecutter
+        'cookiecutter.main.cookiecutter', side_effect=cookiecutter
     )
 
     template_path = 'tests/fake-repo-pre/'
@@ -204,6 +220,13 @@ def test_cli_exit_on_noinput_and_replay(mocker, cli_runner):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
@@ -218,7 +241,7 @@ def test_run_cookiecutter_on_overwrite_if_exists_and_replay(
     mocker, cli_runner, overwrite_cli_flag
 ):
     """Test cli invocation with `overwrite-if-exists` and `replay` flags."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, '--replay', '-v', overwrite_cli_flag)
@@ -240,6 +263,13 @@ def test_run_cookiecutter_on_overwrite_if_exists_and_replay(
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
@@ -276,7 +306,7 @@ def output_dir_flag(request):
 
 def test_cli_output_dir(mocker, cli_runner, output_dir_flag, output_dir):
     """Test cli invocation with `output-dir` flag changes output directory."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, output_dir_flag, output_dir)
@@ -297,9 +327,172 @@ def test_cli_output_dir(mocker, cli_runner, output_dir_flag, output_dir):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
+@pytest.mark.parametrize('jobs_flag', ['-j', '--jobs'])
+def test_cli_jobs(mocker, cli_runner, jobs_flag):
+    """Test cli invocation passes the number of render jobs to cookiecutter."""
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', jobs_flag, '4')
+
+    assert result.exit_code == 0
+    assert mock_cookiecutter.call_args[1]['jobs'] == 4
+
+
+def test_cli_jobs_must_be_positive(cli_runner):
+    """Test cli invocation rejects a number of render jobs below one."""
+    result = cli_runner('tests/fake-repo-pre/', '--jobs', '0')
+
+    assert result.exit_code == 2
+    assert "Invalid value for '-j' / '--jobs'" in result.output
+
+
+def test_cli_no_template_cache(mocker, cli_runner):
+    """Test cli invocation can turn off the compiled-template cache."""
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', '--no-template-cache')
+
+    assert result.exit_code == 0
+    assert mock_cookiecutter.call_args[1]['template_cache'] is False
+
+
+def test_cli_repo_cache(mocker, cli_runner):
+    """Test cli invocation can keep and update cloned templates."""
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', '--repo-cache')
+
+    assert result.exit_code == 0
+    assert mock_cookiecutter.call_args[1]['repo_cache'] is True
+
+
+def test_cli_hooks_in_process(mocker, cli_runner):
+    """Test cli invocation can run Python hooks in process."""
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', '--hooks-in-process')
+
+    assert result.exit_code == 0
+    assert isinstance(
+        mock_cookiecutter.call_args[1]['hook_executor'], InProcessHookExecutor
+    )
+
+
+def test_cli_incremental(mocker, cli_runner):
+    """Test cli invocation can regenerate a project incrementally."""
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', '-f', '--incremental')
+
+    assert result.exit_code == 0
+    assert mock_cookiecutter.call_args[1]['incremental'] is True
+    assert mock_cookiecutter.call_args[1]['overwrite_if_exists'] is True
+
+
+def test_cli_hook_workers(mocker, cli_runner):
+    """Test cli invocation can run Python hooks on a worker pool."""
+    mock_pool = mocker.patch('cookiecutter.hooks.HookWorkerPool', autospec=True)
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
+
+    result = cli_runner('tests/fake-repo-pre/', '--hook-workers', '2')
+
+    assert result.exit_code == 0
+    mock_pool.assert_called_once_with(2)
+    assert mock_cookiecutter.call_args[1]['hook_executor'] is mock_pool.return_value
+    mock_pool.return_value.close.assert_called_once_with()
+
+
+def test_cli_hook_workers_and_hooks_in_process(cli_runner):
+    """Test cli invocation rejects two ways of running hooks."""
+    result = cli_runner(
+        'tests/fake-repo-pre/', '--hook-workers', '2', '--hooks-in-process'
+    )
+
+    assert result.exit_code == 2
+    assert '--hook-workers can not be used with --hooks-in-process' in result.output
+
+
+def test_cli_batch(mocker, cli_runner):
+    """Test cli invocation bakes every line of a JSON Lines batch."""
+    mock_batch = mocker.patch(
+        'cookiecutter.main.cookiecutter_batch',
+        return_value=[
+            BakeResult('out/a', 'out/a/first', None),
+            BakeResult('.', None, ValueError('boom')),
+        ],
+    )
+    lines = (
+        '{"extra_context": {"repo_name": "first"}, "output_dir": "out/a"}\n'
+        '\n'
+        '{"extra_context": {"repo_name": "second"}}\n'
+    )
+
+    result = cli_runner(
+        'tests/fake-repo-pre/',
+        'year=2000',
+        '--batch',
+        '-',
+        '--batch-processes',
+        '2',
+        input=lines,
+    )
+
+    assert result.exit_code == 1
+    args, kwargs = mock_batch.call_args
+    assert args == (
+        'tests/fake-repo-pre/',
+        [
+            {'year': '2000', 'repo_name': 'first'},
+            {'year': '2000', 'repo_name': 'second'},
+        ],
+        ['out/a', '.'],
+    )
+    assert kwargs['processes'] == 2
+    assert [json.loads(line) for line in result.output.splitlines()] == [
+        {'output_dir': 'out/a', 'project_dir': 'out/a/first', 'error': None},
+        {'output_dir': '.', 'project_dir': None, 'error': 'boom'},
+    ]
+
+
+def test_cli_batch_verbose(mocker, cli_runner):
+    """Test cli invocation keeps the log out of the JSON Lines of a batch."""
+
+    def bake(*args, **kwargs):
+        logging.getLogger('cookiecutter.main').debug('Baking')
+        return [BakeResult('.', 'fake-project', None)]
+
+    mocker.patch('cookiecutter.main.cookiecutter_batch', side_effect=bake)
+
+    result = cli_runner('tests/fake-repo-pre/', '--batch', '-', '-v', input='{}\n')
+
+    assert result.exit_code == 0
+    assert [json.loads(line) for line in result.stdout.splitlines()] == [
+        {'output_dir': '.', 'project_dir': 'fake-project', 'error': None},
+    ]
+    assert 'DEBUG cookiecutter.main: Baking' in result.stderr
+
+
+def test_cli_batch_invalid_line(mocker, cli_runner):
+    """Test cli invocation rejects batch lines that are not JSON objects."""
+    mock_batch = mocker.patch('cookiecutter.main.cookiecutter_batch')
+
+    result = cli_runner('tests/fake-repo-pre/', '--batch', '-', input='[1, 2]\n')
+
+    assert result.exit_code == 2
+    assert 'line 1 should be an object' in result.output
+    assert not mock_batch.called
+
+
 @pytest.fixture(params=['-h', '--help', 'help'])
 def help_cli_flag(request):
     """Pytest fixture return all help invocation options."""
@@ -321,7 +514,7 @@ def user_config_path(tmp_path):
 
 def test_user_config(mocker, cli_runner, user_config_path):
     """Test cli invocation works with `config-file` option."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, '--config-file', user_config_path)
@@ -342,12 +535,19 @@ def test_user_config(mocker, cli_runner, user_config_path):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
 def test_default_user_config_overwrite(mocker, cli_runner, user_config_path):
     """Test cli invocation ignores `config-file` if `default-config` passed."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(
@@ -373,12 +573,19 @@ def test_default_user_config_overwrite(mocker, cli_runner, user_config_path):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
 def test_default_user_config(mocker, cli_runner):
     """Test cli invocation accepts `default-config` flag correctly."""
-    mock_cookiecutter = mocker.patch('cookiecutter.cli.cookiecutter')
+    mock_cookiecutter = mocker.patch('cookiecutter.main.cookiecutter')
 
     template_path = 'tests/fake-repo-pre/'
     result = cli_runner(template_path, '--default-config')
@@ -399,6 +606,13 @@ def test_default_user_config(mocker, cli_runner):
         directory=None,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
@@ -646,7 +860,7 @@ def test_cli_accept_hooks(
     expected,
 ):
     """Test cli invocation works with `accept-hooks` option."""
-    mock_cookiecutter = mocker.patch("cookiecutter.cli.cookiecutter")
+    mock_cookiecutter = mocker.patch("cookiecutter.main.cookiecutter")
 
     template_path = "tests/fake-repo-pre/"
     result = cli_runner(
@@ -669,6 +883,13 @@ def test_cli_accept_hooks(
         skip_if_file_exists=False,
         accept_hooks=expected,
         keep_project_on_failure=False,
+        jobs=1,
+        template_cache=True,
+        repo_cache=False,
+        hook_executor=None,
+        incremental=False,
+        plan=False,
+        plan_contents=False,
     )
 
 
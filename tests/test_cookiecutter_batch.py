@@ -0,0 +1,109 @@
+"""Tests for baking several projects at once with `cookiecutter_batch`."""
+from pathlib import Path
+
+import pytest
+
+from cookiecutter import main
+from cookiecutter.exceptions import CookiecutterException
+from cookiecutter.hooks import HookWorkerPool
+from cookiecutter.main import cookiecutter_batch
+
+
+def test_batch_bakes_each_context(tmp_path, user_config_file):
+    """Verify one project is generated per context and output dir."""
+    output_dirs = [tmp_path / 'one', tmp_path / 'two']
+    results = cookiecutter_batch(
+        'tests/fake-repo-pre',
+        [{'repo_name': 'first'}, {'repo_name': 'second'}],
+        output_dirs,
+        config_file=user_config_file,
+    )
+
+    assert [result.error for result in results] == [None, None]
+    assert results[0].project_dir == str(tmp_path / 'one' / 'first')
+    assert results[1].project_dir == str(tmp_path / 'two' / 'second')
+    assert Path(results[1].project_dir, 'README.rst').exists()
+
+
+def test_batch_prepares_template_once(mocker, tmp_path, user_config_file):
+    """Verify config, repository and context are only resolved once."""
+    get_user_config = mocker.spy(main, 'get_user_config')
+    determine_repo_dir = mocker.spy(main, 'determine_repo_dir')
+    generate_context = mocker.spy(main, 'generate_context')
+
+    cookiecutter_batch(
+        'tests/fake-repo-pre',
+        [{'repo_name': f'project{i}'} for i in range(3)],
+        [tmp_path / 'out'] * 3,
+        config_file=user_config_file,
+    )
+
+    assert get_user_config.call_count == 1
+    assert determine_repo_dir.call_count == 1
+    assert generate_context.call_count == 1
+    assert sorted(p.name for p in (tmp_path / 'out').iterdir()) == [
+        'project0',
+        'project1',
+        'project2',
+    ]
+
+
+def test_batch_reports_errors_per_item(tmp_path, user_config_file):
+    """Verify a failing project does not prevent the others from baking."""
+    (tmp_path / 'fake-project').mkdir()
+    results = cookiecutter_batch(
+        'tests/fake-repo-pre',
+        [{}, {'repo_name': 'other'}],
+        [tmp_path, tmp_path],
+        config_file=user_config_file,
+    )
+
+    assert results[0].project_dir is None
+    assert isinstance(results[0].error, CookiecutterException)
+    assert results[1].error is None
+    assert (tmp_path / 'other').is_dir()
+
+
+def test_batch_in_worker_processes(tmp_path, user_config_file):
+    """Verify projects baked in worker processes match the serial ones."""
+    results = cookiecutter_batch(
+        'tests/fake-repo-pre',
+        [{'repo_name': 'first'}, {'repo_name': 'second'}],
+        [tmp_path, tmp_path],
+        config_file=user_config_file,
+        processes=2,
+    )
+
+    assert [result.error for result in results] == [None, None]
+    assert (tmp_path / 'first' / 'README.rst').exists()
+    assert (tmp_path / 'second' / 'README.rst').exists()
+
+
+def test_batch_output_dirs_must_match_contexts(user_config_file):
+    """Verify mismatching contexts and output dirs are rejected."""
+    with pytest.raises(ValueError):
+        cookiecutter_batch(
+            'tests/fake-repo-pre',
+            [{}, {}],
+            ['.'],
+            config_file=user_config_file,
+        )
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_batch_with_hook_worker_pool(tmp_path, user_config_file, processes):
+    """Verify Python hooks of every project run on a hook worker pool."""
+    with HookWorkerPool() as pool:
+        results = cookiecutter_batch(
+            'tests/test-pyhooks',
+            [{'pyhooks': 'first'}, {'pyhooks': 'second'}],
+            [tmp_path, tmp_path],
+            config_file=user_config_file,
+            hook_executor=pool,
+            processes=processes,
+        )
+
+    assert [result.error for result in results] == [None, None]
+    for name in ('first', 'second'):
+        assert (tmp_path / f'input{name}' / 'python_pre.txt').exists()
+        assert (tmp_path / f'input{name}' / 'python_post.txt').exists()
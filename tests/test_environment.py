@@ -1,8 +1,10 @@
 """Collection of tests around loading extensions."""
 
+from pathlib import Path
+
 import pytest
 
-from cookiecutter.environment import StrictEnvironment
+from cookiecutter.environment import StrictEnvironment, TemplateBytecodeCache
 from cookiecutter.exceptions import UnknownExtension
 
 
@@ -24,3 +26,78 @@ def test_env_should_come_with_default_extensions():
     assert 'cookiecutter.extensions.SlugifyExtension' in env.extensions
     assert 'cookiecutter.extensions.TimeExtension' in env.extensions
     assert 'cookiecutter.extensions.UUIDExtension' in env.extensions
+
+
+@pytest.fixture
+def cached_env(tmp_path):
+    """Fixture. Return a StrictEnvironment backed by a bytecode cache."""
+    env = StrictEnvironment(keep_trailing_newline=True)
+    env.bytecode_cache = TemplateBytecodeCache(str(tmp_path / 'cache'))
+    return env
+
+
+def test_template_cache_skips_compilation(cached_env, mocker):
+    """Verify a cached template is not compiled again, even by a new env."""
+    assert cached_env.from_string('{{ food }}').render(food='pizza') == 'pizza'
+
+    env = StrictEnvironment(keep_trailing_newline=True)
+    env.bytecode_cache = TemplateBytecodeCache(cached_env.bytecode_cache.directory)
+    compile_spy = mocker.spy(env, 'compile')
+
+    assert env.from_string('{{ food }}').render(food='pasta') == 'pasta'
+    compile_spy.assert_not_called()
+
+
+def test_template_cache_key_depends_on_extensions(cached_env, mocker):
+    """Verify templates compiled with other extensions are not reused."""
+    cached_env.from_string('{{ food }}')
+
+    context = {'cookiecutter': {'_extensions': ['jinja2.ext.i18n']}}
+    env = StrictEnvironment(context=context, keep_trailing_newline=True)
+    env.bytecode_cache = TemplateBytecodeCache(cached_env.bytecode_cache.directory)
+    compile_spy = mocker.spy(env, 'compile')
+
+    env.from_string('{{ food }}')
+    compile_spy.assert_called_once()
+
+
+def test_template_cache_evicts_least_recently_used(tmp_path):
+    """Verify the cache stays below its size limit by dropping old entries."""
+    cache_dir = tmp_path / 'cache'
+    env = StrictEnvironment(keep_trailing_newline=True)
+    env.bytecode_cache = TemplateBytecodeCache(str(cache_dir), max_size=4096)
+
+    for i in range(50):
+        env.from_string(f'{{{{ food }}}} number {i}')
+
+    cache_size = sum(path.stat().st_size for path in cache_dir.iterdir())
+    assert 0 < cache_size <= 4096
+    assert len(list(cache_dir.iterdir())) < 50
+
+
+def test_from_string_reuses_templates(mocker):
+    """Verify the same string is compiled once per environment."""
+    env = StrictEnvironment(keep_trailing_newline=True)
+    compile_spy = mocker.spy(env, 'compile')
+
+    assert env.from_string('{{ food }}').render(food='pizza') == 'pizza'
+    assert env.from_string('{{ food }}').render(food='pasta') == 'pasta'
+    compile_spy.assert_called_once()
+
+
+def test_overlay_keeps_its_own_templates():
+    """Verify templates from strings are bound to the overlay loading them."""
+    env = StrictEnvironment(keep_trailing_newline=True)
+    template = env.from_string('{{ food }}')
+    overlay = env.overlay(variable_start_string='<<', variable_end_string='>>')
+
+    assert overlay.from_string('{{ food }}').environment is overlay
+    assert overlay.from_string('<< food >>').render(food='pizza') == 'pizza'
+    assert env.from_string('{{ food }}') is template
+
+
+def test_template_cache_ignores_write_errors(cached_env, tmp_path):
+    """Verify a cache directory removed meanwhile does not break rendering."""
+    cache_dir = Path(cached_env.bytecode_cache.directory)
+    cache_dir.rmdir()
+    assert cached_env.from_string('{{ food }}').render(food='pizza') == 'pizza'
@@ -0,0 +1,84 @@
+"""Tests for `cookiecutter.filetypes` module."""
+import os
+
+import pytest
+
+from cookiecutter import filetypes
+
+
+@pytest.mark.parametrize(
+    'path, expected',
+    [
+        ('logo.png', True),
+        ('fonts/Some_Font.OTF', True),
+        ('readme.txt', False),
+        ('.DS_Store', False),
+        ('Makefile', False),
+    ],
+)
+def test_has_binary_extension(path, expected):
+    """Verify only known binary extensions are matched, case insensitively."""
+    assert filetypes.has_binary_extension(path) is expected
+
+
+def test_lookup_by_extension_does_not_touch_the_file(mocker):
+    """Verify known binary extensions are classified from the name alone."""
+    stat = mocker.patch('cookiecutter.filetypes.os.stat')
+    assert filetypes.FileClassifier().lookup('missing.png') is True
+    assert not stat.called
+
+
+def test_lookup_unknown_file():
+    """Verify files without a binary extension need their contents sniffed."""
+    assert filetypes.FileClassifier().lookup('readme.txt') is None
+
+
+def test_sniff(tmp_path, monkeypatch):
+    """Verify the contents decide, and only binary files are remembered."""
+    monkeypatch.chdir(tmp_path)
+    cache_file = str(tmp_path / 'cache' / 'filetypes.json')
+    for name, data in (('.DS_Store', b'\x00\x00\x00\x01Bud1\x00'), ('notes', b'hi')):
+        with open(name, 'wb') as fh:
+            fh.write(data)
+
+    classifier = filetypes.FileClassifier(cache_file)
+    assert classifier.sniff(
+        '.DS_Store', b'\x00\x00\x00\x01Bud1\x00', os.stat('.DS_Store')
+    )
+    assert not classifier.sniff('notes', b'hi', os.stat('notes'))
+    classifier.save()
+
+    reloaded = filetypes.FileClassifier(cache_file)
+    assert reloaded.lookup('.DS_Store') is True
+    assert reloaded.lookup('notes') is None
+
+
+def test_persisted_classification_is_dropped_when_file_changes(tmp_path, monkeypatch):
+    """Verify a changed file is sniffed again instead of trusting the cache."""
+    monkeypatch.chdir(tmp_path)
+    cache_file = str(tmp_path / 'filetypes.json')
+    with open('blob', 'wb') as fh:
+        fh.write(b'\x00\x01\x02\x03')
+    classifier = filetypes.FileClassifier(cache_file)
+    classifier.sniff('blob', b'\x00\x01\x02\x03', os.stat('blob'))
+    classifier.save()
+
+    with open('blob', 'wb') as fh:
+        fh.write(b'now it is plain text')
+    assert filetypes.FileClassifier(cache_file).lookup('blob') is None
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    """Verify a corrupt cache file does not prevent classification."""
+    cache_file = tmp_path / 'filetypes.json'
+    cache_file.write_text('{not json')
+    assert filetypes.FileClassifier(str(cache_file)).lookup('readme.txt') is None
+
+
+def test_classifier_cache_file_depends_on_template_dir(tmp_path):
+    """Verify each template directory gets its own cache file."""
+    cache_dir = str(tmp_path)
+    first = filetypes.classifier_cache_file(cache_dir, 'one/{{cookiecutter.x}}')
+    second = filetypes.classifier_cache_file(cache_dir, 'two/{{cookiecutter.x}}')
+    assert first != second
+    assert os.path.dirname(first) == cache_dir
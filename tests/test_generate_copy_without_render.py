@@ -1,5 +1,6 @@
 """Verify correct work of `_copy_without_render` context option."""
 
+import fnmatch
 import os
 from pathlib import Path
 
@@ -74,3 +75,77 @@ def test_generate_copy_without_render_extensions():
         'test_copy_without_render/' 'test_copy_without_render-rendered/' 'README.md'
     ).read_text()
     assert '{{cookiecutter.render_test}}' in file_7
+
+
+@pytest.mark.parametrize(
+    'path',
+    [
+        'README.txt',
+        'docs/index.rst',
+        'assets/img/logo.png',
+        'assets',
+        '{{cookiecutter.repo_name}}-not-rendered',
+        'src/[weird].py',
+    ],
+)
+def test_copy_only_matcher(path):
+    """The compiled patterns match like `fnmatch.fnmatch` does."""
+    patterns = ['*.txt', 'assets/*', '*not-rendered', 'docs/*.rst', 'src/[[]*']
+    context = {'cookiecutter': {'_copy_without_render': patterns}}
+
+    expected = any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+    assert generate.is_copy_only_path(path, context) is expected
+
+
+@pytest.fixture
+def assets_template(tmp_path):
+    """Create a template with an assets tree below a rendered directory."""
+    repo_dir = tmp_path / 'template'
+    assets = repo_dir / '{{cookiecutter.repo_name}}' / 'assets'
+    (assets / 'fonts').mkdir(parents=True)
+    (assets / 'style.css').write_text('{{ not rendered }}\n')
+    (assets / 'fonts' / 'font.txt').write_text('{{ font }}\n')
+    return repo_dir
+
+
+ASSETS_CONTEXT = {
+    'cookiecutter': {'repo_name': 'project', '_copy_without_render': ['assets/*']}
+}
+
+
+def test_copy_only_tree_copied_at_once(mocker, assets_template, tmp_path):
+    """Directories whose contents all match are copied without walking them."""
+    generate_project_file = mocker.spy(generate, '_generate_project_file')
+
+    generate.generate_files(assets_template, ASSETS_CONTEXT, output_dir=tmp_path)
+
+    assets = tmp_path / 'project' / 'assets'
+    assert (assets / 'style.css').read_text() == '{{ not rendered }}\n'
+    assert (assets / 'fonts' / 'font.txt').read_text() == '{{ font }}\n'
+    assert not generate_project_file.called
+
+
+def test_copy_only_tree_with_rendered_names(assets_template, tmp_path):
+    """Names to render are still rendered in directories whose contents match."""
+    assets = assets_template / '{{cookiecutter.repo_name}}' / 'assets'
+    (assets / '{{cookiecutter.repo_name}}.css').write_text('{{ not rendered }}\n')
+
+    generate.generate_files(assets_template, ASSETS_CONTEXT, output_dir=tmp_path)
+
+    assert (tmp_path / 'project' / 'assets' / 'project.css').read_text() == (
+        '{{ not rendered }}\n'
+    )
+
+
+def test_copy_only_tree_existing_output(assets_template, tmp_path):
+    """Existing directories are not replaced by copies of their template."""
+    assets = tmp_path / 'project' / 'assets'
+    assets.mkdir(parents=True)
+    (assets / 'mine.css').write_text('mine\n')
+
+    generate.generate_files(
+        assets_template, ASSETS_CONTEXT, output_dir=tmp_path, overwrite_if_exists=True
+    )
+
+    assert (assets / 'mine.css').read_text() == 'mine\n'
+    assert (assets / 'style.css').read_text() == '{{ not rendered }}\n'
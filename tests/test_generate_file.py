@@ -3,14 +3,16 @@
 import json
 import os
 import re
+import tracemalloc
 from pathlib import Path
 
 import pytest
 from jinja2 import FileSystemLoader
-from jinja2.exceptions import TemplateSyntaxError
+from jinja2.exceptions import TemplateSyntaxError, UndefinedError
 
-from cookiecutter import generate
+from cookiecutter import generate, sinks
 from cookiecutter.environment import StrictEnvironment
+from cookiecutter.filetypes import SNIFF_SIZE
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -193,3 +195,264 @@ def test_generate_file_handles_mixed_line_endings(env, tmp_path):
         simple_text = f.readline()
     assert simple_text in ('newline is CRLF\r\n', 'newline is CRLF\n')
     assert f.newlines in ('\r\n', '\n')
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('plain text', False),
+        (b'plain bytes', False),
+        ('{{ cookiecutter.name }}', True),
+        ('{% if x %}{% endif %}', True),
+        (b'{# comment #}', True),
+    ],
+)
+def test_has_template_syntax(env, text, expected):
+    """Verify delimiters of the environment are detected in str and bytes."""
+    assert generate.has_template_syntax(text, env) is expected
+
+
+def test_has_template_syntax_custom_delimiters():
+    """Verify custom delimiters are honoured when looking for template syntax."""
+    env = StrictEnvironment(
+        variable_start_string='<<',
+        variable_end_string='>>',
+        line_statement_prefix='%%',
+    )
+    assert generate.has_template_syntax('<< cookiecutter.name >>', env)
+    assert generate.has_template_syntax('%% if x', env)
+    assert not generate.has_template_syntax('{{ cookiecutter.name }}', env)
+
+
+def test_generate_file_without_template_syntax_is_copied(
+    env, tmp_path, monkeypatch, mocker
+):
+    """Verify files without template syntax are copied and never rendered."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    infile = Path('plain.txt')
+    infile.write_bytes(b'no templating here\r\nat all\r\n')
+    from_source = mocker.spy(env, 'from_source')
+
+    copied = generate.generate_file(
+        project_dir='out',
+        infile=str(infile),
+        context={'cookiecutter': {}},
+        env=env,
+    )
+
+    assert copied is True
+    assert not from_source.called
+    assert (Path('out') / infile).read_bytes() == infile.read_bytes()
+
+
+def test_generate_file_without_template_syntax_uses_copyfile(
+    env, tmp_path, monkeypatch, mocker
+):
+    """Verify verbatim files are copied by the file system, not buffered."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    infile = Path('plain.txt')
+    infile.write_bytes(b'no templating here\n' * 100_000)
+    copyfile = mocker.spy(sinks.shutil, 'copyfile')
+    write_file = mocker.spy(sinks.LocalSink, 'write_file')
+
+    generate.generate_file(
+        project_dir='out',
+        infile=str(infile),
+        context={'cookiecutter': {}},
+        env=env,
+    )
+
+    copyfile.assert_called_once_with(str(infile), os.path.join('out', str(infile)))
+    assert not write_file.called
+    assert (Path('out') / infile).read_bytes() == infile.read_bytes()
+
+
+def test_generate_file_without_template_syntax_to_memory(env, tmp_path, monkeypatch):
+    """Verify verbatim files are still written to virtual sinks."""
+    monkeypatch.chdir(tmp_path)
+    Path('plain.txt').write_bytes(b'no templating here\n')
+    sink = sinks.MemorySink()
+
+    copied = generate.generate_file(
+        project_dir='out',
+        infile='plain.txt',
+        context={'cookiecutter': {}},
+        env=env,
+        sink=sink,
+    )
+
+    assert copied is True
+    assert sink.files == {'out/plain.txt': b'no templating here\n'}
+
+
+@pytest.mark.parametrize(
+    'contents, kind',
+    [
+        (b'x' * (generate.SCAN_CHUNK_SIZE - 1) + b'{{ x }}', 'rendered'),
+        (b'x' * (generate.SCAN_CHUNK_SIZE - 1) + b'\r\n', 'verbatim'),
+        (b'x' * (generate.SCAN_CHUNK_SIZE - 1) + b'\r\nx\n', 'rendered'),
+        (b'x\n' * generate.SCAN_CHUNK_SIZE, 'verbatim'),
+    ],
+)
+def test_file_output_scans_across_chunks(env, tmp_path, monkeypatch, contents, kind):
+    """Verify syntax and line endings split between chunks are found."""
+    monkeypatch.chdir(tmp_path)
+    Path('big.txt').write_bytes(b'a' * SNIFF_SIZE + contents)
+
+    kind_found, _, _ = generate._file_output(
+        'big.txt', {'cookiecutter': {}}, env, generate.FileClassifier(), render=False
+    )
+    assert kind_found == kind
+
+
+def test_generate_file_without_template_syntax_new_lines(env, tmp_path, monkeypatch):
+    """Verify `_new_lines` still applies to files without template syntax."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    infile = Path('plain.txt')
+    infile.write_bytes(b'no templating here\nat all')
+
+    copied = generate.generate_file(
+        project_dir='out',
+        infile=str(infile),
+        context={'cookiecutter': {'_new_lines': '\r\n'}},
+        env=env,
+    )
+
+    assert copied is False
+    outfile = Path('out') / infile
+    assert outfile.read_bytes() == b'no templating here\r\nat all'
+
+
+def test_generate_file_with_template_syntax_is_rendered(env):
+    """Verify generate_file reports files it had to render."""
+    copied = generate.generate_file(
+        project_dir=".",
+        infile='tests/files/{{cookiecutter.generate_file}}.txt',
+        context={'cookiecutter': {'generate_file': 'cheese'}},
+        env=env,
+    )
+    assert copied is False
+
+
+def test_generate_file_reads_text_file_once(env, tmp_path, monkeypatch, mocker):
+    """Verify a rendered text file is opened for reading a single time."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    Path('greeting.txt').write_text('Hello {{ cookiecutter.name }}\n')
+    real_open = open
+    reads = []
+
+    def tracking_open(file, mode='r', *args, **kwargs):
+        if 'w' not in mode:
+            reads.append(file)
+        return real_open(file, mode, *args, **kwargs)
+
+    mocker.patch('builtins.open', side_effect=tracking_open)
+    generate.generate_file(
+        project_dir='out',
+        infile='greeting.txt',
+        context={'cookiecutter': {'name': 'cheese'}},
+        env=env,
+    )
+
+    assert reads == ['greeting.txt']
+    assert Path('out', 'greeting.txt').read_text() == 'Hello cheese'
+
+
+def test_generate_file_copies_known_binary_without_reading(
+    env, tmp_path, monkeypatch, mocker
+):
+    """Verify files with a binary extension are copied without being sniffed."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    Path('logo.png').write_bytes(b'{{ not a template }}')
+    classifier = generate.FileClassifier()
+    sniff = mocker.spy(classifier, 'sniff')
+
+    generate.generate_file(
+        project_dir='out',
+        infile='logo.png',
+        context={'cookiecutter': {}},
+        env=env,
+        classifier=classifier,
+    )
+
+    assert not sniff.called
+    assert Path('out', 'logo.png').read_bytes() == b'{{ not a template }}'
+
+
+def test_generate_file_sniffs_binary_from_its_head(env, tmp_path, monkeypatch, mocker):
+    """Verify files of unknown type are sniffed from their head, then copied."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    contents = bytes(range(256)) * SNIFF_SIZE
+    Path('blob.dat').write_bytes(contents)
+    classifier = generate.FileClassifier()
+    sniff = mocker.spy(classifier, 'sniff')
+
+    kind, output, data = generate._file_output(
+        'blob.dat', {'cookiecutter': {}}, env, classifier
+    )
+    assert (kind, output, data) == ('binary', None, None)
+    assert len(sniff.call_args.args[1]) == SNIFF_SIZE
+
+    generate.generate_file(
+        project_dir='out',
+        infile='blob.dat',
+        context={'cookiecutter': {}},
+        env=env,
+        classifier=classifier,
+    )
+    assert Path('out', 'blob.dat').read_bytes() == contents
+
+
+def test_generate_file_streams_rendered_output(env, tmp_path, monkeypatch):
+    """Verify large outputs are written while rendering, not held in memory."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    Path('seed.sql').write_text(
+        '{% for i in range(cookiecutter.rows) %}'
+        'INSERT INTO t VALUES ({{ i }}, "{{ cookiecutter.name }}");\n'
+        '{% endfor %}'
+    )
+    rows = 40_000
+
+    tracemalloc.start()
+    try:
+        generate.generate_file(
+            project_dir='out',
+            infile='seed.sql',
+            context={'cookiecutter': {'rows': rows, 'name': 'x' * 20}},
+            env=env,
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    size = Path('out', 'seed.sql').stat().st_size
+    assert size > 1_500_000
+    assert peak < size / 4
+    with Path('out', 'seed.sql').open() as fh:
+        assert sum(1 for _ in fh) == rows
+
+
+def test_generate_file_streaming_error_leaves_no_file(env, tmp_path, monkeypatch):
+    """Verify a file failing to render halfway through is removed."""
+    monkeypatch.chdir(tmp_path)
+    Path('out').mkdir()
+    Path('broken.txt').write_text(
+        '{% for i in range(3) %}{{ i }}{% endfor %}{{ cookiecutter.missing }}'
+    )
+
+    with pytest.raises(UndefinedError):
+        generate.generate_file(
+            project_dir='out',
+            infile='broken.txt',
+            context={'cookiecutter': {}},
+            env=env,
+        )
+
+    assert not Path('out', 'broken.txt').exists()
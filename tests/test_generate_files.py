@@ -9,7 +9,8 @@ from pathlib import Path
 import pytest
 from binaryornot.check import is_binary
 
-from cookiecutter import exceptions, generate
+from cookiecutter import exceptions, generate, utils
+from cookiecutter.environment import StrictEnvironment
 
 
 def test_generate_files_nontemplated_exception(tmp_path):
@@ -431,3 +432,127 @@ def test_raise_undefined_variable_project_dir(tmp_path):
     assert error.context == {}
 
     assert not Path(tmp_path, 'testproject').exists()
+
+
+def _tree_contents(root):
+    """Map every file below ``root`` to its bytes and permission bits."""
+    return {
+        path.relative_to(root): (path.read_bytes(), path.stat().st_mode)
+        for path in Path(root).rglob('*')
+        if path.is_file()
+    }
+
+
+@pytest.mark.parametrize(
+    'repo_dir,context',
+    [
+        ('tests/test-generate-files', {'cookiecutter': {'food': 'pizzä'}}),
+        ('tests/test-generate-binaries', {'cookiecutter': {'binary_test': 'binary'}}),
+        (
+            'tests/test-generate-copy-without-render',
+            {
+                'cookiecutter': {
+                    'repo_name': 'test_copy_without_render',
+                    'render_test': 'I have been rendered!',
+                    '_copy_without_render': [
+                        '*not-rendered',
+                        'rendered/not_rendered.yml',
+                        '*.txt',
+                        '{{cookiecutter.repo_name}}-rendered/README.md',
+                    ],
+                }
+            },
+        ),
+    ],
+)
+def test_generate_files_with_jobs_matches_serial(tmp_path, repo_dir, context):
+    """Verify parallel rendering writes exactly what the serial path writes."""
+    serial_dir = generate.generate_files(
+        repo_dir=repo_dir, context=context, output_dir=tmp_path / 'serial'
+    )
+    parallel_dir = generate.generate_files(
+        repo_dir=repo_dir, context=context, output_dir=tmp_path / 'parallel', jobs=4
+    )
+
+    serial_files = _tree_contents(serial_dir)
+    assert serial_files
+    assert _tree_contents(parallel_dir) == serial_files
+
+
+def test_generate_files_with_jobs_and_skip_if_file_exists(tmp_path):
+    """Verify parallel rendering keeps `skip_if_file_exists` semantics."""
+    simple_file = Path(tmp_path, 'inputpizzä/simple.txt')
+    simple_file.parent.mkdir(parents=True)
+    simple_file.write_text('temp')
+
+    generate.generate_files(
+        context={'cookiecutter': {'food': 'pizzä'}},
+        repo_dir='tests/test-generate-files',
+        output_dir=tmp_path,
+        overwrite_if_exists=True,
+        skip_if_file_exists=True,
+        jobs=4,
+    )
+
+    assert simple_file.read_text(encoding='utf-8') == 'temp'
+    assert Path(tmp_path, 'inputpizzä/simple-with-newline.txt').is_file()
+
+
+def test_raise_undefined_variable_file_content_with_jobs(
+    output_dir, undefined_context
+):
+    """Verify parallel rendering reports failures like the serial path."""
+    with pytest.raises(exceptions.UndefinedVariableInTemplate) as err:
+        generate.generate_files(
+            repo_dir='tests/undefined-variable/file-content/',
+            output_dir=output_dir,
+            context=undefined_context,
+            jobs=4,
+        )
+    error = err.value
+    assert "Unable to create file 'README.rst'" == error.message
+    assert error.context == undefined_context
+
+    assert not Path(output_dir).joinpath('testproject').exists()
+
+
+def test_generate_files_reuses_template_cache(tmp_path, mocker):
+    """Verify a second bake from the same template compiles nothing."""
+    cache_dir = tmp_path / 'cache'
+    context = {'cookiecutter': {'food': 'pizzä'}}
+    generate.generate_files(
+        context=context,
+        repo_dir='tests/test-generate-files',
+        output_dir=tmp_path / 'first',
+        cache_dir=cache_dir,
+    )
+    assert list(cache_dir.iterdir())
+
+    compile_spy = mocker.spy(StrictEnvironment, 'compile')
+    project_dir = generate.generate_files(
+        context=context,
+        repo_dir='tests/test-generate-files',
+        output_dir=tmp_path / 'second',
+        cache_dir=cache_dir,
+    )
+
+    compile_spy.assert_not_called()
+    simple_text = Path(project_dir, 'simple.txt').read_text(encoding='utf-8')
+    assert simple_text == 'I eat pizzä\n'
+
+
+def test_generate_files_leaves_shared_env_alone(tmp_path):
+    """Verify a bake sets its loader and cache on an environment of its own."""
+    context = {'cookiecutter': {'food': 'pizzä'}}
+    shared_env = utils.create_env_with_context(context)
+
+    generate.generate_files(
+        context=context,
+        repo_dir='tests/test-generate-files',
+        output_dir=tmp_path,
+        cache_dir=tmp_path / 'cache',
+    )
+
+    assert shared_env.loader is None
+    assert shared_env.bytecode_cache is None
+    assert utils.create_env_with_context(context) is shared_env
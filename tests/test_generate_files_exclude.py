@@ -0,0 +1,182 @@
+"""Tests for leaving paths of a template out with `_exclude`."""
+
+import os
+
+import pytest
+
+from cookiecutter import generate, hooks, sinks
+from cookiecutter.utils import work_in
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with directories and files to leave out."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'docs' / 'authors').mkdir(parents=True)
+    (project / 'node_modules' / 'pkg').mkdir(parents=True)
+    (project / 'static' / 'fixtures').mkdir(parents=True)
+    (repo_dir / 'hooks').mkdir()
+    (project / 'README.md').write_text('# {{ cookiecutter.name }}\n')
+    (project / 'docs' / 'index.md').write_text('{{ cookiecutter.name }} docs\n')
+    # Excluded paths would fail to render.
+    (project / 'docs' / 'authors' / 'guide.md').write_text('{{ undefined }}\n')
+    (project / 'node_modules' / 'pkg' / 'index.js').write_text('{{ undefined }}\n')
+    (project / '{{cookiecutter.undefined}}.txt').write_text('name\n')
+    (project / 'static' / 'style.css').write_text('{{ not rendered }}\n')
+    (project / 'static' / 'fixtures' / 'data.json').write_text('{}\n')
+    (repo_dir / 'hooks' / 'post_gen_project.py').write_text(
+        'open("post.txt", "w").close()\n'
+    )
+    (repo_dir / 'hooks' / 'pre_gen_project.py').write_text(
+        'open("pre.txt", "w").close()\n'
+    )
+    return repo_dir
+
+
+CONTEXT = {
+    'cookiecutter': {
+        'name': 'project',
+        '_copy_without_render': ['static'],
+        '_exclude': [
+            'docs/authors',
+            'node_modules',
+            '*/fixtures',
+            '{{cookiecutter.undefined}}.txt',
+            'hooks/post_gen_project.*',
+        ],
+    }
+}
+
+
+def tree(path):
+    """Return the relative paths of all files and directories below ``path``."""
+    return sorted(
+        os.path.relpath(os.path.join(root, name), path).replace(os.sep, '/')
+        for root, dirs, files in os.walk(path)
+        for name in dirs + files
+    )
+
+
+EXPECTED = [
+    'README.md',
+    'docs',
+    'docs/index.md',
+    'pre.txt',
+    'static',
+    'static/style.css',
+]
+
+
+def test_generate_files_exclude(mocker, template, tmp_path):
+    """Excluded paths are neither walked, rendered nor created."""
+    walked = []
+    os_walk = os.walk
+
+    def walk(top, *args, **kwargs):
+        for root, dirs, files in os_walk(top, *args, **kwargs):
+            walked.append(os.path.normpath(root))
+            yield root, dirs, files
+
+    mocker.patch('os.walk', side_effect=walk)
+    generate_project_file = mocker.spy(generate, '_generate_project_file')
+
+    generate.generate_files(template, CONTEXT, output_dir=tmp_path / 'out')
+
+    assert tree(tmp_path / 'out' / 'project') == EXPECTED
+    assert 'node_modules' not in walked
+    assert os.path.join('docs', 'authors') not in walked
+    generated = sorted(call.args[1] for call in generate_project_file.call_args_list)
+    assert generated == ['README.md', os.path.join('docs', 'index.md')]
+
+
+def test_generate_files_exclude_incremental(template, tmp_path):
+    """Incremental regeneration leaves excluded paths out of copied dirs."""
+    output_dir = tmp_path / 'out'
+    generate.generate_files(template, CONTEXT, output_dir=output_dir)
+    fixtures = output_dir / 'project' / 'static' / 'fixtures'
+    fixtures.mkdir()
+
+    generate.generate_files(
+        template,
+        CONTEXT,
+        output_dir=output_dir,
+        overwrite_if_exists=True,
+        incremental=True,
+        cache_dir=tmp_path / 'cache',
+    )
+
+    assert not fixtures.exists()
+
+
+def test_generate_files_exclude_sink(template, tmp_path):
+    """Sinks do not get the excluded paths of copied dirs either."""
+    sink = sinks.MemorySink(tmp_path)
+
+    generate.generate_files(template, CONTEXT, output_dir=tmp_path, sink=sink)
+
+    assert sorted(sink.files) == [
+        'project/README.md',
+        'project/docs/index.md',
+        'project/static/style.css',
+    ]
+
+
+def test_plan_files_exclude(template, tmp_path):
+    """Plans leave excluded paths out."""
+    plan = generate.plan_files(template, CONTEXT, output_dir=tmp_path)
+
+    assert sorted(entry.path.replace(os.sep, '/') for entry in plan) == [
+        'project',
+        'project/README.md',
+        'project/docs',
+        'project/docs/index.md',
+        'project/static',
+        'project/static/style.css',
+    ]
+
+
+@pytest.mark.parametrize(
+    'path, excluded',
+    [
+        ('node_modules', True),
+        ('docs/authors', True),
+        ('docs/index.md', False),
+        ('src/fixtures', True),
+        ('fixtures', False),
+    ],
+)
+def test_is_excluded_path(path, excluded):
+    """Paths are matched against the patterns of `_exclude`."""
+    assert generate.is_excluded_path(path, CONTEXT) is excluded
+
+
+def test_generate_files_exclude_hooks_dir(template, tmp_path):
+    """Hooks below an excluded directory are not run."""
+    exclude = CONTEXT['cookiecutter']['_exclude'][:-1] + ['hooks']
+    context = {'cookiecutter': dict(CONTEXT['cookiecutter'], _exclude=exclude)}
+
+    generate.generate_files(template, context, output_dir=tmp_path / 'out')
+
+    assert not (tmp_path / 'out' / 'project' / 'pre.txt').exists()
+    assert not (tmp_path / 'out' / 'project' / 'post.txt').exists()
+
+
+@pytest.mark.parametrize(
+    'pattern, excluded',
+    [
+        ('hooks', True),
+        ('hooks/nested', True),
+        ('hooks/nested/pre_gen_project.py', True),
+        ('*/pre_gen_project.*', True),
+        ('hooks/pre_gen_project.py', False),
+        ('nested', False),
+    ],
+)
+def test_is_excluded_hook_nested(template, pattern, excluded):
+    """Hook scripts are matched by their path in the template dir."""
+    script = template / 'hooks' / 'nested' / 'pre_gen_project.py'
+    context = {'cookiecutter': {'_exclude': [pattern]}}
+
+    with work_in(template):
+        assert hooks._is_excluded_hook(str(script), context) is excluded
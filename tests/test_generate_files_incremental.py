@@ -0,0 +1,195 @@
+"""Tests for incremental runs of `generate_files`."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from cookiecutter import generate
+from cookiecutter.environment import StrictEnvironment
+from cookiecutter.manifest import GenerationManifest, manifest_file
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with rendered, plain, binary and copy-only files."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'assets').mkdir(parents=True)
+    (project / 'README.md').write_text('# {{ cookiecutter.title }}\n')
+    (project / 'plain.txt').write_text('Nothing to render here\n')
+    (project / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n\x00\x01')
+    (project / 'assets' / 'style.css').write_text('{{ not rendered }}\n')
+    return repo_dir
+
+
+def bake(template, tmp_path, **context):
+    """Regenerate the project incrementally and return its directory."""
+    context = {
+        'name': 'project',
+        'title': 'Title',
+        '_copy_without_render': ['assets'],
+        **context,
+    }
+    return Path(
+        generate.generate_files(
+            repo_dir=template,
+            context={'cookiecutter': context},
+            output_dir=tmp_path / 'out',
+            overwrite_if_exists=True,
+            cache_dir=tmp_path / 'cache',
+            incremental=True,
+        )
+    )
+
+
+def age(project_dir):
+    """Set the modification time of every output file far in the past."""
+    for root, _, files in os.walk(project_dir):
+        for name in files:
+            os.utime(os.path.join(root, name), ns=(0, 0))
+
+
+def mtimes(project_dir):
+    """Return the modification times of the output files, by relative path."""
+    return {
+        str(path.relative_to(project_dir)): path.stat().st_mtime_ns
+        for path in project_dir.rglob('*')
+        if path.is_file()
+    }
+
+
+def test_incremental_skips_unchanged_files(mocker, template, tmp_path):
+    """A run with the same template and context does not touch any file."""
+    project_dir = bake(template, tmp_path)
+    assert (project_dir / 'README.md').read_text() == '# Title\n'
+
+    write_output = mocker.spy(generate, '_write_output')
+    copy_output = mocker.spy(generate, '_copy_output')
+    from_source = mocker.spy(StrictEnvironment, 'from_source')
+    bake(template, tmp_path)
+
+    assert not write_output.called
+    assert not copy_output.called
+    assert not from_source.called
+
+
+def test_incremental_rewrites_only_changed_outputs(template, tmp_path):
+    """A context change only writes the outputs whose contents change."""
+    project_dir = bake(template, tmp_path)
+    age(project_dir)
+
+    bake(template, tmp_path, title='Other title')
+
+    assert (project_dir / 'README.md').read_text() == '# Other title\n'
+    assert {path for path, mtime in mtimes(project_dir).items() if mtime} == {
+        'README.md'
+    }
+
+
+def test_incremental_regenerates_changed_template(mocker, template, tmp_path):
+    """Only the files whose template changed are generated again."""
+    project_dir = bake(template, tmp_path)
+    (template / '{{cookiecutter.name}}' / 'plain.txt').write_text('Changed\n')
+
+    write_output = mocker.spy(generate, '_write_output')
+    copy_output = mocker.spy(generate, '_copy_output')
+    bake(template, tmp_path)
+
+    calls = write_output.call_args_list + copy_output.call_args_list
+    assert [call.args[0] for call in calls] == ['plain.txt']
+    assert (project_dir / 'plain.txt').read_text() == 'Changed\n'
+
+
+def test_incremental_regenerates_changed_include(template, tmp_path):
+    """A file is generated again when a template it includes changes."""
+    project = template / '{{cookiecutter.name}}'
+    (project / 'partials').mkdir()
+    (project / 'partials' / 'header.txt').write_text('Header\n')
+    (project / 'main.txt').write_text(
+        "{% include 'partials/header.txt' %}{{ cookiecutter.title }}\n"
+    )
+    project_dir = bake(template, tmp_path)
+    assert (project_dir / 'main.txt').read_text() == 'Header\nTitle\n'
+
+    (project / 'partials' / 'header.txt').write_text('New header\n')
+    bake(template, tmp_path)
+
+    assert (project_dir / 'main.txt').read_text() == 'New header\nTitle\n'
+
+
+def test_incremental_ignores_volatile_context(mocker, template, tmp_path):
+    """Where a project is generated from does not invalidate the manifest."""
+    (template / '{{cookiecutter.name}}' / 'origin.txt').write_text(
+        '{{ cookiecutter._repo_dir }}\n'
+    )
+    project_dir = bake(template, tmp_path, _repo_dir='/tmp/one')
+
+    write_output = mocker.spy(generate, '_write_output')
+    bake(template, tmp_path, _repo_dir='/tmp/two')
+
+    assert [call.args[0] for call in write_output.call_args_list] == ['origin.txt']
+    assert (project_dir / 'origin.txt').read_text() == '/tmp/two\n'
+
+
+def test_incremental_restores_modified_output(template, tmp_path):
+    """An output changed since the last run is generated again."""
+    project_dir = bake(template, tmp_path)
+    (project_dir / 'README.md').write_text('edited\n')
+    (project_dir / 'assets' / 'style.css').write_text('edited\n')
+
+    bake(template, tmp_path)
+
+    assert (project_dir / 'README.md').read_text() == '# Title\n'
+    assert (project_dir / 'assets' / 'style.css').read_text() == (
+        '{{ not rendered }}\n'
+    )
+
+
+def test_incremental_syncs_copy_only_dirs(template, tmp_path):
+    """Files removed from a copy-only directory are removed from the output."""
+    project_dir = bake(template, tmp_path)
+    (project_dir / 'assets' / 'stale').mkdir()
+    (project_dir / 'assets' / 'stale' / 'old.css').write_text('old\n')
+    (project_dir / 'assets' / 'old.css').write_text('old\n')
+    age(project_dir)
+
+    bake(template, tmp_path)
+
+    assert sorted(mtimes(project_dir)) == [
+        'README.md',
+        'assets/style.css',
+        'logo.png',
+        'plain.txt',
+    ]
+    assert not any(mtimes(project_dir).values())
+
+
+def test_manifest_discarded_on_context_change(tmp_path, monkeypatch):
+    """Entries recorded with another context are not trusted."""
+    monkeypatch.chdir(tmp_path)
+    Path('in.txt').write_text('data')
+    Path('project').mkdir()
+    outfile = str(tmp_path / 'project' / 'out.txt')
+    cache_file = manifest_file(tmp_path / 'cache', tmp_path / 'project')
+
+    manifest = GenerationManifest(str(tmp_path / 'project'), 'one', cache_file)
+    assert manifest.write('in.txt', outfile, b'data', b'data')
+    manifest.save()
+
+    assert GenerationManifest(
+        str(tmp_path / 'project'), 'one', cache_file
+    ).is_current('in.txt', outfile)
+    assert not GenerationManifest(
+        str(tmp_path / 'project'), 'two', cache_file
+    ).is_current('in.txt', outfile)
+
+
+def test_manifest_unreadable(tmp_path):
+    """An unreadable manifest is ignored."""
+    cache_file = tmp_path / 'manifest.json'
+    cache_file.write_text('{not json')
+
+    manifest = GenerationManifest(str(tmp_path), 'context', cache_file)
+
+    assert not manifest.is_current('in.txt', str(tmp_path / 'out.txt'))
@@ -0,0 +1,205 @@
+"""Tests for generating new projects in a staging directory."""
+
+import errno
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from cookiecutter import exceptions, generate
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with a couple of files."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'src').mkdir(parents=True)
+    (project / 'README.md').write_text('# {{ cookiecutter.name }}\n')
+    (project / 'src' / 'main.py').write_text('print("{{ cookiecutter.name }}")\n')
+    return repo_dir
+
+
+CONTEXT = {'cookiecutter': {'name': 'project'}}
+
+
+def wait_for_discards():
+    """Wait for the trees being removed in the background."""
+    for thread in threading.enumerate():
+        if thread.name.startswith('discard '):
+            thread.join()
+
+
+def test_new_project_appears_complete(mocker, template, tmp_path):
+    """The project is only moved to its final location once complete."""
+    output_dir = tmp_path / 'out'
+    seen = []
+    generate_file = generate.generate_file
+
+    def check(project_dir, *args, **kwargs):
+        seen.append((output_dir / 'project').exists())
+        assert Path(project_dir).name == 'project'
+        assert Path(project_dir).parent.name.startswith(generate.STAGING_PREFIX)
+        return generate_file(project_dir, *args, **kwargs)
+
+    mocker.patch('cookiecutter.generate.generate_file', side_effect=check)
+
+    project_dir = generate.generate_files(template, CONTEXT, output_dir=output_dir)
+
+    assert project_dir == str(output_dir / 'project')
+    assert seen == [False, False]
+    assert (output_dir / 'project' / 'src' / 'main.py').read_text() == (
+        'print("project")\n'
+    )
+    assert os.listdir(output_dir) == ['project']
+
+
+def test_failed_project_is_discarded(template, tmp_path):
+    """Nothing is left behind by a project that failed to generate."""
+    output_dir = tmp_path / 'out'
+    (template / '{{cookiecutter.name}}' / 'bad.txt').write_text(
+        '{{ cookiecutter.missing }}'
+    )
+
+    with pytest.raises(exceptions.UndefinedVariableInTemplate):
+        generate.generate_files(template, CONTEXT, output_dir=output_dir)
+    wait_for_discards()
+
+    assert os.listdir(output_dir) == []
+
+
+def test_failed_project_is_kept(template, tmp_path):
+    """With keep_project_on_failure, the partial project is moved in place."""
+    output_dir = tmp_path / 'out'
+    (template / '{{cookiecutter.name}}' / 'bad.txt').write_text(
+        '{{ cookiecutter.missing }}'
+    )
+
+    with pytest.raises(exceptions.UndefinedVariableInTemplate):
+        generate.generate_files(
+            template, CONTEXT, output_dir=output_dir, keep_project_on_failure=True
+        )
+
+    assert os.listdir(output_dir) == ['project']
+    assert (output_dir / 'project' / 'README.md').is_file()
+
+
+def test_existing_project_is_generated_in_place(mocker, template, tmp_path):
+    """An existing project is overwritten in place, keeping other files."""
+    project = tmp_path / 'out' / 'project'
+    project.mkdir(parents=True)
+    (project / 'notes.txt').write_text('mine\n')
+    publish = mocker.spy(generate, '_publish_staged')
+
+    generate.generate_files(
+        template, CONTEXT, output_dir=tmp_path / 'out', overwrite_if_exists=True
+    )
+
+    assert not publish.called
+    assert (project / 'notes.txt').read_text() == 'mine\n'
+    assert (project / 'README.md').read_text() == '# project\n'
+
+
+def test_project_created_meanwhile(mocker, template, tmp_path):
+    """A project appearing while generating its staged copy is not replaced."""
+    output_dir = tmp_path / 'out'
+    generate_file = generate.generate_file
+
+    def create_target(*args, **kwargs):
+        (output_dir / 'project').mkdir(exist_ok=True)
+        (output_dir / 'project' / 'other.txt').write_text('other\n')
+        return generate_file(*args, **kwargs)
+
+    mocker.patch('cookiecutter.generate.generate_file', side_effect=create_target)
+
+    with pytest.raises(exceptions.OutputDirExistsException):
+        generate.generate_files(template, CONTEXT, output_dir=output_dir)
+    wait_for_discards()
+
+    assert os.listdir(output_dir) == ['project']
+    assert os.listdir(output_dir / 'project') == ['other.txt']
+
+
+def test_project_failing_to_move(mocker, template, tmp_path):
+    """Errors moving the project other than an existing target are raised."""
+    output_dir = tmp_path / 'out'
+    error = OSError(errno.EXDEV, 'Invalid cross-device link')
+    mocker.patch('cookiecutter.generate.os.rename', side_effect=error)
+
+    with pytest.raises(OSError) as excinfo:
+        generate.generate_files(template, CONTEXT, output_dir=output_dir)
+    wait_for_discards()
+
+    assert excinfo.value is error
+    assert os.listdir(output_dir) == []
+
+
+def test_project_in_missing_directory(template, tmp_path):
+    """A project name pointing into a missing directory is not reported as existing."""
+    output_dir = tmp_path / 'out'
+
+    with pytest.raises(FileNotFoundError):
+        generate.generate_files(
+            template, {'cookiecutter': {'name': 'x/y'}}, output_dir=output_dir
+        )
+
+
+@pytest.mark.parametrize('hook_name', ['pre_gen_project', 'post_gen_project'])
+def test_hook_writing_next_to_project(template, tmp_path, hook_name):
+    """Files a hook writes next to the project end up in the output dir."""
+    output_dir = tmp_path / 'out'
+    (template / 'hooks').mkdir()
+    (template / 'hooks' / f'{hook_name}.py').write_text(
+        "import os\n"
+        "assert os.path.basename(os.getcwd()) == 'project'\n"
+        "with open(os.path.join('..', 'project.log'), 'w') as log:\n"
+        "    log.write('hooked')\n"
+    )
+
+    project_dir = generate.generate_files(template, CONTEXT, output_dir=output_dir)
+
+    assert project_dir == str(output_dir / 'project')
+    assert sorted(os.listdir(output_dir)) == ['project', 'project.log']
+    assert (output_dir / 'project.log').read_text() == 'hooked'
+
+
+def test_post_gen_hook_runs_in_final_location(template, tmp_path):
+    """The post_gen_project hook runs on the project moved into place."""
+    output_dir = tmp_path / 'out'
+    (template / 'hooks').mkdir()
+    (template / 'hooks' / 'post_gen_project.py').write_text(
+        "import os\n"
+        "with open('cwd.txt', 'w') as f:\n"
+        "    f.write(os.getcwd())\n"
+    )
+
+    generate.generate_files(template, CONTEXT, output_dir=output_dir)
+
+    cwd = (output_dir / 'project' / 'cwd.txt').read_text()
+    assert os.path.samefile(cwd, output_dir / 'project')
+
+
+def test_kept_project_keeps_original_error(mocker, template, tmp_path):
+    """The original error is raised when a failed project cannot be kept."""
+    output_dir = tmp_path / 'out'
+    (template / '{{cookiecutter.name}}' / 'bad.txt').write_text(
+        '{{ cookiecutter.missing }}'
+    )
+    generate_file = generate.generate_file
+
+    def create_target(*args, **kwargs):
+        (output_dir / 'project').mkdir(exist_ok=True)
+        (output_dir / 'project' / 'other.txt').write_text('other\n')
+        return generate_file(*args, **kwargs)
+
+    mocker.patch('cookiecutter.generate.generate_file', side_effect=create_target)
+
+    with pytest.raises(exceptions.UndefinedVariableInTemplate):
+        generate.generate_files(
+            template, CONTEXT, output_dir=output_dir, keep_project_on_failure=True
+        )
+    wait_for_discards()
+
+    assert os.listdir(output_dir) == ['project']
+    assert os.listdir(output_dir / 'project') == ['other.txt']
@@ -7,7 +7,7 @@ from pathlib import Path
 
 import pytest
 
-from cookiecutter import generate, utils
+from cookiecutter import generate, hooks, utils
 from cookiecutter.exceptions import FailedHookException
 
 WINDOWS = sys.platform.startswith('win')
@@ -56,6 +56,21 @@ def test_run_python_hooks():
     assert os.path.exists('tests/test-pyhooks/inputpyhooks/python_post.txt')
 
 
+@pytest.mark.usefixtures('clean_system', 'remove_additional_folders')
+def test_run_python_hooks_in_process(mocker):
+    """Verify python hooks can run without starting a new interpreter."""
+    popen = mocker.spy(hooks.subprocess, 'Popen')
+    generate.generate_files(
+        context={'cookiecutter': {'pyhooks': 'pyhooks'}},
+        repo_dir='tests/test-pyhooks/',
+        output_dir='tests/test-pyhooks/',
+        hook_executor=hooks.InProcessHookExecutor(),
+    )
+    assert os.path.exists('tests/test-pyhooks/inputpyhooks/python_pre.txt')
+    assert os.path.exists('tests/test-pyhooks/inputpyhooks/python_post.txt')
+    assert not popen.called
+
+
 @pytest.mark.usefixtures('clean_system', 'remove_additional_folders')
 def test_run_python_hooks_cwd():
     """Verify pre and post generation python hooks executed and result in current dir.
@@ -149,3 +149,33 @@ def test_get_config_invalid_file_with_multiple_docs():
     with pytest.raises(InvalidConfiguration) as exc_info:
         config.get_config('tests/test-config/invalid-config-w-multiple-docs.yaml')
     assert expected_error_msg in str(exc_info.value)
+
+
+def test_get_config_cached(mocker, tmp_path):
+    """A config file is only parsed again once it changed."""
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text('replay_dir: /replay\n')
+    yaml_load = mocker.spy(yaml, 'load')
+
+    first = config.get_config(str(config_file))
+    first['default_context']['name'] = 'changed'
+    second = config.get_config(str(config_file))
+    assert yaml_load.call_count == 1
+    assert second == {**first, 'default_context': {}}
+    assert config.DEFAULT_CONFIG['default_context'] == {}
+
+    config_file.write_text('replay_dir: /other/replay\n')
+    assert config.get_config(str(config_file))['replay_dir'] == '/other/replay'
+    assert yaml_load.call_count == 2
+
+
+def test_get_config_cached_values_not_shared(tmp_path):
+    """Changing the values of a config does not change the cached config."""
+    config_file = tmp_path / 'config.yaml'
+    config_file.write_text('default_context:\n  license:\n    - MIT\n    - BSD\n')
+
+    first = config.get_config(str(config_file))
+    first['default_context']['license'].reverse()
+    second = config.get_config(str(config_file))
+
+    assert second['default_context']['license'] == ['MIT', 'BSD']
@@ -2,6 +2,7 @@
 
 import errno
 import os
+import pickle
 import stat
 import sys
 import textwrap
@@ -217,6 +218,14 @@ class TestExternalHooks:
             hooks.run_hook('post_gen_project', tests_dir, {})
             assert os.path.isfile(os.path.join(tests_dir, 'shell_post.txt'))
 
+    def test_run_hook_with_worker_pool(self):
+        """Execute Python hooks on a worker pool and the others in a shell."""
+        tests_dir = os.path.join(self.repo_path, 'input{{hooks}}')
+        with utils.work_in(self.repo_path), hooks.HookWorkerPool() as pool:
+            hooks.run_hook('pre_gen_project', tests_dir, {}, pool)
+            assert os.path.isfile(os.path.join(tests_dir, 'python_pre.txt'))
+            assert os.path.isfile(os.path.join(tests_dir, 'shell_pre.txt'))
+
     def test_run_failing_hook(self):
         """Test correct exception raise if hook exit code is not zero."""
         hook_path = os.path.join(self.hooks_path, 'pre_gen_project.py')
@@ -273,3 +282,151 @@ def test_ignore_hook_backup_files(monkeypatch, dir_with_hooks):
     monkeypatch.chdir(dir_with_hooks)
     assert hooks.find_hook('pre_gen_project') is None
     assert hooks.find_hook('post_gen_project') is None
+
+
+@pytest.fixture
+def python_hook(tmp_path):
+    """Return a function writing a Python hook script into ``tmp_path``."""
+
+    def write_hook(source):
+        hook_file = tmp_path.joinpath('hooks', 'post_gen_project.py')
+        hook_file.parent.mkdir(exist_ok=True)
+        hook_file.write_text(textwrap.dedent(source), encoding='utf8')
+        return str(hook_file)
+
+    return write_hook
+
+
+def test_run_script_with_context_in_process(mocker, python_hook, tmp_path):
+    """A Python hook can run in this interpreter, rendered and from its cwd."""
+    popen = mocker.spy(hooks.subprocess, 'Popen')
+    hook_file = python_hook(
+        """
+        import os
+        import sys
+
+        assert __name__ == '__main__'
+        assert sys.argv == [__file__]
+        assert sys.path[0] == os.path.dirname(__file__)
+        with open('{{ cookiecutter.file }}', 'w') as f:
+            f.write(os.getcwd())
+        """
+    )
+    project_dir = tmp_path.joinpath('project')
+    project_dir.mkdir()
+    cwd, argv, path = os.getcwd(), sys.argv[:], sys.path[:]
+
+    hooks.run_script_with_context(
+        hook_file,
+        str(project_dir),
+        {'cookiecutter': {'file': 'context_post.txt'}},
+        executor=hooks.InProcessHookExecutor(),
+    )
+
+    assert project_dir.joinpath('context_post.txt').read_text() == str(project_dir)
+    assert not popen.called
+    assert (os.getcwd(), sys.argv, sys.path) == (cwd, argv, path)
+
+
+@pytest.mark.parametrize('exit_call', ['sys.exit()', 'sys.exit(0)'])
+def test_run_python_in_process_exit_success(python_hook, tmp_path, exit_call):
+    """Exiting with a success status does not fail the hook."""
+    hook_file = python_hook(f'import sys\n{exit_call}\nraise RuntimeError\n')
+
+    hooks.run_script_with_context(
+        hook_file, str(tmp_path), {}, executor=hooks.InProcessHookExecutor()
+    )
+
+
+@pytest.mark.parametrize(
+    'source, message',
+    [
+        ('import sys\nsys.exit(3)\n', 'exit status: 3'),
+        ('import sys\nsys.exit("abort")\n', 'exit status: 1'),
+        ('raise ValueError("boom")\n', "ValueError('boom')"),
+        ('def broken(:\n', 'invalid syntax'),
+    ],
+)
+def test_run_python_in_process_failure(python_hook, tmp_path, source, message):
+    """Failures of an in-process hook raise `FailedHookException`."""
+    hook_file = python_hook(source)
+    cwd = os.getcwd()
+
+    with pytest.raises(exceptions.FailedHookException) as excinfo:
+        hooks.run_script_with_context(
+            hook_file, str(tmp_path), {}, executor=hooks.InProcessHookExecutor()
+        )
+
+    assert message in str(excinfo.value)
+    assert os.getcwd() == cwd
+
+
+@pytest.fixture
+def hook_pool():
+    """Yield a `HookWorkerPool` with a single worker."""
+    with hooks.HookWorkerPool() as pool:
+        yield pool
+
+
+def test_hook_worker_pool_execute(hook_pool, tmp_path, monkeypatch):
+    """A worker runs the hook from its cwd and with the current environment."""
+    monkeypatch.setenv('COOKIECUTTER_HOOK_TEST', 'from the pool')
+    result = hook_pool.execute(
+        textwrap.dedent(
+            """
+            import os
+            import sys
+            print(os.environ['COOKIECUTTER_HOOK_TEST'], os.getcwd())
+            print('oops', file=sys.stderr)
+            sys.exit(4)
+            """
+        ),
+        str(tmp_path.joinpath('hooks', 'post_gen_project.py')),
+        str(tmp_path),
+    )
+
+    assert result == hooks.HookResult(4, f'from the pool {tmp_path}\n', 'oops\n')
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Hooks run in forked children')
+def test_hook_worker_pool_isolates_hooks(hook_pool, tmp_path):
+    """A hook can neither crash the worker nor leak state into the next hook."""
+    hook_file = str(tmp_path.joinpath('post_gen_project.py'))
+    crash = 'import json, os\njson.leaked = True\nos.kill(os.getpid(), 9)\n'
+    check = 'import json\nassert not hasattr(json, "leaked")\n'
+
+    assert hook_pool.execute(crash, hook_file, str(tmp_path)).exit_status == -9
+    assert hook_pool.execute(check, hook_file, str(tmp_path)).exit_status == 0
+
+
+def test_hook_worker_pool_run(hook_pool, tmp_path, capfd):
+    """Running a hook replays its output and raises when it fails."""
+    hook_file = str(tmp_path.joinpath('post_gen_project.py'))
+
+    hook_pool.run('print("pre generation hook")\n', hook_file, str(tmp_path))
+    with pytest.raises(exceptions.FailedHookException) as excinfo:
+        hook_pool.run('raise ValueError("boom")\n', hook_file, str(tmp_path))
+
+    assert 'exit status: 1' in str(excinfo.value)
+    out, err = capfd.readouterr()
+    assert out == 'pre generation hook\n'
+    assert "ValueError: boom" in err
+
+
+def test_hook_worker_pool_replaces_dead_worker(hook_pool, tmp_path):
+    """A worker that died is reported as a failed hook and replaced."""
+    hook_file = str(tmp_path.joinpath('post_gen_project.py'))
+    worker = next(iter(hook_pool._workers))
+    worker.kill()
+    worker.wait()
+
+    with pytest.raises(exceptions.FailedHookException, match='Hook worker failed'):
+        hook_pool.execute('pass\n', hook_file, str(tmp_path))
+    assert hook_pool.execute('pass\n', hook_file, str(tmp_path)).exit_status == 0
+
+
+def test_hook_worker_pool_pickle(hook_pool):
+    """A pickled pool comes back as a new pool of the same size."""
+    with pickle.loads(pickle.dumps(hook_pool)) as copy:
+        assert copy.size == hook_pool.size
+        assert not copy._workers & hook_pool._workers
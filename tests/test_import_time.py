@@ -0,0 +1,62 @@
+"""Tests for the time taken to start the command line."""
+
+import subprocess
+import sys
+
+import pytest
+
+#: Dependencies of a bake that the command line must import only when used.
+HEAVY_MODULES = {
+    'arrow', 'binaryornot', 'jinja2', 'requests', 'rich', 'slugify', 'yaml'
+}
+
+#: Cumulative import time allowed for `cookiecutter.cli`, in seconds. It takes
+#: around 50 ms, most of it in click, and took over 300 ms when it imported
+#: everything a bake needs.
+CLI_IMPORT_BUDGET = 0.2
+
+
+def run_with_import_times(*args):
+    """Run Python with ``-X importtime`` and return its output and import times."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            _, cumulative, name = line.split('|')
+            times[name.strip()] = int(cumulative) / 1e6
+    return result.stdout, times
+
+
+@pytest.mark.parametrize('option', ['--version', '--help'])
+def test_cli_does_not_import_bake_dependencies(option):
+    """``--version`` and ``--help`` do not import what only bakes need."""
+    stdout, times = run_with_import_times('-m', 'cookiecutter', option)
+
+    assert stdout
+    assert 'cookiecutter.cli' in times
+    assert not HEAVY_MODULES & {name.split('.')[0] for name in times}
+    assert 'cookiecutter.main' not in times
+
+
+def test_cli_import_budget():
+    """Importing the command line stays within its budget."""
+    best = min(
+        run_with_import_times('-c', 'import cookiecutter.cli')[1]['cookiecutter.cli']
+        for _ in range(3)
+    )
+
+    assert best < CLI_IMPORT_BUDGET
+
+
+def test_main_imports_optional_dependencies_lazily():
+    """Prompts, downloads and some extensions import their dependencies on use."""
+    _, times = run_with_import_times('-c', 'import cookiecutter.main')
+
+    assert not {'arrow', 'requests', 'rich', 'slugify'} & {
+        name.split('.')[0] for name in times
+    }
@@ -1,5 +1,10 @@
 """Collection of tests around cookiecutter's replay feature."""
 
+import os
+
+import pytest
+
+from cookiecutter.config import get_user_config
 from cookiecutter.main import cookiecutter
 
 
@@ -114,3 +119,59 @@ def test_custom_replay_file(monkeypatch, mocker, user_config_file):
         '.',
         'custom-replay-file',
     )
+
+
+def test_template_cache_dir(mocker, user_config_data, user_config_file):
+    """Verify compiled templates are cached below the cookiecutters dir."""
+    mock_generate_files = mocker.patch('cookiecutter.main.generate_files')
+    cookiecutter('tests/fake-repo-tmpl', no_input=True, config_file=user_config_file)
+
+    assert mock_generate_files.call_args[1]['cache_dir'] == os.path.join(
+        user_config_data['cookiecutters_dir'], '.template_cache'
+    )
+
+
+def test_template_cache_disabled(mocker, user_config_file):
+    """Verify the compiled-template cache can be turned off."""
+    mock_generate_files = mocker.patch('cookiecutter.main.generate_files')
+    cookiecutter(
+        'tests/fake-repo-tmpl',
+        no_input=True,
+        config_file=user_config_file,
+        template_cache=False,
+    )
+
+    assert mock_generate_files.call_args[1]['cache_dir'] is None
+
+
+def test_repo_cache_releases_clone_lock(mocker, user_config_file):
+    """Verify the lock on a cached clone is released even when baking fails."""
+    mocker.patch(
+        'cookiecutter.main.determine_repo_dir',
+        return_value=('tests/fake-repo-tmpl', False),
+    )
+    mocker.patch('cookiecutter.main.generate_files', side_effect=RuntimeError)
+    release = mocker.patch('cookiecutter.main.release_clone_lock')
+
+    with pytest.raises(RuntimeError):
+        cookiecutter(
+            'https://github.com/foo/bar',
+            no_input=True,
+            config_file=user_config_file,
+            repo_cache=True,
+        )
+
+    release.assert_called_once_with('tests/fake-repo-tmpl')
+
+
+def test_config_passed_in(mocker, user_config_data, user_config_file):
+    """A config loaded once is used without loading it again."""
+    config = get_user_config(config_file=user_config_file)
+    mocker.patch('cookiecutter.main.get_user_config', side_effect=AssertionError)
+    mock_generate_files = mocker.patch('cookiecutter.main.generate_files')
+
+    cookiecutter('tests/fake-repo-tmpl', no_input=True, config=config)
+
+    assert mock_generate_files.call_args[1]['cache_dir'] == os.path.join(
+        user_config_data['cookiecutters_dir'], '.template_cache'
+    )
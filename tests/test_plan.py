@@ -0,0 +1,164 @@
+"""Tests for planning the output of a template without generating it."""
+
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from cookiecutter import exceptions, generate, main
+from cookiecutter.cli import main as cli_main
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with rendered, plain, binary and copy-only files."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'assets').mkdir(parents=True)
+    (project / '{{cookiecutter.name}}_pkg').mkdir()
+    (project / 'README.md').write_text('# {{ cookiecutter.title }}\n')
+    (project / 'plain.txt').write_text('Nothing to render here\n')
+    (project / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n\x00\x01')
+    (project / 'assets' / 'style.css').write_text('{{ not rendered }}\n')
+    (project / '{{cookiecutter.name}}_pkg' / '__init__.py').write_text(
+        'NAME = "{{ cookiecutter.name }}"\n'
+    )
+    return repo_dir
+
+
+CONTEXT = {
+    'cookiecutter': {
+        'name': 'project',
+        'title': 'Title',
+        '_copy_without_render': ['assets'],
+    }
+}
+
+
+def test_plan_files_matches_generated_tree(template, tmp_path):
+    """The plan lists what is generated, without writing anything."""
+    plan = generate.plan_files(template, CONTEXT, output_dir=tmp_path / 'out')
+
+    assert not (tmp_path / 'out').exists()
+    assert plan[0] == generate.PlannedPath(
+        'project', 'directory', '.', 'create', None, False
+    )
+    actions = {entry.path: (entry.type, entry.action) for entry in plan}
+    assert actions == {
+        'project': ('directory', 'create'),
+        'project/assets': ('directory', 'copy'),
+        'project/assets/style.css': ('file', 'copy'),
+        'project/project_pkg': ('directory', 'create'),
+        'project/project_pkg/__init__.py': ('file', 'render'),
+        'project/README.md': ('file', 'render'),
+        'project/plain.txt': ('file', 'copy'),
+        'project/logo.png': ('file', 'copy'),
+    }
+    sizes = {entry.path: entry.size for entry in plan}
+    assert sizes['project/plain.txt'] == len('Nothing to render here\n')
+    assert sizes['project/logo.png'] == 10
+    assert sizes['project/README.md'] is None
+
+    generate.generate_files(template, CONTEXT, output_dir=tmp_path / 'out')
+    generated = {
+        str(path.relative_to(tmp_path / 'out'))
+        for path in (tmp_path / 'out').rglob('*')
+    }
+    assert generated == set(actions)
+
+
+def test_plan_files_render_contents(template, tmp_path):
+    """Rendered contents are returned in memory."""
+    plan = generate.plan_files(
+        template, CONTEXT, output_dir=tmp_path / 'out', render_contents=True
+    )
+
+    assert not (tmp_path / 'out').exists()
+    files = {entry.path: entry for entry in plan if entry.type == 'file'}
+    assert files['project/README.md'].data == b'# Title\n'
+    assert files['project/README.md'].size == len(b'# Title\n')
+    assert files['project/assets/style.css'].data == b'{{ not rendered }}\n'
+    assert files['project/logo.png'].data == b'\x89PNG\r\n\x1a\n\x00\x01'
+
+
+def test_plan_files_existing_output(template, tmp_path):
+    """Existing outputs are reported, and refused like generation would."""
+    generate.generate_files(template, CONTEXT, output_dir=tmp_path / 'out')
+    (tmp_path / 'out' / 'project' / 'plain.txt').unlink()
+
+    with pytest.raises(exceptions.OutputDirExistsException):
+        generate.plan_files(template, CONTEXT, output_dir=tmp_path / 'out')
+
+    plan = generate.plan_files(
+        template,
+        CONTEXT,
+        output_dir=tmp_path / 'out',
+        overwrite_if_exists=True,
+        skip_if_file_exists=True,
+    )
+    entries = {entry.path: entry for entry in plan}
+    assert not entries['project/plain.txt'].exists
+    assert entries['project/plain.txt'].action == 'copy'
+    assert entries['project/README.md'].exists
+    assert entries['project/README.md'].action == 'skip'
+
+
+def test_plan_files_undefined_variable(template, tmp_path):
+    """Undefined variables in names are reported as by generation."""
+    (template / '{{cookiecutter.name}}' / '{{cookiecutter.missing}}.txt').touch()
+
+    with pytest.raises(exceptions.UndefinedVariableInTemplate):
+        generate.plan_files(template, CONTEXT, output_dir=tmp_path / 'out')
+
+
+def test_cookiecutter_plan_runs_no_hooks(mocker, tmp_path):
+    """Planning with cookiecutter() runs no hooks and writes no replay."""
+    run_pre_prompt_hook = mocker.patch('cookiecutter.main.run_pre_prompt_hook')
+    dump = mocker.patch('cookiecutter.main.dump')
+    run_hook = mocker.patch('cookiecutter.generate.run_hook_from_repo_dir')
+
+    plan = main.cookiecutter(
+        'tests/fake-repo-pre/',
+        no_input=True,
+        output_dir=str(tmp_path / 'out'),
+        plan=True,
+    )
+
+    assert [entry.path for entry in plan] == [
+        'fake-project',
+        str(Path('fake-project', 'README.rst')),
+    ]
+    assert not (tmp_path / 'out').exists()
+    assert not run_pre_prompt_hook.called
+    assert not dump.called
+    assert not run_hook.called
+
+
+def test_cli_plan(tmp_path):
+    """The plan is printed as JSON."""
+    output_dir = tmp_path / 'out'
+    result = CliRunner().invoke(
+        cli_main,
+        ['tests/fake-repo-pre/', '--no-input', '-o', str(output_dir), '--plan-render'],
+    )
+
+    assert result.exit_code == 0
+    plan = json.loads(result.output)
+    assert plan[1]['path'] == str(Path('fake-project', 'README.rst'))
+    assert plan[1]['action'] == 'render'
+    assert plan[1]['size'] > 0
+    assert 'data' not in plan[1]
+    assert not output_dir.exists()
+
+
+def test_cli_plan_verbose(tmp_path):
+    """The log does not end up in the JSON of the plan."""
+    result = CliRunner().invoke(
+        cli_main,
+        ['tests/fake-repo-pre/', '--no-input', '-o', str(tmp_path), '--plan', '-v'],
+    )
+
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)[0]['action'] == 'create'
+    assert 'DEBUG cookiecutter' in result.stderr
@@ -4,7 +4,8 @@ import click
 import pytest
 from rich.prompt import InvalidResponse
 
-from cookiecutter.prompt import JsonPrompt, process_json, read_user_dict
+from cookiecutter._prompts import JsonPrompt
+from cookiecutter.prompt import process_json, read_user_dict
 
 
 def test_process_json_invalid_json():
@@ -74,7 +75,7 @@ def test_process_json_deep_dict():
 
 def test_should_raise_type_error(mocker):
     """Test `default_value` arg verification in `read_user_dict` function."""
-    prompt = mocker.patch('cookiecutter.prompt.JsonPrompt.ask')
+    prompt = mocker.patch('cookiecutter._prompts.JsonPrompt.ask')
 
     with pytest.raises(TypeError):
         read_user_dict('name', 'russell')
@@ -86,7 +87,7 @@ def test_should_call_prompt_with_process_json(mocker):
 
     Verifies generation of a processor for the user input.
     """
-    mock_prompt = mocker.patch('cookiecutter.prompt.JsonPrompt.ask', autospec=True)
+    mock_prompt = mocker.patch('cookiecutter._prompts.JsonPrompt.ask', autospec=True)
 
     read_user_dict('name', {'project_slug': 'pytest-plugin'})
     print(mock_prompt.call_args)
@@ -3,7 +3,8 @@
 import pytest
 from rich.prompt import InvalidResponse
 
-from cookiecutter.prompt import YesNoPrompt, read_user_yes_no
+from cookiecutter._prompts import YesNoPrompt
+from cookiecutter.prompt import read_user_yes_no
 
 QUESTION = 'Is it okay to delete and re-clone it?'
 DEFAULT = 'y'
@@ -14,7 +15,7 @@ def test_click_invocation(mocker):
 
     Test for boolean type invocation.
     """
-    prompt = mocker.patch('cookiecutter.prompt.YesNoPrompt.ask')
+    prompt = mocker.patch('cookiecutter._prompts.YesNoPrompt.ask')
     prompt.return_value = DEFAULT
 
     assert read_user_yes_no(QUESTION, DEFAULT) == DEFAULT
@@ -0,0 +1,161 @@
+"""Tests for generating projects into the sinks of `cookiecutter.sinks`."""
+
+import io
+import logging
+import stat
+import tarfile
+import zipfile
+
+import pytest
+
+from cookiecutter import generate, sinks
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with rendered, plain, binary and copy-only files."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'assets' / 'fonts').mkdir(parents=True)
+    (project / 'README.md').write_text('# {{ cookiecutter.title }}\n')
+    (project / 'run.sh').write_text('echo {{ cookiecutter.name }}\n')
+    (project / 'run.sh').chmod(0o755)
+    (project / 'logo.png').write_bytes(b'\x89PNG\r\n\x1a\n\x00\x01')
+    (project / 'assets' / 'style.css').write_text('{{ not rendered }}\n')
+    (project / 'assets' / 'fonts' / 'font.txt').write_text('font\n')
+    return repo_dir
+
+
+CONTEXT = {
+    'cookiecutter': {
+        'name': 'project',
+        'title': 'Title',
+        '_copy_without_render': ['assets'],
+    }
+}
+
+EXPECTED = {
+    'project/README.md': b'# Title\n',
+    'project/run.sh': b'echo project\n',
+    'project/logo.png': b'\x89PNG\r\n\x1a\n\x00\x01',
+    'project/assets/style.css': b'{{ not rendered }}\n',
+    'project/assets/fonts/font.txt': b'font\n',
+}
+
+
+class UnseekableFile(io.RawIOBase):
+    """Collect written bytes the way a socket or pipe would."""
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data.extend(data)
+        return len(data)
+
+
+@pytest.mark.parametrize('jobs', [1, 4])
+def test_generate_files_memory_sink(template, tmp_path, jobs):
+    """Projects are generated in memory without touching the output dir."""
+    output_dir = tmp_path / 'out'
+    sink = sinks.MemorySink(output_dir)
+
+    project_dir = generate.generate_files(
+        template, CONTEXT, output_dir=output_dir, jobs=jobs, sink=sink
+    )
+
+    assert project_dir == str(output_dir / 'project')
+    assert not output_dir.exists()
+    assert sink.files == EXPECTED
+    assert sink.dirs == ['project', 'project/assets', 'project/assets/fonts']
+    assert sink.modes['project/run.sh'] & stat.S_IXUSR
+
+
+def test_generate_files_zip_sink(template, tmp_path):
+    """Projects are streamed into a zip archive."""
+    output = UnseekableFile()
+
+    with sinks.ZipSink(output, root=tmp_path) as sink:
+        generate.generate_files(template, CONTEXT, output_dir=tmp_path, sink=sink)
+
+    with zipfile.ZipFile(io.BytesIO(output.data)) as archive:
+        assert archive.testzip() is None
+        files = {
+            info.filename: archive.read(info)
+            for info in archive.infolist()
+            if not info.is_dir()
+        }
+        mode = archive.getinfo('project/run.sh').external_attr >> 16
+    assert files == EXPECTED
+    assert mode & stat.S_IXUSR
+    assert not (tmp_path / 'project').exists()
+
+
+def test_generate_files_tar_sink(template, tmp_path):
+    """Projects are streamed into a compressed tar archive."""
+    output = UnseekableFile()
+
+    with sinks.TarSink(output, root=tmp_path, compression='gz') as sink:
+        generate.generate_files(template, CONTEXT, output_dir=tmp_path, sink=sink)
+
+    with tarfile.open(fileobj=io.BytesIO(output.data), mode='r:gz') as archive:
+        files = {
+            member.name: archive.extractfile(member).read()
+            for member in archive.getmembers()
+            if member.isfile()
+        }
+        assert archive.getmember('project/assets').isdir()
+        assert archive.getmember('project/run.sh').mode & stat.S_IXUSR
+    assert files == EXPECTED
+
+
+def test_generate_files_sink_outside_root(template, tmp_path):
+    """Outputs must be below the root of the sink."""
+    sink = sinks.MemorySink(tmp_path / 'elsewhere')
+
+    with pytest.raises(ValueError):
+        generate.generate_files(template, CONTEXT, output_dir=tmp_path, sink=sink)
+
+
+def test_virtual_sink_is_abstract(tmp_path):
+    """Sinks must say how they add directories and files."""
+
+    class IncompleteSink(sinks.VirtualSink):
+        def _add_dir(self, name):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink(tmp_path)
+
+
+def test_generate_files_sink_skips_hooks(caplog, tmp_path):
+    """Hooks are not run when the project is not written to disk."""
+    sink = sinks.MemorySink(tmp_path)
+
+    with caplog.at_level(logging.WARNING):
+        generate.generate_files(
+            'tests/test-pyhooks/',
+            {'cookiecutter': {'pyhooks': 'pyhooks'}},
+            output_dir=tmp_path,
+            sink=sink,
+        )
+
+    assert list(sink.files) == ['inputpyhooks/README.rst']
+    assert 'hooks of tests/test-pyhooks/ are not run' in caplog.text
+    assert not (tmp_path / 'inputpyhooks').exists()
+
+
+def test_generate_files_sink_incremental(template, tmp_path):
+    """Incremental generation needs the project on disk."""
+    with pytest.raises(ValueError):
+        generate.generate_files(
+            template,
+            CONTEXT,
+            output_dir=tmp_path,
+            overwrite_if_exists=True,
+            incremental=True,
+            sink=sinks.MemorySink(tmp_path),
+        )
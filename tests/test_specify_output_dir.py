@@ -59,6 +59,11 @@ def test_api_invocation(mocker, template, output_dir, context):
         output_dir=output_dir,
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        cache_dir=mocker.ANY,
+        hook_executor=None,
+        incremental=False,
+        sink=None,
     )
 
 
@@ -76,4 +81,9 @@ def test_default_output_dir(mocker, template, context):
         output_dir='.',
         accept_hooks=True,
         keep_project_on_failure=False,
+        jobs=1,
+        cache_dir=mocker.ANY,
+        hook_executor=None,
+        incremental=False,
+        sink=None,
     )
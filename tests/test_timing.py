@@ -0,0 +1,155 @@
+"""Tests for the timing of the phases of a bake."""
+
+import json
+import os
+import threading
+
+import pytest
+from click.testing import CliRunner
+
+from cookiecutter import generate, timing
+from cookiecutter.cli import main as cli_main
+from cookiecutter.main import cookiecutter
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Create a template with rendered and copy-only files, and hooks."""
+    repo_dir = tmp_path / 'template'
+    project = repo_dir / '{{cookiecutter.name}}'
+    (project / 'src').mkdir(parents=True)
+    (project / 'static').mkdir()
+    (repo_dir / 'hooks').mkdir()
+    (repo_dir / 'cookiecutter.json').write_text(
+        '{"name": "project", "_copy_without_render": ["static", "*.cfg"]}'
+    )
+    (repo_dir / 'hooks' / 'pre_prompt.py').write_text('pass\n')
+    (repo_dir / 'hooks' / 'post_gen_project.py').write_text('pass\n')
+    (project / 'README.md').write_text('# {{ cookiecutter.name }}\n')
+    (project / 'src' / 'main.py').write_text('print("{{ cookiecutter.name }}")\n')
+    (project / 'setup.cfg').write_text('[{{ not rendered }}]\n')
+    (project / 'static' / 'style.css').write_text('body {}\n')
+    return repo_dir
+
+
+CONTEXT = {
+    'cookiecutter': {'name': 'project', '_copy_without_render': ['static', '*.cfg']}
+}
+
+
+def test_record_bake(template, tmp_path):
+    """The phases of a bake and each of its files are reported."""
+    profile = timing.Profile()
+
+    with timing.record(profile):
+        cookiecutter(
+            str(template),
+            no_input=True,
+            output_dir=str(tmp_path / 'out'),
+            default_config={'replay_dir': str(tmp_path / 'replay')},
+        )
+
+    totals = profile.totals()
+    assert list(totals)[:2] == ['cookiecutter', 'determine_repo_dir']
+    for name in ('generate_context', 'prompt_for_config', 'dump_replay', 'copy_dir'):
+        assert totals[name][0] == 1
+    assert totals['generate_files'][0] == 1
+    hooks = [span.args['hook'] for span in profile.spans if span.name == 'hook']
+    assert hooks == ['pre_prompt', 'post_gen_project']
+    files = {
+        span.args['path']: span.args['kind']
+        for span in profile.spans
+        if span.name == 'file'
+    }
+    assert files == {
+        'README.md': 'rendered',
+        'setup.cfg': 'copy_only',
+        os.path.join('src', 'main.py'): 'rendered',
+    }
+    (bake,) = [span for span in profile.spans if span.name == 'cookiecutter']
+    assert all(span.duration <= bake.duration for span in profile.spans)
+
+
+def test_record_file_jobs(template, tmp_path):
+    """Files rendered by the threads of ``jobs`` are reported too."""
+    profile = timing.Profile()
+
+    with timing.record(profile):
+        generate.generate_files(template, CONTEXT, output_dir=tmp_path, jobs=4)
+
+    files = [span for span in profile.spans if span.name == 'file']
+    assert len(files) == 3
+    assert {span.thread for span in files} != {threading.get_ident()}
+
+
+def test_not_recording(mocker, template, tmp_path):
+    """Spans are only built while a callback is recording."""
+    callback = mocker.Mock()
+    with timing.record(callback):
+        pass
+
+    generate.generate_files(template, CONTEXT, output_dir=tmp_path)
+
+    assert not callback.called
+
+
+def test_nested_records():
+    """Each callback gets the spans of its own context."""
+    outer, inner = timing.Profile(), timing.Profile()
+
+    with timing.record(outer):
+        with timing.span('first'):
+            pass
+        with timing.record(inner), timing.span('second', path='b'):
+            timing.annotate(kind='rendered')
+
+    assert [span.name for span in outer.spans] == ['first', 'second']
+    assert [span.name for span in inner.spans] == ['second']
+    assert inner.spans[0].args == {'path': 'b', 'kind': 'rendered'}
+
+
+def test_profile_reports():
+    """Profiles are summarized and written as JSON and Chrome traces."""
+    profile = timing.Profile()
+    profile(timing.Span('generate_files', 10.0, 0.5, 1, {}))
+    profile(
+        timing.Span('file', 10.1, 0.25, 1, {'path': 'slow.txt', 'kind': 'rendered'})
+    )
+    profile(timing.Span('file', 10.3, 0.05, 2, {'path': 'fast.txt'}))
+
+    summary = profile.summary(top=1)
+    assert 'generate_files' in summary
+    assert '2     300.0 ms' in summary
+    assert summary.endswith('250.0 ms  slow.txt rendered')
+    assert 'fast.txt' not in summary
+    assert profile.to_json()[1]['start'] == pytest.approx(0.1)
+    event = profile.to_chrome_trace()['traceEvents'][1]
+    assert event['ph'] == 'X'
+    assert event['ts'] == pytest.approx(1e5)
+    assert event['dur'] == pytest.approx(2.5e5)
+
+
+def test_cli_profile(template, tmp_path):
+    """The command line prints a summary and writes a trace."""
+    trace = tmp_path / 'trace.json'
+
+    result = CliRunner().invoke(
+        cli_main,
+        [
+            str(template),
+            '--no-input',
+            '--default-config',
+            '-o',
+            str(tmp_path / 'out'),
+            '--profile',
+            '--profile-output',
+            str(trace),
+            '--profile-format',
+            'chrome',
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert 'Slowest 3 files:' in result.stderr
+    names = {event['name'] for event in json.loads(trace.read_text())['traceEvents']}
+    assert {'cookiecutter', 'generate_files', 'file', 'hook'} <= names
@@ -109,3 +109,35 @@ def test_create_tmp_repo_dir(tmp_path):
 
     assert new_repo_dir.exists()
     assert new_repo_dir.glob('*')
+
+
+def test_create_env_with_context_is_reused():
+    """Verify contexts with the same jinja settings share one environment."""
+    first = utils.create_env_with_context({'cookiecutter': {'name': 'one'}})
+    second = utils.create_env_with_context({'cookiecutter': {'name': 'two'}})
+    assert first is second
+
+
+@pytest.mark.parametrize(
+    'cookiecutter_dict',
+    [
+        {'_extensions': ['jinja2.ext.i18n']},
+        {'_jinja2_env_vars': {'lstrip_blocks': True}},
+    ],
+)
+def test_create_env_with_context_depends_on_settings(cookiecutter_dict):
+    """Verify other extensions or env vars get their own environment."""
+    default = utils.create_env_with_context({'cookiecutter': {}})
+    env = utils.create_env_with_context({'cookiecutter': cookiecutter_dict})
+    assert env is not default
+    assert env is utils.create_env_with_context({'cookiecutter': cookiecutter_dict})
+
+
+def test_create_env_with_context_depends_on_template_dir(tmp_path):
+    """Verify templates in other directories get their own environment."""
+    one = utils.create_env_with_context({'cookiecutter': {}}, tmp_path / 'one')
+    two = utils.create_env_with_context({'cookiecutter': {}}, tmp_path / 'two')
+    assert one is not two
+
+    context = {'cookiecutter': {'_repo_dir': str(tmp_path / 'one')}}
+    assert utils.create_env_with_context(context) is one
@@ -32,7 +32,7 @@ def test_clone_should_rstrip_trailing_slash_in_repo_url(mocker, clone_dir):
     vcs.clone('https://github.com/foo/bar/', clone_to_dir=clone_dir, no_input=True)
 
     mock_subprocess.assert_called_once_with(
-        ['git', 'clone', 'https://github.com/foo/bar'],
+        ['git', 'clone', '--depth', '1', 'https://github.com/foo/bar'],
         cwd=clone_dir,
         stderr=subprocess.STDOUT,
     )
@@ -120,17 +120,22 @@ def test_clone_should_invoke_vcs_command(
 
     assert repo_dir == expected_repo_dir
 
+    if repo_type == 'git':
+        # Branches are cloned shallow, directly at the requested branch
+        mock_subprocess.assert_called_once_with(
+            ['git', 'clone', '--depth', '1', '--branch', branch, repo_url],
+            cwd=clone_dir,
+            stderr=subprocess.STDOUT,
+        )
+        return
+
     mock_subprocess.assert_any_call(
         [repo_type, 'clone', repo_url], cwd=clone_dir, stderr=subprocess.STDOUT
     )
 
-    branch_info = [branch]
     # We sanitize branch information for Mercurial
-    if repo_type == "hg":
-        branch_info.insert(0, "--")
-
     mock_subprocess.assert_any_call(
-        [repo_type, 'checkout', *branch_info],
+        [repo_type, 'checkout', '--', branch],
         cwd=expected_repo_dir,
         stderr=subprocess.STDOUT,
     )
@@ -211,3 +216,96 @@ def test_clone_unknown_subprocess_error(mocker, clone_dir):
             clone_to_dir=str(clone_dir),
             no_input=True,
         )
+
+
+def test_clone_commit_sha_is_not_shallow(mocker, clone_dir):
+    """In `clone()`, commits are cloned without blobs and checked out after."""
+    mocker.patch('cookiecutter.vcs.is_vcs_installed', autospec=True, return_value=True)
+    mock_subprocess = mocker.patch(
+        'cookiecutter.vcs.subprocess.check_output',
+        autospec=True,
+    )
+    repo_url = 'https://github.com/foo/bar'
+
+    vcs.clone(repo_url, checkout='3b6d1c8', clone_to_dir=clone_dir, no_input=True)
+
+    assert mock_subprocess.call_args_list == [
+        mocker.call(
+            ['git', 'clone', '--filter=blob:none', repo_url],
+            cwd=clone_dir,
+            stderr=subprocess.STDOUT,
+        ),
+        mocker.call(
+            ['git', 'checkout', '3b6d1c8'],
+            cwd=os.path.join(clone_dir, 'bar'),
+            stderr=subprocess.STDOUT,
+        ),
+    ]
+
+
+def test_clone_directory_is_sparse(mocker, clone_dir):
+    """In `clone()`, only the template directory and hooks are checked out."""
+    mocker.patch('cookiecutter.vcs.is_vcs_installed', autospec=True, return_value=True)
+    mock_subprocess = mocker.patch(
+        'cookiecutter.vcs.subprocess.check_output',
+        autospec=True,
+    )
+    repo_url = 'https://github.com/foo/bar'
+
+    vcs.clone(repo_url, clone_to_dir=clone_dir, no_input=True, directory='./tmpl/')
+
+    assert mock_subprocess.call_args_list == [
+        mocker.call(
+            [
+                'git',
+                'clone',
+                '--depth',
+                '1',
+                '--filter=blob:none',
+                '--sparse',
+                repo_url,
+            ],
+            cwd=clone_dir,
+            stderr=subprocess.STDOUT,
+        ),
+        mocker.call(
+            ['git', 'sparse-checkout', 'set', '--', 'tmpl', 'hooks'],
+            cwd=os.path.join(clone_dir, 'bar'),
+            stderr=subprocess.STDOUT,
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    'error_message',
+    [
+        b'fatal: Remote branch HEAD~1 not found in upstream origin',
+        b"error: unknown option `sparse'",
+    ],
+)
+def test_clone_falls_back_to_full_clone(mocker, clone_dir, error_message):
+    """In `clone()`, a full clone is made when a minimal one is not possible."""
+    mocker.patch('cookiecutter.vcs.is_vcs_installed', autospec=True, return_value=True)
+    mock_subprocess = mocker.patch(
+        'cookiecutter.vcs.subprocess.check_output',
+        autospec=True,
+        side_effect=[
+            subprocess.CalledProcessError(-1, 'cmd', output=error_message),
+            b'',
+            b'',
+        ],
+    )
+    repo_url = 'https://github.com/foo/bar'
+
+    vcs.clone(repo_url, checkout='HEAD~1', clone_to_dir=clone_dir, no_input=True)
+
+    assert mock_subprocess.call_args_list[1:] == [
+        mocker.call(
+            ['git', 'clone', repo_url], cwd=clone_dir, stderr=subprocess.STDOUT
+        ),
+        mocker.call(
+            ['git', 'checkout', 'HEAD~1'],
+            cwd=os.path.join(clone_dir, 'bar'),
+            stderr=subprocess.STDOUT,
+        ),
+    ]
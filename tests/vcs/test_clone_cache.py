@@ -0,0 +1,222 @@
+"""Tests around keeping and updating clones with `clone(use_cache=True)`."""
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from cookiecutter import exceptions, main, vcs
+
+fcntl = pytest.importorskip('fcntl')
+
+
+def git(cwd, *args):
+    """Run git in ``cwd`` with a throwaway identity."""
+    return subprocess.check_output(
+        ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+        cwd=cwd,
+        stderr=subprocess.STDOUT,
+    ).decode('utf-8')
+
+
+def commit(repo, content):
+    """Commit ``content`` as the README of ``repo``."""
+    repo.joinpath('README').write_text(content)
+    git(repo, 'add', 'README')
+    git(repo, 'commit', '-q', '-m', content)
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Create a git repository to clone from, with one commit on main."""
+    repo = tmp_path / 'upstream'
+    repo.mkdir()
+    git(repo, 'init', '-q', '-b', 'main')
+    commit(repo, 'first')
+    return repo
+
+
+@pytest.fixture
+def cached_clone(upstream, clone_dir):
+    """Return a helper cloning ``upstream`` with the cache and releasing it."""
+    def cached_clone(checkout=None):
+        repo_dir = vcs.clone(
+            f'git+file://{upstream}',
+            checkout=checkout,
+            clone_to_dir=clone_dir,
+            use_cache=True,
+        )
+        vcs.release_clone_lock(repo_dir)
+        return repo_dir
+
+    return cached_clone
+
+
+def test_cached_clone_is_fetched_not_cloned_again(mocker, upstream, cached_clone):
+    """Verify an existing clone is updated in place."""
+    repo_dir = cached_clone()
+    commit(upstream, 'second')
+    check_output = mocker.spy(vcs.subprocess, 'check_output')
+
+    assert cached_clone() == repo_dir
+
+    commands = [call.args[0][1] for call in check_output.call_args_list]
+    assert 'fetch' in commands
+    assert 'clone' not in commands
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'second'
+
+
+def test_cached_clone_checks_out_requested_ref(upstream, cached_clone):
+    """Verify branches follow the remote and tags are honoured."""
+    git(upstream, 'tag', 'v1')
+    git(upstream, 'checkout', '-q', '-b', 'feature')
+    commit(upstream, 'feature')
+    cached_clone()
+
+    repo_dir = cached_clone(checkout='feature')
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'feature'
+
+    commit(upstream, 'feature again')
+    cached_clone(checkout='feature')
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'feature again'
+
+    cached_clone(checkout='v1')
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'first'
+
+
+def test_cached_clone_discards_local_changes(cached_clone):
+    """Verify files changed or added in the cached clone are reset."""
+    repo_dir = cached_clone()
+    with open(f'{repo_dir}/README', 'w') as f:
+        f.write('changed')
+    with open(f'{repo_dir}/stray', 'w') as f:
+        f.write('stray')
+
+    cached_clone()
+
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'first'
+    assert not vcs.os.path.exists(f'{repo_dir}/stray')
+
+
+def test_corrupt_cached_clone_is_cloned_again(mocker, cached_clone):
+    """Verify an unusable clone is replaced by a fresh one."""
+    repo_dir = cached_clone()
+    with open(f'{repo_dir}/.git/HEAD', 'w') as f:
+        f.write('garbage')
+    check_output = mocker.spy(vcs.subprocess, 'check_output')
+
+    assert cached_clone() == repo_dir
+
+    commands = [call.args[0][1] for call in check_output.call_args_list]
+    assert 'clone' in commands
+    with open(f'{repo_dir}/README') as f:
+        assert f.read() == 'first'
+
+
+def test_cached_clone_branch_typo(cached_clone):
+    """Verify a missing ref is reported instead of cloning again."""
+    cached_clone()
+    with pytest.raises(exceptions.RepositoryCloneFailed) as err:
+        cached_clone(checkout='unknown_branch')
+    assert 'unknown_branch branch' in str(err.value)
+
+
+def test_cached_clone_stays_locked_until_released(upstream, clone_dir):
+    """Verify the clone cannot be updated while it is in use."""
+    repo_dir = vcs.clone(
+        f'git+file://{upstream}', clone_to_dir=clone_dir, use_cache=True
+    )
+
+    with open(f'{repo_dir}.lock') as lock_file:
+        with pytest.raises(BlockingIOError):
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        vcs.release_clone_lock(f'{repo_dir}/sub/dir')
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_cached_clone_follows_directory(upstream, clone_dir):
+    """Verify the sparse checkout matches the directory of each run."""
+    for name in ('one', 'two'):
+        upstream.joinpath(name).mkdir()
+        upstream.joinpath(name, 'cookiecutter.json').write_text('{}')
+    git(upstream, 'add', '.')
+    git(upstream, 'commit', '-q', '-m', 'templates')
+
+    def cached_clone(directory):
+        repo_dir = vcs.clone(
+            f'git+file://{upstream}',
+            clone_to_dir=clone_dir,
+            use_cache=True,
+            directory=directory,
+        )
+        vcs.release_clone_lock(repo_dir)
+        return repo_dir
+
+    repo_dir = cached_clone('one')
+    assert vcs.os.path.exists(f'{repo_dir}/one/cookiecutter.json')
+    assert not vcs.os.path.exists(f'{repo_dir}/two')
+
+    cached_clone('two')
+    assert vcs.os.path.exists(f'{repo_dir}/two/cookiecutter.json')
+    assert not vcs.os.path.exists(f'{repo_dir}/one')
+
+    cached_clone(None)
+    assert vcs.os.path.exists(f'{repo_dir}/one/cookiecutter.json')
+
+
+def test_concurrent_bakes_of_cached_clone(
+    mocker, upstream, user_config_data, user_config_file, tmp_path
+):
+    """Verify a bake of a cached clone waits for another bake of it to finish."""
+    upstream.joinpath('cookiecutter.json').write_text('{"name": "project"}')
+    upstream.joinpath('{{cookiecutter.name}}').mkdir()
+    upstream.joinpath('{{cookiecutter.name}}', 'README').write_text('readme')
+    git(upstream, 'add', '.')
+    git(upstream, 'commit', '-q', '-m', 'template')
+
+    generating = threading.Event()
+    proceed = threading.Event()
+    generate_files = main.generate_files
+
+    def first_bake_waits(*args, **kwargs):
+        if not generating.is_set():
+            generating.set()
+            assert proceed.wait(30)
+        return generate_files(*args, **kwargs)
+
+    mocker.patch('cookiecutter.main.generate_files', side_effect=first_bake_waits)
+
+    def bake(name):
+        return main.cookiecutter(
+            f'git+file://{upstream}',
+            no_input=True,
+            output_dir=tmp_path / name,
+            config_file=user_config_file,
+            repo_cache=True,
+        )
+
+    lock_path = f"{user_config_data['cookiecutters_dir']}/upstream.lock"
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(bake, 'one')
+        assert generating.wait(30)
+        second = pool.submit(bake, 'two')
+
+        with pytest.raises(FutureTimeoutError):
+            second.result(timeout=1)
+        with open(lock_path) as lock_file:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        proceed.set()
+        assert first.result(timeout=30) == str(tmp_path / 'one' / 'project')
+        assert second.result(timeout=30) == str(tmp_path / 'two' / 'project')
+
+    assert not vcs._clone_locks
+    with open(lock_path) as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
@@ -170,7 +170,7 @@ def test_unzip_url(mocker, clone_dir):
     request.iter_content.return_value = mock_download()
 
     mocker.patch(
-        'cookiecutter.zipfile.requests.get',
+        'requests.get',
         return_value=request,
         autospec=True,
     )
@@ -195,7 +195,7 @@ def test_unzip_url_with_empty_chunks(mocker, clone_dir):
     request.iter_content.return_value = mock_download_with_empty_chunks()
 
     mocker.patch(
-        'cookiecutter.zipfile.requests.get',
+        'requests.get',
         return_value=request,
         autospec=True,
     )
@@ -220,7 +220,7 @@ def test_unzip_url_existing_cache(mocker, clone_dir):
     request.iter_content.return_value = mock_download()
 
     mocker.patch(
-        'cookiecutter.zipfile.requests.get',
+        'requests.get',
         return_value=request,
         autospec=True,
     )
@@ -245,7 +245,7 @@ def test_unzip_url_existing_cache_no_input(mocker, clone_dir):
     request.iter_content.return_value = mock_download()
 
     mocker.patch(
-        'cookiecutter.zipfile.requests.get',
+        'requests.get',
         return_value=request,
         autospec=True,
     )
@@ -271,7 +271,7 @@ def test_unzip_should_abort_if_no_redownload(mocker, clone_dir):
     )
 
     mock_requests_get = mocker.patch(
-        'cookiecutter.zipfile.requests.get',
+        'requests.get',
         autospec=True,
     )
 
@@ -307,3 +307,45 @@ def test_unzip_is_ok_to_reuse(mocker, clone_dir):
     assert output_dir.startswith(tempfile.gettempdir())
     assert mock_prompt_and_delete.call_count == 1
     assert request.iter_content.call_count == 0
+
+
+def test_unzip_corrupted_member(mocker, clone_dir, tmp_path):
+    """A member failing its CRC check is reported while extracting it."""
+    testzip = mocker.spy(zipfile.ZipFile, 'testzip')
+    mkdtemp = mocker.spy(zipfile.tempfile, 'mkdtemp')
+
+    archive = tmp_path / 'corrupted.zip'
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.writestr('fake-repo/', '')
+        zf.writestr('fake-repo/cookiecutter.json', '{"project_slug": "ok"}')
+    data = archive.read_bytes()
+    archive.write_bytes(data.replace(b'"ok"', b'"ko"'))
+
+    with pytest.raises(InvalidZipRepository, match='CRC'):
+        zipfile.unzip(str(archive), is_url=False, clone_to_dir=str(clone_dir))
+
+    assert not testzip.called
+    assert not Path(mkdtemp.spy_return).exists()
+
+
+def test_unzip_url_interrupted_download(mocker, clone_dir):
+    """An interrupted download does not leave a partial archive behind."""
+
+    def broken_download():
+        yield b'PK'
+        raise ConnectionError('connection reset')
+
+    request = mocker.MagicMock()
+    request.iter_content.return_value = broken_download()
+    mocker.patch(
+        'requests.get', return_value=request, autospec=True
+    )
+
+    with pytest.raises(ConnectionError):
+        zipfile.unzip(
+            'https://example.com/path/to/fake-repo-tmpl.zip',
+            is_url=True,
+            clone_to_dir=str(clone_dir),
+        )
+
+    assert not list(clone_dir.iterdir())
@@ -0,0 +1,177 @@
+"""Tests for the zip cache of function unzip() from zipfile module."""
+
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from cookiecutter import zipfile
+from cookiecutter.exceptions import InvalidZipRepository
+
+
+class ArchiveServer:
+    """Serve one archive with an ``ETag``, counting the requests made."""
+
+    def __init__(self, archive):
+        self.archive = Path(archive)
+        self.etag = '"v1"'
+        self.requests = []
+        self.full_responses = 0
+
+    def replace(self, archive, etag):
+        """Serve another archive under a new ``ETag``."""
+        self.archive = Path(archive)
+        self.etag = etag
+
+
+@pytest.fixture
+def archive_server():
+    """Run an HTTP server for `ArchiveServer` on a local port."""
+    state = ArchiveServer('tests/files/fake-repo-tmpl.zip')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state.requests.append(dict(self.headers))
+            if self.headers.get('If-None-Match') == state.etag:
+                self.send_response(304)
+                self.send_header('ETag', state.etag)
+                self.end_headers()
+                return
+            data = state.archive.read_bytes()
+            state.full_responses += 1
+            self.send_response(200)
+            self.send_header('ETag', state.etag)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.url = f'http://127.0.0.1:{server.server_port}/fake-repo-tmpl.zip'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_unzip_cached_url_is_downloaded_once(mocker, clone_dir, archive_server):
+    """Repeated calls make a conditional request and do not unpack again."""
+    extractall = mocker.spy(zipfile.ZipFile, 'extractall')
+
+    first = zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+    second = zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+
+    assert first == second
+    assert Path(first, 'cookiecutter.json').is_file()
+    assert zipfile.is_cached_tree(first, clone_dir)
+    assert archive_server.full_responses == 1
+    assert len(archive_server.requests) == 2
+    assert archive_server.requests[1]['If-None-Match'] == '"v1"'
+    assert extractall.call_count == 1
+
+
+def test_unzip_cached_url_changed(clone_dir, archive_server, tmp_path):
+    """A changed archive is downloaded and unpacked into a new tree."""
+    first = zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+
+    changed = tmp_path / 'changed.zip'
+    shutil.copy('tests/files/fake-repo-tmpl.zip', changed)
+    with changed.open('ab') as fh:
+        fh.write(b'\0')
+    archive_server.replace(changed, '"v2"')
+
+    second = zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+
+    assert first != second
+    assert Path(second, 'cookiecutter.json').is_file()
+    assert archive_server.full_responses == 2
+    archives = list(clone_dir.joinpath(zipfile.ZIP_CACHE_DIR, 'archives').iterdir())
+    assert len(archives) == 2
+
+
+def test_unzip_cached_url_archive_removed(clone_dir, archive_server):
+    """The archive is downloaded again if it is missing from the cache."""
+    zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+    shutil.rmtree(clone_dir.joinpath(zipfile.ZIP_CACHE_DIR, 'archives'))
+
+    zipfile.unzip(
+        archive_server.url, is_url=True, clone_to_dir=clone_dir, use_cache=True
+    )
+
+    assert 'If-None-Match' not in archive_server.requests[1]
+    assert archive_server.full_responses == 2
+
+
+def test_unzip_cached_local_file(mocker, clone_dir):
+    """A local archive is unpacked once for as long as its contents match."""
+    extractall = mocker.spy(zipfile.ZipFile, 'extractall')
+
+    first = zipfile.unzip(
+        'tests/files/fake-repo-tmpl.zip',
+        is_url=False,
+        clone_to_dir=clone_dir,
+        use_cache=True,
+    )
+    second = zipfile.unzip(
+        'tests/files/fake-repo-tmpl.zip',
+        is_url=False,
+        clone_to_dir=clone_dir,
+        use_cache=True,
+    )
+
+    assert first == second
+    assert zipfile.is_cached_tree(first, clone_dir)
+    assert extractall.call_count == 1
+
+
+def test_unzip_cached_protected_file_is_not_kept(clone_dir):
+    """Password protected archives are unpacked into a temporary directory."""
+    for _ in range(2):
+        output_dir = zipfile.unzip(
+            'tests/files/protected-fake-repo-tmpl.zip',
+            is_url=False,
+            clone_to_dir=clone_dir,
+            password='sekrit',
+            use_cache=True,
+        )
+        assert output_dir.startswith(tempfile.gettempdir())
+        assert not zipfile.is_cached_tree(output_dir, clone_dir)
+
+    with pytest.raises(InvalidZipRepository):
+        zipfile.unzip(
+            'tests/files/protected-fake-repo-tmpl.zip',
+            is_url=False,
+            clone_to_dir=clone_dir,
+            no_input=True,
+            use_cache=True,
+        )
+
+
+def test_unzip_cached_bad_zip_file(clone_dir):
+    """A corrupted archive leaves no unpacked tree behind."""
+    with pytest.raises(InvalidZipRepository):
+        zipfile.unzip(
+            'tests/files/bad-zip-file.zip',
+            is_url=False,
+            clone_to_dir=clone_dir,
+            use_cache=True,
+        )
+
+    trees_dir = clone_dir.joinpath(zipfile.ZIP_CACHE_DIR, 'trees')
+    assert not list(trees_dir.iterdir())